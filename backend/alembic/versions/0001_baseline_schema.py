@@ -0,0 +1,226 @@
+"""baseline schema
+
+与最初由 create_all 建出的结构一致（汇总表、变更日志、断点续传会话、reports.checksum 之前）；
+没有 alembic_version 的已有数据库首次迁移时标记为 0001，其后新增的表和列由 0002 补建。
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 13:09:13.804583
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('organizations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('contact_name', sa.String(length=50), nullable=True),
+    sa.Column('contact_phone', sa.String(length=20), nullable=True),
+    sa.Column('address', sa.String(length=200), nullable=True),
+    sa.Column('license_quota', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('organizations', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_organizations_id'), ['id'], unique=False)
+
+    op.create_table('software_updates',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.String(length=20), nullable=False),
+    sa.Column('release_date', sa.Date(), nullable=False),
+    sa.Column('release_notes', sa.Text(), nullable=True),
+    sa.Column('download_url', sa.String(length=500), nullable=True),
+    sa.Column('file_size', sa.BigInteger(), nullable=True),
+    sa.Column('is_mandatory', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('version')
+    )
+    with op.batch_alter_table('software_updates', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_software_updates_id'), ['id'], unique=False)
+
+    op.create_table('licenses',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('license_key', sa.String(length=64), nullable=False),
+    sa.Column('org_id', sa.Integer(), nullable=True),
+    sa.Column('license_type', sa.String(length=20), nullable=False),
+    sa.Column('machine_id', sa.String(length=64), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('activated_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('licenses', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_licenses_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_licenses_license_key'), ['license_key'], unique=True)
+
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=50), nullable=False),
+    sa.Column('password_hash', sa.String(length=255), nullable=False),
+    sa.Column('role', sa.String(length=20), nullable=False),
+    sa.Column('real_name', sa.String(length=50), nullable=True),
+    sa.Column('org_id', sa.Integer(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('username', 'org_id', name='uq_username_org')
+    )
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_users_username'), ['username'], unique=False)
+
+    op.create_table('analytics',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('license_id', sa.Integer(), nullable=True),
+    sa.Column('org_id', sa.Integer(), nullable=True),
+    sa.Column('report_date', sa.Date(), nullable=False),
+    sa.Column('active_user_count', sa.Integer(), nullable=False),
+    sa.Column('experiment_count', sa.Integer(), nullable=False),
+    sa.Column('module_usage', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['license_id'], ['licenses.id'], ),
+    sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('analytics', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_analytics_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_analytics_license_id'), ['license_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_analytics_org_id'), ['org_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_analytics_report_date'), ['report_date'], unique=False)
+
+    op.create_table('refresh_tokens',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('token_hash', sa.String(length=255), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('refresh_tokens', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_refresh_tokens_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_refresh_tokens_token_hash'), ['token_hash'], unique=False)
+
+    op.create_table('sync_logs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('license_id', sa.Integer(), nullable=True),
+    sa.Column('sync_type', sa.String(length=50), nullable=True),
+    sa.Column('direction', sa.String(length=10), nullable=True),
+    sa.Column('record_count', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('synced_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['license_id'], ['licenses.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('sync_logs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_sync_logs_id'), ['id'], unique=False)
+
+    op.create_table('tasks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=200), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('module_id', sa.String(length=50), nullable=True),
+    sa.Column('teacher_id', sa.Integer(), nullable=True),
+    sa.Column('org_id', sa.Integer(), nullable=True),
+    sa.Column('deadline', sa.DateTime(), nullable=True),
+    sa.Column('max_score', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ),
+    sa.ForeignKeyConstraint(['teacher_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_tasks_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_tasks_org_id'), ['org_id'], unique=False)
+
+    op.create_table('reports',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=True),
+    sa.Column('student_id', sa.Integer(), nullable=True),
+    sa.Column('file_path', sa.String(length=500), nullable=True),
+    sa.Column('original_filename', sa.String(length=255), nullable=True),
+    sa.Column('file_size', sa.BigInteger(), nullable=True),
+    sa.Column('score', sa.Integer(), nullable=True),
+    sa.Column('feedback', sa.Text(), nullable=True),
+    sa.Column('grader_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('submitted_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.Column('graded_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['grader_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['task_id'], ['tasks.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_reports_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_reports_student_id'), ['student_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_reports_task_id'), ['task_id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_reports_task_id'))
+        batch_op.drop_index(batch_op.f('ix_reports_student_id'))
+        batch_op.drop_index(batch_op.f('ix_reports_id'))
+
+    op.drop_table('reports')
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_tasks_org_id'))
+        batch_op.drop_index(batch_op.f('ix_tasks_id'))
+
+    op.drop_table('tasks')
+    with op.batch_alter_table('sync_logs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_sync_logs_id'))
+
+    op.drop_table('sync_logs')
+    with op.batch_alter_table('refresh_tokens', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_refresh_tokens_token_hash'))
+        batch_op.drop_index(batch_op.f('ix_refresh_tokens_id'))
+
+    op.drop_table('refresh_tokens')
+    with op.batch_alter_table('analytics', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_analytics_report_date'))
+        batch_op.drop_index(batch_op.f('ix_analytics_org_id'))
+        batch_op.drop_index(batch_op.f('ix_analytics_license_id'))
+        batch_op.drop_index(batch_op.f('ix_analytics_id'))
+
+    op.drop_table('analytics')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_username'))
+        batch_op.drop_index(batch_op.f('ix_users_id'))
+
+    op.drop_table('users')
+    with op.batch_alter_table('licenses', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_licenses_license_key'))
+        batch_op.drop_index(batch_op.f('ix_licenses_id'))
+
+    op.drop_table('licenses')
+    with op.batch_alter_table('software_updates', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_software_updates_id'))
+
+    op.drop_table('software_updates')
+    with op.batch_alter_table('organizations', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_organizations_id'))
+
+    op.drop_table('organizations')
@@ -0,0 +1,131 @@
+"""rollups, change log, upload sessions
+
+补建基线之后新增的结构：
+- analytics_org_daily / analytics_module_daily                    按天汇总表
+- change_log                                                       同步变更日志
+- upload_sessions                                                  断点续传会话
+- reports.checksum 及其索引                                        内容寻址存储
+
+早期由 create_all 建出的库可能已经有其中一部分（启动时建表期间部署过的版本），已存在的表/列跳过。
+已有数据的库升级后执行一次 `python -m app.manage rebuild-analytics-rollups` 和
+`python -m app.manage backfill-change-log`，为历史数据生成汇总和初始变更日志。
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 21:40:06.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _has_column(table: str, column: str) -> bool:
+    return column in {c['name'] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    if not _has_table('analytics_org_daily'):
+        op.create_table('analytics_org_daily',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('org_id', sa.Integer(), nullable=False),
+        sa.Column('report_date', sa.Date(), nullable=False),
+        sa.Column('active_user_count', sa.Integer(), nullable=False),
+        sa.Column('experiment_count', sa.Integer(), nullable=False),
+        sa.Column('report_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('org_id', 'report_date', name='uq_analytics_org_daily')
+        )
+        with op.batch_alter_table('analytics_org_daily', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_analytics_org_daily_org_id'), ['org_id'], unique=False)
+            batch_op.create_index(batch_op.f('ix_analytics_org_daily_report_date'), ['report_date'], unique=False)
+
+    if not _has_table('analytics_module_daily'):
+        op.create_table('analytics_module_daily',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('org_id', sa.Integer(), nullable=False),
+        sa.Column('report_date', sa.Date(), nullable=False),
+        sa.Column('module_id', sa.String(length=50), nullable=False),
+        sa.Column('usage_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('org_id', 'report_date', 'module_id', name='uq_analytics_module_daily')
+        )
+        with op.batch_alter_table('analytics_module_daily', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_analytics_module_daily_org_id'), ['org_id'], unique=False)
+            batch_op.create_index(batch_op.f('ix_analytics_module_daily_report_date'), ['report_date'], unique=False)
+
+    if not _has_table('change_log'):
+        op.create_table('change_log',
+        sa.Column('seq', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+        sa.Column('org_id', sa.Integer(), nullable=True),
+        sa.Column('entity', sa.String(length=20), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('op', sa.String(length=10), nullable=False),
+        sa.Column('changed_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('seq')
+        )
+        with op.batch_alter_table('change_log', schema=None) as batch_op:
+            batch_op.create_index('ix_change_log_entity', ['entity', 'entity_id', 'seq'], unique=False)
+            batch_op.create_index('ix_change_log_org_seq', ['org_id', 'seq'], unique=False)
+
+    if not _has_table('upload_sessions'):
+        op.create_table('upload_sessions',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('task_id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('total_size', sa.BigInteger(), nullable=False),
+        sa.Column('chunk_size', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['task_id'], ['tasks.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('upload_sessions', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_upload_sessions_expires_at'), ['expires_at'], unique=False)
+
+    if not _has_column('reports', 'checksum'):
+        # 只加一个可空列，SQLite 上直接 ALTER TABLE ADD COLUMN，不重建大表
+        op.add_column('reports', sa.Column('checksum', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_reports_checksum'), 'reports', ['checksum'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_reports_checksum'), table_name='reports')
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.drop_column('checksum')
+
+    with op.batch_alter_table('upload_sessions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_upload_sessions_expires_at'))
+
+    op.drop_table('upload_sessions')
+    with op.batch_alter_table('change_log', schema=None) as batch_op:
+        batch_op.drop_index('ix_change_log_org_seq')
+        batch_op.drop_index('ix_change_log_entity')
+
+    op.drop_table('change_log')
+    with op.batch_alter_table('analytics_module_daily', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_analytics_module_daily_report_date'))
+        batch_op.drop_index(batch_op.f('ix_analytics_module_daily_org_id'))
+
+    op.drop_table('analytics_module_daily')
+    with op.batch_alter_table('analytics_org_daily', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_analytics_org_daily_report_date'))
+        batch_op.drop_index(batch_op.f('ix_analytics_org_daily_org_id'))
+
+    op.drop_table('analytics_org_daily')
@@ -0,0 +1,88 @@
+"""hot query indexes
+
+按实际查询形状建立复合索引，并删除被复合索引前缀覆盖的单列索引：
+- tasks(org_id, status, updated_at)          任务同步
+- reports(student_id, status, graded_at)     成绩同步
+- reports(task_id, status)、reports(status)  任务报告筛选、仪表盘待批改数
+- users(org_id, updated_at)                  用户同步
+- licenses(org_id, is_active)                机构活跃 License 计数
+- analytics(org_id, report_date)             汇总表重建
+- refresh_tokens(expires_at)                 过期 token 清理
+
+PostgreSQL 上使用 CREATE/DROP INDEX CONCURRENTLY，不阻塞线上写入；上次中途失败留下的 INVALID 索引先删除再重建。
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 13:09:35.454209
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NEW_INDEXES = [
+    ('ix_tasks_org_status_updated', 'tasks', ['org_id', 'status', 'updated_at']),
+    ('ix_reports_student_status_graded', 'reports', ['student_id', 'status', 'graded_at']),
+    ('ix_reports_task_status', 'reports', ['task_id', 'status']),
+    ('ix_reports_status', 'reports', ['status']),
+    ('ix_users_org_updated', 'users', ['org_id', 'updated_at']),
+    ('ix_licenses_org_active', 'licenses', ['org_id', 'is_active']),
+    ('ix_analytics_org_date', 'analytics', ['org_id', 'report_date']),
+    ('ix_refresh_tokens_expires_at', 'refresh_tokens', ['expires_at']),
+]
+
+# 被上面复合索引的前缀覆盖
+REDUNDANT_INDEXES = [
+    ('ix_tasks_org_id', 'tasks', ['org_id']),
+    ('ix_reports_student_id', 'reports', ['student_id']),
+    ('ix_reports_task_id', 'reports', ['task_id']),
+    ('ix_analytics_org_id', 'analytics', ['org_id']),
+]
+
+
+def _is_invalid(name: str) -> bool:
+    # CREATE INDEX CONCURRENTLY 中途失败（超时、取消、唯一冲突）会留下同名的 INVALID 索引，
+    # if_not_exists 会把它当作已存在而跳过
+    return bool(op.get_bind().execute(
+        sa.text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": name},
+    ).scalar())
+
+
+def _create(indexes) -> None:
+    if op.get_context().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, columns in indexes:
+                if _is_invalid(name):
+                    op.drop_index(name, table_name=table, postgresql_concurrently=True)
+                op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for name, table, columns in indexes:
+            op.create_index(name, table, columns, if_not_exists=True)
+
+
+def _drop(indexes) -> None:
+    if op.get_context().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, _ in indexes:
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        for name, table, _ in indexes:
+            op.drop_index(name, table_name=table, if_exists=True)
+
+
+def upgrade() -> None:
+    _create(NEW_INDEXES)
+    _drop(REDUNDANT_INDEXES)
+
+
+def downgrade() -> None:
+    _create(REDUNDANT_INDEXES)
+    _drop(NEW_INDEXES)
@@ -0,0 +1,45 @@
+"""normalize sync timestamps
+
+SQLite 以文本保存时间：此前 func.now() 写入的 updated_at 不带小数秒（'2026-03-01 08:00:00'），
+Python 写入的值带 6 位微秒。模型改为用 database.db_now() 写入统一的 6 位小数秒格式后，
+这里把已有行补齐为同一格式，同步游标即可直接按原列比较、使用 (org_id, ..., updated_at) 索引。
+PostgreSQL 使用原生 timestamp 类型，无需处理。
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 16:42:10.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SYNC_COLUMNS = [
+    ('tasks', 'updated_at'),
+    ('users', 'updated_at'),
+]
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name != 'sqlite':
+        return
+    for table, column in SYNC_COLUMNS:
+        # 'YYYY-MM-DD HH:MM:SS' 补 '.000000'；已有部分小数位的补零到 6 位
+        op.execute(sa.text(
+            f"UPDATE {table} SET {column} = CASE WHEN length({column}) = 19 THEN {column} || '.000000' "
+            f"ELSE substr({column} || '000000', 1, 26) END "
+            f"WHERE length({column}) < 26"
+        ))
+
+
+def downgrade() -> None:
+    # 补齐后的格式旧版本同样能读取，无需还原
+    pass
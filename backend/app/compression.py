@@ -0,0 +1,196 @@
+"""
+响应压缩中间件：按 Accept-Encoding 协商 zstd / br / gzip。
+
+- zstd、br 依赖可选包 zstandard、brotli，未安装时只提供 gzip；
+- 仅压缩文本类响应（JSON、MessagePack、CSV 等）且不小于 Settings.compression_min_bytes；
+- 已带 Content-Encoding、Range 响应（206）、304、事件流（SSE）以及报告文件等二进制下载不压缩；
+- 压缩后强 ETag 改为弱 ETag，并追加 Vary: Accept-Encoding。
+"""
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:   # 可选依赖
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:   # 可选依赖
+    zstandard = None
+
+_COMPRESSIBLE_PREFIXES = ("text/", "application/json", "application/msgpack", "application/x-msgpack",
+                          "application/javascript", "image/svg+xml")
+
+
+class _Gzip:
+    def __init__(self):
+        self._obj = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        self._obj = brotli.Compressor(quality=5)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _Zstd:
+    def __init__(self):
+        self._obj = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+def available_encodings() -> dict[str, type]:
+    encodings = {"gzip": _Gzip}
+    if brotli is not None:
+        encodings["br"] = _Brotli
+    if zstandard is not None:
+        encodings["zstd"] = _Zstd
+    return encodings
+
+
+def parse_qvalues(header: str) -> dict[str, float]:
+    result = {}
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        result[token] = q
+    return result
+
+
+def choose_encoding(accept_encoding: str, preference: list[str]) -> Optional[str]:
+    """按客户端 q 值（同分时按服务端 preference 顺序）选择编码；都不可接受时返回 None。"""
+    qvalues = parse_qvalues(accept_encoding)
+    wildcard = qvalues.get("*", 0.0)
+    best, best_q = None, 0.0
+    for name in preference:
+        q = qvalues.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def _compressible(headers: Headers) -> bool:
+    content_type = headers.get("content-type", "").lower()
+    return (
+        "content-encoding" not in headers
+        and "content-range" not in headers
+        and not content_type.startswith("text/event-stream")   # 逐条推送，不能被压缩缓冲
+        and (content_type.startswith(_COMPRESSIBLE_PREFIXES) or "+json" in content_type)
+    )
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, encodings: Optional[list[str]] = None) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        available = available_encodings()
+        self.preference = [e for e in (encodings or ["zstd", "br", "gzip"]) if e in available]
+        self.compressors = available
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.preference:
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.preference)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(self.app, self.minimum_size, encoding, self.compressors[encoding])
+        await responder(scope, receive, send)
+
+
+class _CompressionResponder:
+    def __init__(self, app: ASGIApp, minimum_size: int, encoding: str, compressor_cls: type) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoding = encoding
+        self.compressor_cls = compressor_cls
+        self.compressor = None
+        self.send: Send = None
+        self.initial_message: Message = {}
+        self.started = False
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self._send)
+
+    def _start_compressed(self, streaming: bool) -> None:
+        headers = MutableHeaders(raw=self.initial_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+        if streaming:
+            del headers["Content-Length"]
+        self.compressor = self.compressor_cls()
+
+    async def _send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # 等到拿到第一段响应体再决定是否压缩
+            self.initial_message = message
+            status = message["status"]
+            self.passthrough = status in (204, 206, 304) or not _compressible(Headers(raw=message["headers"]))
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            if self.passthrough or (len(body) < self.minimum_size and not more_body):
+                self.passthrough = True
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+            self._start_compressed(streaming=more_body)
+            data = self.compressor.compress(body)
+            if not more_body:
+                data += self.compressor.finish()
+                MutableHeaders(raw=self.initial_message["headers"])["Content-Length"] = str(len(data))
+            await self.send(self.initial_message)
+            await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+            return
+
+        if self.passthrough:
+            await self.send(message)
+            return
+        data = self.compressor.compress(body)
+        if not more_body:
+            data += self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
@@ -5,12 +5,56 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     database_url: str = "sqlite:///./test.db"
+    # 只读副本（可选）：统计、列表与同步读取走副本，复制延迟超过阈值或不可连接时回退主库
+    database_replica_url: str = ""
+    replica_max_lag_seconds: float = 10.0
+    replica_check_interval_seconds: float = 5.0   # 延迟检查结果的缓存时间
+    # 连接池（PostgreSQL 等服务端数据库；SQLite 使用 SQLAlchemy 默认池）
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    # 异步引擎（客户端高频接口）单独的连接池，与同步池同时存在：每个 worker 对主库最多
+    # db_pool_size + db_max_overflow + db_async_pool_size + db_async_max_overflow 个连接
+    db_async_pool_size: int = 5
+    db_async_max_overflow: int = 5
+    db_pool_timeout: int = 30            # 等待空闲连接的秒数，超时抛错而不是无限排队
+    db_pool_recycle: int = 1800          # 连接最长复用秒数，避免被防火墙/PgBouncer 静默断开
+    db_pool_pre_ping: bool = True
+    db_pool_use_lifo: bool = True        # 优先复用最近归还的连接，空闲连接可被 recycle 回收
+    db_statement_timeout_ms: int = 30000  # PostgreSQL statement_timeout，0 表示不限制
+    # SQLite 单机部署：WAL 允许读写并发，synchronous=NORMAL 在 WAL 下仍保证一致性
+    sqlite_wal: bool = True
+    sqlite_busy_timeout_ms: int = 5000
     secret_key: str = "dev-secret-key-change-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 480   # 8 小时
     refresh_token_expire_days: int = 7
+    # Activation_Token 签名私钥（PEM，Ed25519 或 RSA）；未配置时使用旧的对称签名，客户端无法离线验证
     rsa_private_key_path: str = ""
+    license_retired_key_paths: str = ""         # 轮换下来的旧密钥（逗号分隔），仅用于验证并继续在 JWKS 中公开
+    license_accept_legacy_tokens: bool = True   # 是否仍接受旧的对称签名令牌
     upload_dir: str = "./uploads"
+    report_max_upload_bytes: int = 200 * 1024 * 1024   # 单个报告文件上限 200 MB
+    upload_chunk_bytes: int = 1024 * 1024              # 流式写盘块大小
+    upload_session_chunk_bytes: int = 5 * 1024 * 1024  # 断点续传分片大小上限（也是默认值）
+    upload_session_ttl_hours: int = 48                 # 断点续传会话有效期
+    # 非空时报告下载只返回 X-Accel-Redirect，由 nginx 的 internal location 发送文件（如 /protected-uploads/）
+    download_accel_redirect_prefix: str = ""
+    compression_min_bytes: int = 1024          # 小于此大小的响应不压缩
+    compression_encodings: str = "zstd,br,gzip"  # 服务端偏好顺序；zstd/br 需安装 zstandard/brotli
+    # 同步通知后端：memory（单进程）/ postgres（LISTEN/NOTIFY，多 worker）/ "模块:类"
+    sync_notify_backend: str = "memory"
+    sync_event_heartbeat_seconds: int = 15     # SSE 心跳间隔，防止代理断开空闲连接
+    # 已认证用户缓存：memory（进程内 LRU）/ redis（多 worker 共享）/ none / "模块:类"
+    user_cache_backend: str = "memory"
+    user_cache_ttl_seconds: float = 30.0
+    user_cache_max_entries: int = 10000
+    user_cache_redis_url: str = "redis://localhost:6379/0"
+    # 每个实例的 worker 进程数（uvicorn / gunicorn 同样读取 WEB_CONCURRENCY）
+    web_concurrency: int = 1
+    # License 吊销列表：verify 只查内存集合；后端同 sync_notify_backend，0 表示关闭（每次查库）。
+    # auto：多 worker 且主库为 PostgreSQL 时用 postgres，否则 memory；多 worker 下 memory 无法同步，verify 改为查库
+    license_revocation_backend: str = "auto"
+    license_revocation_refresh_seconds: int = 60
 
     model_config = {"env_file": ".env", "extra": "ignore"}
 
@@ -1,24 +1,228 @@
-from sqlalchemy import create_engine
+"""
+数据库引擎与会话。
+
+同步栈（Session / get_db）供大部分管理接口使用；异步栈（AsyncSession / get_async_db，
+PostgreSQL 用 asyncpg、SQLite 用 aiosqlite）供客户端高频调用的无认证接口使用，
+二者读取同一组 Settings，各自维护连接池（异步池大小由 db_async_pool_size / db_async_max_overflow 单独配置）。
+其它数据库需在 DATABASE_URL 中指定异步驱动，否则不创建异步引擎，只有调用异步接口时报错。
+
+配置 database_replica_url 时，只读接口通过 get_read_db / get_async_read_db 连接只读副本；
+ReplicaMonitor 定期检查复制延迟，超过 replica_max_lag_seconds 或副本不可连接时回退主库。
+"""
+import logging
+import time
+
+from sqlalchemy import DateTime, create_engine, event, func, text
+from sqlalchemy.engine import URL, Connection, Engine, make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import DeclarativeBase, sessionmaker, Session
-from typing import Generator
-from .config import get_settings
+from sqlalchemy.sql.functions import FunctionElement
+from typing import AsyncGenerator, Generator
+from .config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+_ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
 
 
 class Base(DeclarativeBase):
     pass
 
 
-def get_engine():
-    settings = get_settings()
-    url = settings.database_url
-    # SQLite 需要 check_same_thread=False
-    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
-    return create_engine(url, connect_args=connect_args)
+class db_now(FunctionElement):
+    """
+    数据库端当前时间，用作同步游标列（updated_at）的写入值。
+    SQLite 以文本保存时间，CURRENT_TIMESTAMP 不带小数秒，而 Python 写入的值和绑定参数带 6 位微秒；
+    这里在 SQLite 上写成同样的 6 位小数秒格式，游标可以直接按原列比较并使用索引。其它数据库即 now()。
+    """
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(db_now)
+def _compile_db_now(element, compiler, **kw):
+    return compiler.process(func.now(), **kw)
+
+
+@compiles(db_now, "sqlite")
+def _compile_db_now_sqlite(element, compiler, **kw):
+    # %f 为“秒.毫秒”，补齐为微秒位数
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
+
+def _install_sqlite_pragmas(engine: Engine, url: URL, settings: Settings) -> None:
+    in_memory = url.database in (None, "", ":memory:") or "mode=memory" in url.database
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_conn, _record):
+        cursor = dbapi_conn.cursor()
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        if settings.sqlite_wal and not in_memory:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+
+def _pool_kwargs(settings: Settings, async_pool: bool = False) -> dict:
+    return dict(
+        pool_size=settings.db_async_pool_size if async_pool else settings.db_pool_size,
+        max_overflow=settings.db_async_max_overflow if async_pool else settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_use_lifo=settings.db_pool_use_lifo,
+    )
+
+
+def get_engine(settings: Settings | None = None, url: str | None = None) -> Engine:
+    """url 默认为 settings.database_url（连接副本时传入 database_replica_url）。"""
+    settings = settings or get_settings()
+    url = make_url(url or settings.database_url)
+    if url.get_backend_name() == "sqlite":
+        # SQLite 需要 check_same_thread=False
+        engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False, "timeout": settings.sqlite_busy_timeout_ms / 1000},
+        )
+        _install_sqlite_pragmas(engine, url, settings)
+        return engine
+
+    connect_args = {}
+    if url.get_backend_name() == "postgresql" and settings.db_statement_timeout_ms > 0:
+        connect_args["options"] = f"-c statement_timeout={settings.db_statement_timeout_ms}"
+    return create_engine(url, connect_args=connect_args, **_pool_kwargs(settings))
+
+
+def _async_url(url: URL) -> URL | None:
+    """换成异步驱动后的地址；PostgreSQL / SQLite 之外的数据库须在地址中自行指定异步驱动，否则返回 None。"""
+    backend = url.get_backend_name()
+    if backend in _ASYNC_DRIVERS:
+        return url.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}")
+    try:
+        return url if url.get_dialect().is_async else None
+    except Exception:   # 未安装的驱动
+        return None
+
+
+def has_async_driver(url: str) -> bool:
+    return _async_url(make_url(url)) is not None
+
+
+def get_async_engine(settings: Settings | None = None, url: str | None = None) -> AsyncEngine:
+    """与 get_engine 使用同一数据库地址，驱动换成 asyncpg / aiosqlite。"""
+    settings = settings or get_settings()
+    url = make_url(url or settings.database_url)
+    backend = url.get_backend_name()
+    async_url = _async_url(url)
+    if async_url is None:
+        raise RuntimeError(f"数据库 {backend} 没有可用的异步驱动，请在 DATABASE_URL 中指定异步驱动")
+    url = async_url
+    if backend == "sqlite":
+        engine = create_async_engine(url, connect_args={"timeout": settings.sqlite_busy_timeout_ms / 1000})
+        _install_sqlite_pragmas(engine.sync_engine, url, settings)
+        return engine
+
+    connect_args = {}
+    if settings.db_statement_timeout_ms > 0:
+        connect_args["server_settings"] = {"statement_timeout": str(settings.db_statement_timeout_ms)}
+    return create_async_engine(url, connect_args=connect_args, **_pool_kwargs(settings, async_pool=True))
+
+
+def pool_stats(engine: Engine) -> dict:
+    """连接池状态（QueuePool 之外的池只返回类型与 status 文本）。"""
+    pool = engine.pool
+    stats = {"pool_class": type(pool).__name__, "status": pool.status()}
+    for key in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, key, None)
+        if callable(method):
+            stats[key] = method()
+    if "size" in stats:
+        stats["max_overflow"] = pool._max_overflow
+        stats["capacity"] = stats["size"] + max(pool._max_overflow, 0)
+    return stats
+
 
+# 主库上 pg_last_wal_receive_lsn() 为 NULL，结果为 NULL（视为无延迟）；
+# 副本已追平 WAL 时为 0，避免主库长时间无写入时 now() - 最后回放时间被误判为延迟
+_PG_REPLICA_LAG = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+def replica_lag_seconds(conn: Connection) -> float:
+    """副本复制延迟（秒）；非 PostgreSQL 副本视为无延迟。"""
+    if conn.dialect.name != "postgresql":
+        return 0.0
+    return float(conn.execute(_PG_REPLICA_LAG).scalar() or 0)
+
+
+class ReplicaMonitor:
+    """记录副本是否可用（可连接且延迟不超过 max_lag_seconds），检查结果缓存 check_interval 秒。"""
+
+    def __init__(self, max_lag_seconds: float, check_interval: float):
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.lag_seconds: float | None = None
+        self._next_check = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return self.lag_seconds is not None and self.lag_seconds <= self.max_lag_seconds
+
+    def _due(self) -> bool:
+        return time.monotonic() >= self._next_check
+
+    def _record(self, lag: float | None) -> None:
+        was_healthy = self.healthy
+        self.lag_seconds = lag
+        self._next_check = time.monotonic() + self.check_interval
+        if was_healthy and not self.healthy:
+            logger.warning("只读副本不可用（延迟 %s 秒），读请求回退主库", lag)
+
+    def usable(self, engine: Engine) -> bool:
+        if self._due():
+            try:
+                with engine.connect() as conn:
+                    lag = replica_lag_seconds(conn)
+            except SQLAlchemyError:
+                logger.exception("检查只读副本延迟失败")
+                lag = None
+            self._record(lag)
+        return self.healthy
+
+    async def usable_async(self, engine: AsyncEngine) -> bool:
+        if self._due():
+            try:
+                async with engine.connect() as conn:
+                    lag = await conn.run_sync(replica_lag_seconds)
+            except SQLAlchemyError:
+                logger.exception("检查只读副本延迟失败")
+                lag = None
+            self._record(lag)
+        return self.healthy
+
+
+_settings = get_settings()
 
 engine = get_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 没有异步驱动的数据库不创建异步引擎：同步接口照常可用，调用异步接口时才报错
+async_engine: AsyncEngine | None = get_async_engine() if has_async_driver(_settings.database_url) else None
+# 提交后不过期对象：响应序列化时不会再触发（异步下不允许的）隐式加载
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+replica_engine: Engine | None = None
+async_replica_engine: AsyncEngine | None = None
+if _settings.database_replica_url:
+    replica_engine = get_engine(url=_settings.database_replica_url)
+    if has_async_driver(_settings.database_replica_url):
+        async_replica_engine = get_async_engine(url=_settings.database_replica_url)
+replica_monitor = ReplicaMonitor(_settings.replica_max_lag_seconds, _settings.replica_check_interval_seconds)
+
 
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
@@ -26,3 +230,37 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+def _require_async() -> AsyncEngine:
+    if async_engine is None:
+        backend = make_url(_settings.database_url).get_backend_name()
+        raise RuntimeError(f"数据库 {backend} 没有可用的异步驱动，无法使用异步接口；请在 DATABASE_URL 中指定异步驱动")
+    return async_engine
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    _require_async()
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_read_db() -> Generator[Session, None, None]:
+    """只读会话：副本可用时连接副本，否则连接主库。不要在此会话上写入。"""
+    bind = engine
+    if replica_engine is not None and replica_monitor.usable(replica_engine):
+        bind = replica_engine
+    db = SessionLocal(bind=bind)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """get_read_db 的异步版本。"""
+    bind = _require_async()
+    if async_replica_engine is not None and await replica_monitor.usable_async(async_replica_engine):
+        bind = async_replica_engine
+    async with AsyncSessionLocal(bind=bind) as db:
+        yield db
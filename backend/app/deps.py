@@ -1,5 +1,7 @@
 """
 FastAPI 依赖注入：认证与权限控制。
+
+当前用户优先从用户缓存（services/user_cache.py）取得，未命中时查库并回填。
 """
 from typing import Callable
 
@@ -10,15 +12,12 @@ from sqlalchemy.orm import Session
 from .database import get_db
 from .models.user import User
 from .services.auth import decode_access_token
+from .services.user_cache import get_user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/cloud/auth/login")
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> User:
-    """解析 JWT，返回当前用户。"""
+def _token_user_id(token: str) -> int:
     payload = decode_access_token(token)
     if payload is None:
         raise HTTPException(
@@ -30,11 +29,27 @@ def get_current_user(
     user_id = payload.get("sub")
     if user_id is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="令牌无效")
+    return int(user_id)
+
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+def _active_user(user: User | None) -> User:
     if user is None or not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="用户不存在或已禁用")
+    return user
+
 
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> User:
+    """解析 JWT，返回当前用户。"""
+    user_id = _token_user_id(token)
+    cache = get_user_cache()
+    user = cache.get(db, user_id)
+    if user is None:
+        epoch = cache.epoch
+        user = _active_user(db.query(User).filter(User.id == user_id).first())
+        cache.put(user, epoch)
     return user
 
 
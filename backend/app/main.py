@@ -1,11 +1,13 @@
+import asyncio
 import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .database import engine, Base
-# 导入所有模型，确保 Base.metadata 包含所有表
-from .models import *  # noqa: F401, F403
+from .compression import CompressionMiddleware
+from .config import get_settings
+from .services.revocation import get_revocations, refresh_revocations_periodically
+from .services.signing import get_keyring
 
 # CORS 允许的来源（环境变量配置，逗号分隔；默认允许所有）
 _allowed_origins_str = os.environ.get(
@@ -20,9 +22,15 @@ ALLOWED_ORIGINS = (
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # 开发环境：直接建表；生产环境改为 alembic upgrade head
-    Base.metadata.create_all(bind=engine)
+    # 表结构由部署步骤 `python -m app.manage migrate` 维护，启动时不建表、不反射表结构
+    get_keyring()   # 签名密钥配置错误时启动即失败
+    refresher = None
+    if get_revocations().refresh_seconds > 0:
+        # 首次加载即在后台任务中完成，加载成功前 verify 回退为查库
+        refresher = asyncio.create_task(refresh_revocations_periodically())
     yield
+    if refresher is not None:
+        refresher.cancel()
 
 
 app = FastAPI(
@@ -31,6 +39,12 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=get_settings().compression_min_bytes,
+    encodings=[e.strip() for e in get_settings().compression_encodings.split(",") if e.strip()],
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOWED_ORIGINS,
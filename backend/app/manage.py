@@ -0,0 +1,123 @@
+"""
+运维命令行入口。
+
+用法：
+    python -m app.manage migrate [--revision head]
+    python -m app.manage rebuild-analytics-rollups
+    python -m app.manage gc-report-blobs [--grace-hours 24] [--dry-run]
+    python -m app.manage backfill-change-log
+    python -m app.manage compact-change-log
+    python -m app.manage generate-signing-key --out keys/private.pem [--alg ed25519|rsa]
+"""
+import argparse
+import sys
+
+from .database import SessionLocal
+
+
+def _migrate(args: argparse.Namespace) -> None:
+    from .migrate import migration_engine, upgrade
+
+    engine = migration_engine()
+    try:
+        upgrade(engine, args.revision)
+    finally:
+        engine.dispose()
+    print(f"数据库已迁移到 {args.revision}")
+
+
+def _rebuild_analytics_rollups(args: argparse.Namespace) -> None:
+    from .services.analytics import rebuild_rollups
+
+    db = SessionLocal()
+    try:
+        rebuild_rollups(db)
+    finally:
+        db.close()
+    print("analytics 汇总表已重建")
+
+
+def _gc_report_blobs(args: argparse.Namespace) -> None:
+    from .services.storage import collect_garbage
+    from .services.upload_session import purge_expired
+
+    db = SessionLocal()
+    try:
+        if not args.dry_run:
+            print(f"已清理 {purge_expired(db)} 个过期的断点续传会话")
+        removed = collect_garbage(db, grace_seconds=int(args.grace_hours * 3600), dry_run=args.dry_run)
+    finally:
+        db.close()
+    action = "将删除" if args.dry_run else "已删除"
+    print(f"{action} {len(removed)} 个无引用的报告文件")
+
+
+def _backfill_change_log(args: argparse.Namespace) -> None:
+    from .services.changelog import backfill
+
+    db = SessionLocal()
+    try:
+        count = backfill(db)
+    finally:
+        db.close()
+    print(f"已为现有数据写入 {count} 条变更日志")
+
+
+def _compact_change_log(args: argparse.Namespace) -> None:
+    from .services.changelog import compact
+
+    db = SessionLocal()
+    try:
+        count = compact(db)
+    finally:
+        db.close()
+    print(f"已删除 {count} 条被覆盖的变更日志")
+
+
+def _generate_signing_key(args: argparse.Namespace) -> None:
+    import os
+
+    from .services.signing import SigningKey, generate_private_key_pem
+
+    pem = generate_private_key_pem(args.alg)
+    # 不覆盖已有文件，权限 0600
+    fd = os.open(args.out, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(pem)
+    print(f"已生成 {args.alg} 签名私钥 {args.out}（kid={SigningKey.from_pem(pem).kid}）")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.manage", description="智信优控云端运维命令")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("migrate", help="执行 Alembic 迁移（部署时在启动 API 之前执行一次）")
+    p.add_argument("--revision", default="head", help="目标版本，默认 head")
+    p.set_defaults(func=_migrate)
+
+    p = sub.add_parser("rebuild-analytics-rollups", help="从 analytics 明细全量重建按天汇总表")
+    p.set_defaults(func=_rebuild_analytics_rollups)
+
+    p = sub.add_parser("gc-report-blobs", help="清理过期的断点续传会话及没有 Report 引用的报告文件")
+    p.add_argument("--grace-hours", type=float, default=24, help="跳过最近 N 小时内写入的文件")
+    p.add_argument("--dry-run", action="store_true", help="只列出不删除")
+    p.set_defaults(func=_gc_report_blobs)
+
+    p = sub.add_parser("backfill-change-log", help="为现有任务/用户/已评分报告写入初始变更日志（上线时执行一次）")
+    p.set_defaults(func=_backfill_change_log)
+
+    p = sub.add_parser("compact-change-log", help="删除同一实体已被后续变更覆盖的旧日志")
+    p.set_defaults(func=_compact_change_log)
+
+    p = sub.add_parser("generate-signing-key", help="生成 Activation_Token 签名私钥（PEM），用于 RSA_PRIVATE_KEY_PATH")
+    p.add_argument("--out", required=True, help="输出文件路径（已存在时报错）")
+    p.add_argument("--alg", choices=["ed25519", "rsa"], default="ed25519", help="签名算法，默认 ed25519")
+    p.set_defaults(func=_generate_signing_key)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
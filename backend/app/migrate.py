@@ -0,0 +1,46 @@
+"""
+数据库迁移（Alembic）：部署时作为独立的一次性步骤执行，应用启动时不再建表或反射表结构。
+
+    python -m app.manage migrate
+
+引入 Alembic 之前由 create_all 建出的数据库没有 alembic_version 表，首次执行时先标记为基线版本再升级。
+迁移使用单独的引擎（migration_engine），不带接口连接上的 statement_timeout。
+"""
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+from .config import Settings, get_settings
+from .database import get_engine
+
+BASELINE_REVISION = "0001"
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def alembic_config() -> Config:
+    cfg = Config(os.path.join(_BACKEND_DIR, "alembic.ini"))
+    cfg.set_main_option("script_location", os.path.join(_BACKEND_DIR, "alembic"))
+    cfg.attributes["configure_logger"] = False
+    return cfg
+
+
+def migration_engine(settings: Settings | None = None) -> Engine:
+    """数据库地址同应用，但不设 statement_timeout：大表上 CREATE INDEX CONCURRENTLY 等操作远超接口的超时。"""
+    settings = settings or get_settings()
+    return get_engine(settings.model_copy(update={"db_statement_timeout_ms": 0}))
+
+
+def upgrade(engine: Engine, revision: str = "head") -> None:
+    cfg = alembic_config()
+    with engine.connect() as conn:
+        cfg.attributes["connection"] = conn
+        insp = inspect(conn)
+        legacy = not insp.has_table("alembic_version") and insp.has_table("users")
+        conn.commit()   # 结束检查用的事务：事务交给 Alembic 管理（迁移中的 autocommit_block 依赖这一点）
+        if legacy:
+            command.stamp(cfg, BASELINE_REVISION)
+        command.upgrade(cfg, revision)
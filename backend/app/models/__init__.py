@@ -3,11 +3,20 @@ from .license import License
 from .user import User, RefreshToken
 from .task import Task
 from .report import Report
-from .analytics import Analytics
+from .analytics import Analytics, AnalyticsOrgDaily, AnalyticsModuleDaily
 from .update import SoftwareUpdate
 from .sync_log import SyncLog
+from .upload_session import UploadSession
+from .change_log import ChangeLog
 
 __all__ = [
     "Organization", "License", "User", "RefreshToken",
-    "Task", "Report", "Analytics", "SoftwareUpdate", "SyncLog",
+    "Task", "Report", "Analytics", "AnalyticsOrgDaily",
+    "AnalyticsModuleDaily", "SoftwareUpdate", "SyncLog", "UploadSession",
+    "ChangeLog",
 ]
+
+# 注册变更日志、用户缓存失效、License 吊销广播的 session 事件（需在全部模型导入之后）
+from ..services import changelog as _changelog  # noqa: E402, F401
+from ..services import revocation as _revocation  # noqa: E402, F401
+from ..services import user_cache as _user_cache  # noqa: E402, F401
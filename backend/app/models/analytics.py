@@ -1,5 +1,5 @@
 from datetime import datetime, date
-from sqlalchemy import String, Integer, DateTime, Date, ForeignKey, func
+from sqlalchemy import String, Integer, DateTime, Date, ForeignKey, Index, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy import JSON
@@ -8,10 +8,11 @@ from ..database import Base
 
 class Analytics(Base):
     __tablename__ = "analytics"
+    __table_args__ = (Index("ix_analytics_org_date", "org_id", "report_date"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     license_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("licenses.id"), index=True)
-    org_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("organizations.id"), index=True)
+    org_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("organizations.id"))
     report_date: Mapped[date] = mapped_column(Date, nullable=False, index=True)
     active_user_count: Mapped[int] = mapped_column(Integer, default=0)
     experiment_count: Mapped[int] = mapped_column(Integer, default=0)
@@ -21,3 +22,30 @@ class Analytics(Base):
 
     license: Mapped["License"] = relationship("License", back_populates="analytics")
     organization: Mapped["Organization"] = relationship("Organization", back_populates="analytics")
+
+
+# 按机构按天汇总：上报时增量维护，可通过 `python -m app.manage rebuild-analytics-rollups` 重建
+class AnalyticsOrgDaily(Base):
+    __tablename__ = "analytics_org_daily"
+    __table_args__ = (UniqueConstraint("org_id", "report_date", name="uq_analytics_org_daily"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    org_id: Mapped[int] = mapped_column(Integer, ForeignKey("organizations.id"), nullable=False, index=True)
+    report_date: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    active_user_count: Mapped[int] = mapped_column(Integer, default=0)
+    experiment_count: Mapped[int] = mapped_column(Integer, default=0)
+    report_count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+# 按机构按天按模块的使用次数（由 module_usage 展开，上报时增量维护）
+class AnalyticsModuleDaily(Base):
+    __tablename__ = "analytics_module_daily"
+    __table_args__ = (
+        UniqueConstraint("org_id", "report_date", "module_id", name="uq_analytics_module_daily"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    org_id: Mapped[int] = mapped_column(Integer, ForeignKey("organizations.id"), nullable=False, index=True)
+    report_date: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    module_id: Mapped[str] = mapped_column(String(50), nullable=False)
+    usage_count: Mapped[int] = mapped_column(Integer, default=0)
@@ -0,0 +1,21 @@
+from datetime import datetime
+from sqlalchemy import String, Integer, BigInteger, DateTime, Index, func
+from sqlalchemy.orm import Mapped, mapped_column
+from ..database import Base
+
+
+# 同步变更日志（只追加）：由 session 事件在 tasks/users/reports 增删改时写入，
+# 客户端按 seq 单调推进拉取增量；删除以 op="delete" 的墓碑记录传播
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+    __table_args__ = (
+        Index("ix_change_log_org_seq", "org_id", "seq"),
+        Index("ix_change_log_entity", "entity", "entity_id", "seq"),
+    )
+
+    seq: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    org_id: Mapped[int | None] = mapped_column(Integer)
+    entity: Mapped[str] = mapped_column(String(20), nullable=False)   # tasks/users/grades
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    op: Mapped[str] = mapped_column(String(10), nullable=False)       # upsert/delete
+    changed_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
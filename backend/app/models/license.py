@@ -1,11 +1,12 @@
 from datetime import datetime
-from sqlalchemy import String, Integer, Boolean, DateTime, ForeignKey, func
+from sqlalchemy import String, Integer, Boolean, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from ..database import Base
 
 
 class License(Base):
     __tablename__ = "licenses"
+    __table_args__ = (Index("ix_licenses_org_active", "org_id", "is_active"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     license_key: Mapped[str] = mapped_column(String(64), unique=True, nullable=False, index=True)
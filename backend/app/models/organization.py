@@ -12,7 +12,7 @@ class Organization(Base):
     contact_name: Mapped[str | None] = mapped_column(String(50))
     contact_phone: Mapped[str | None] = mapped_column(String(20))
     address: Mapped[str | None] = mapped_column(String(200))
-    license_quota: Mapped[int] = mapped_column(Integer, default=10)
+    license_quota: Mapped[int] = mapped_column(Integer, default=10)   # 可持有（未吊销）的 License 数，见 services/license.py
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
 
@@ -1,22 +1,27 @@
 from datetime import datetime
-from sqlalchemy import String, Integer, DateTime, ForeignKey, Text, BigInteger, func
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Text, BigInteger, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from ..database import Base
 
 
 class Report(Base):
     __tablename__ = "reports"
+    __table_args__ = (
+        Index("ix_reports_student_status_graded", "student_id", "status", "graded_at"),   # 成绩同步
+        Index("ix_reports_task_status", "task_id", "status"),                             # 按任务统计/筛选
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    task_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("tasks.id"), index=True)
-    student_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("users.id"), index=True)
+    task_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("tasks.id"))
+    student_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("users.id"))
     file_path: Mapped[str | None] = mapped_column(String(500))
     original_filename: Mapped[str | None] = mapped_column(String(255))
     file_size: Mapped[int | None] = mapped_column(BigInteger)
+    checksum: Mapped[str | None] = mapped_column(String(64), index=True)  # SHA-256 hex，亦为 blob 存储的 key
     score: Mapped[int | None] = mapped_column(Integer)          # 0-100
     feedback: Mapped[str | None] = mapped_column(Text)
     grader_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("users.id"))
-    status: Mapped[str] = mapped_column(String(20), default="submitted")  # submitted/graded
+    status: Mapped[str] = mapped_column(String(20), default="submitted", index=True)  # submitted/graded
     submitted_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
     graded_at: Mapped[datetime | None] = mapped_column(DateTime)
     updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -1,23 +1,26 @@
 from datetime import datetime
-from sqlalchemy import String, Integer, DateTime, ForeignKey, Text, func
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Text, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from ..database import Base
+from ..database import Base, db_now
 
 
 class Task(Base):
     __tablename__ = "tasks"
+    # 同步：org_id + status 过滤，按 updated_at 推进游标
+    __table_args__ = (Index("ix_tasks_org_status_updated", "org_id", "status", "updated_at"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     title: Mapped[str] = mapped_column(String(200), nullable=False)
     description: Mapped[str | None] = mapped_column(Text)
     module_id: Mapped[str | None] = mapped_column(String(50))
     teacher_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("users.id"))
-    org_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("organizations.id"), index=True)
+    org_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("organizations.id"), active_history=True)  # 变更日志需要原 org_id
     deadline: Mapped[datetime | None] = mapped_column(DateTime)
     max_score: Mapped[int] = mapped_column(Integer, default=100)
     status: Mapped[str] = mapped_column(String(20), default="draft")  # draft/published
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
-    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
+    # server_default 只用于绕过 ORM 的写入；ORM / Core 写入统一为 db_now() 的格式，同步游标按原列比较
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=db_now(), server_default=func.now(), onupdate=db_now())
 
     teacher: Mapped["User"] = relationship("User", back_populates="tasks", foreign_keys=[teacher_id])
     reports: Mapped[list["Report"]] = relationship("Report", back_populates="task")
@@ -0,0 +1,18 @@
+from datetime import datetime
+from sqlalchemy import String, Integer, DateTime, ForeignKey, BigInteger, func
+from sqlalchemy.orm import Mapped, mapped_column
+from ..database import Base
+
+
+# 断点续传上传会话；已接收的分片以文件形式保存在 {upload_dir}/sessions/{id}/ 下
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)   # uuid4 hex
+    task_id: Mapped[int] = mapped_column(Integer, ForeignKey("tasks.id"), nullable=False)
+    student_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    total_size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    chunk_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
@@ -1,22 +1,26 @@
 from datetime import datetime
-from sqlalchemy import String, Integer, Boolean, DateTime, ForeignKey, func, UniqueConstraint
+from sqlalchemy import String, Integer, Boolean, DateTime, ForeignKey, func, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from ..database import Base
+from ..database import Base, db_now
 
 
 class User(Base):
     __tablename__ = "users"
-    __table_args__ = (UniqueConstraint("username", "org_id", name="uq_username_org"),)
+    __table_args__ = (
+        UniqueConstraint("username", "org_id", name="uq_username_org"),
+        Index("ix_users_org_updated", "org_id", "updated_at"),   # 用户同步
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     username: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
     password_hash: Mapped[str] = mapped_column(String(255), nullable=False)
     role: Mapped[str] = mapped_column(String(20), nullable=False)  # super_admin/org_admin/teacher/student
     real_name: Mapped[str | None] = mapped_column(String(50))
-    org_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("organizations.id"))
+    org_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("organizations.id"), active_history=True)  # 变更日志需要原 org_id
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
-    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
+    # server_default 只用于绕过 ORM 的写入；ORM / Core 写入统一为 db_now() 的格式，同步游标按原列比较
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=db_now(), server_default=func.now(), onupdate=db_now())
 
     organization: Mapped["Organization"] = relationship("Organization", back_populates="users")
     refresh_tokens: Mapped[list["RefreshToken"]] = relationship("RefreshToken", back_populates="user", cascade="all, delete-orphan")
@@ -31,7 +35,7 @@ class RefreshToken(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     token_hash: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
-    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
 
     user: Mapped["User"] = relationship("User", back_populates="refresh_tokens")
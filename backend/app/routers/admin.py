@@ -5,7 +5,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy import func as sa_func
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import async_engine, engine, get_read_db, pool_stats, replica_engine, replica_monitor
 from ..deps import require_role
 from ..models.organization import Organization
 from ..models.license import License
@@ -16,7 +16,7 @@ router = APIRouter(prefix="/api/cloud/admin", tags=["管理后台"])
 
 @router.get("/dashboard")
 def dashboard(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _=Depends(require_role("super_admin", "org_admin")),
 ):
     total_orgs = db.query(sa_func.count(Organization.id)).scalar() or 0
@@ -30,3 +30,20 @@ def dashboard(
         "active_licenses": active_licenses,
         "pending_reports": pending_reports,
     }
+
+
+@router.get("/diagnostics/db-pool")
+def db_pool_diagnostics(_=Depends(require_role("super_admin"))):
+    """
+    当前 worker 进程的数据库连接池状态（checkedout 接近 capacity 说明连接池即将耗尽）；
+    async 为异步引擎的连接池（数据库没有异步驱动时为 null），replica 为只读副本的连接池与最近一次延迟检查结果（未配置副本时为 null）。
+    """
+    replica = None
+    if replica_engine is not None:
+        replica = {
+            **pool_stats(replica_engine),
+            "lag_seconds": replica_monitor.lag_seconds,
+            "healthy": replica_monitor.healthy,
+        }
+    async_stats = pool_stats(async_engine.sync_engine) if async_engine is not None else None
+    return {**pool_stats(engine), "async": async_stats, "replica": replica}
@@ -1,29 +1,37 @@
 """
-统计分析路由：数据上报、总览、趋势、模块使用排名。
+统计分析路由：数据上报（单条/批量）、总览、趋势、模块使用排名。
 """
+import json
 from datetime import date, timedelta
-from collections import defaultdict
-from fastapi import APIRouter, Depends, Query, status
-from sqlalchemy import func as sa_func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from pydantic import ValidationError
+from sqlalchemy import func as sa_func, insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_async_db, get_read_db
 from ..deps import require_role
-from ..models.analytics import Analytics
+from ..models.analytics import Analytics, AnalyticsOrgDaily, AnalyticsModuleDaily
 from ..models.organization import Organization
 from ..schemas.analytics import (
     AnalyticsReport, AnalyticsRead,
+    AnalyticsBatchItemResult, AnalyticsBatchResponse,
     OverviewResponse, OrgSummary,
     TrendsResponse, TrendPoint,
     ModulesResponse, ModuleUsageItem,
 )
+from ..services.analytics import apply_to_rollups
 
 router = APIRouter(prefix="/api/cloud/analytics", tags=["统计分析"])
 
+# 批量上报：单次请求条数上限、每条 INSERT 语句包含的行数
+BATCH_MAX_ITEMS = 5000
+BATCH_CHUNK_SIZE = 500
+
 
 @router.post("/report", response_model=AnalyticsRead, status_code=status.HTTP_201_CREATED)
-def report_analytics(body: AnalyticsReport, db: Session = Depends(get_db)):
-    """Local_Client 上报使用数据（追加模式）。"""
+async def report_analytics(body: AnalyticsReport, db: AsyncSession = Depends(get_async_db)):
+    """Local_Client 上报使用数据（追加模式），同时累加按天汇总表。"""
     record = Analytics(
         license_id=body.license_id,
         org_id=body.org_id,
@@ -33,56 +41,143 @@ def report_analytics(body: AnalyticsReport, db: Session = Depends(get_db)):
         module_usage=body.module_usage,
     )
     db.add(record)
-    db.commit()
-    db.refresh(record)
+    await db.run_sync(apply_to_rollups, [body])
+    await db.commit()
+    await db.refresh(record)
     return record
 
 
+async def _read_batch_items(request: Request) -> list:
+    """
+    读取批量上报请求体，支持两种格式：
+    - application/json：对象数组
+    - application/x-ndjson：每行一个 JSON 对象（某行解析失败只影响该条）
+    """
+    raw = await request.body()
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        items: list = []
+        for line in raw.splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                items.append(e)
+    else:
+        try:
+            items = json.loads(raw)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="请求体不是合法的 JSON")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="请求体必须是数组")
+
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"单次最多上报 {BATCH_MAX_ITEMS} 条",
+        )
+    return items
+
+
+def _validation_message(exc: ValidationError) -> str:
+    err = exc.errors()[0]
+    loc = ".".join(str(p) for p in err["loc"])
+    return f"{loc}: {err['msg']}" if loc else err["msg"]
+
+
+@router.post("/report/batch", response_model=AnalyticsBatchResponse)
+async def report_analytics_batch(
+    items: list = Depends(_read_batch_items),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Local_Client 批量上报使用数据（追加模式）。
+    先整体校验，合法数据按 BATCH_CHUNK_SIZE 分块多行插入，单个事务提交；
+    返回每条数据的处理结果（index 对应请求中的位置）。
+    """
+    results: list[AnalyticsBatchItemResult | None] = [None] * len(items)
+    valid: list[tuple[int, AnalyticsReport]] = []
+    for i, item in enumerate(items):
+        if isinstance(item, ValueError):
+            results[i] = AnalyticsBatchItemResult(index=i, status="invalid", error=f"JSON 解析失败: {item}")
+            continue
+        try:
+            valid.append((i, AnalyticsReport.model_validate(item)))
+        except ValidationError as e:
+            results[i] = AnalyticsBatchItemResult(index=i, status="invalid", error=_validation_message(e))
+
+    stmt = insert(Analytics).returning(Analytics.id, sort_by_parameter_order=True)
+    for start in range(0, len(valid), BATCH_CHUNK_SIZE):
+        chunk = valid[start:start + BATCH_CHUNK_SIZE]
+        ids = (await db.scalars(stmt, [body.model_dump() for _, body in chunk])).all()
+        for (i, _), new_id in zip(chunk, ids):
+            results[i] = AnalyticsBatchItemResult(index=i, status="created", id=new_id)
+    await db.run_sync(apply_to_rollups, [body for _, body in valid])
+    await db.commit()
+
+    return AnalyticsBatchResponse(
+        accepted=len(valid),
+        rejected=len(items) - len(valid),
+        results=results,
+    )
+
+
 @router.get("/overview", response_model=OverviewResponse)
 def analytics_overview(
-    db: Session = Depends(get_db),
+    org_limit: int = Query(20, ge=1, le=200),
+    org_offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db),
     _=Depends(require_role("super_admin")),
 ):
+    # 读取按天汇总表，避免每次扫描 analytics 明细
     cutoff = date.today() - timedelta(days=30)
 
-    total_active_orgs = db.query(sa_func.count(sa_func.distinct(Analytics.org_id))).filter(
-        Analytics.report_date >= cutoff
+    total_active_orgs = db.query(sa_func.count(sa_func.distinct(AnalyticsOrgDaily.org_id))).filter(
+        AnalyticsOrgDaily.report_date >= cutoff
     ).scalar() or 0
 
-    active_users = db.query(sa_func.sum(Analytics.active_user_count)).filter(
-        Analytics.report_date >= cutoff
+    active_users = db.query(sa_func.sum(AnalyticsOrgDaily.active_user_count)).filter(
+        AnalyticsOrgDaily.report_date >= cutoff
     ).scalar() or 0
 
-    total_experiments = db.query(sa_func.sum(Analytics.experiment_count)).scalar() or 0
+    total_experiments = db.query(sa_func.sum(AnalyticsOrgDaily.experiment_count)).scalar() or 0
 
-    # 按机构汇总
+    # 按机构汇总：一次聚合 + JOIN 取机构名，按实验次数取 Top-N
+    org_summary_total = db.query(sa_func.count(sa_func.distinct(AnalyticsOrgDaily.org_id))).scalar() or 0
+    experiment_sum = sa_func.sum(AnalyticsOrgDaily.experiment_count)
     rows = (
         db.query(
-            Analytics.org_id,
-            sa_func.sum(Analytics.active_user_count).label("active_users"),
-            sa_func.sum(Analytics.experiment_count).label("experiment_count"),
-            sa_func.max(Analytics.report_date).label("last_active"),
+            AnalyticsOrgDaily.org_id,
+            Organization.name.label("org_name"),
+            sa_func.sum(AnalyticsOrgDaily.active_user_count).label("active_users"),
+            experiment_sum.label("experiment_count"),
+            sa_func.max(AnalyticsOrgDaily.report_date).label("last_active"),
         )
-        .group_by(Analytics.org_id)
-        .order_by(sa_func.sum(Analytics.experiment_count).desc())
+        .outerjoin(Organization, Organization.id == AnalyticsOrgDaily.org_id)
+        .group_by(AnalyticsOrgDaily.org_id, Organization.name)
+        .order_by(experiment_sum.desc(), AnalyticsOrgDaily.org_id)
+        .offset(org_offset)
+        .limit(org_limit)
         .all()
     )
-    summaries = []
-    for r in rows:
-        org = db.query(Organization).filter(Organization.id == r.org_id).first()
-        summaries.append(OrgSummary(
+    summaries = [
+        OrgSummary(
             org_id=r.org_id,
-            org_name=org.name if org else "未知",
+            org_name=r.org_name or "未知",
             active_users=r.active_users or 0,
             experiment_count=r.experiment_count or 0,
             last_active=r.last_active,
-        ))
+        )
+        for r in rows
+    ]
 
     return OverviewResponse(
         total_active_orgs=total_active_orgs,
         active_users_last_30d=active_users,
         total_experiments=total_experiments,
         org_summaries=summaries,
+        org_summary_total=org_summary_total,
     )
 
 
@@ -90,18 +185,19 @@ def analytics_overview(
 def analytics_trends(
     start: date = Query(...),
     end: date = Query(...),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _=Depends(require_role("super_admin")),
 ):
+    # 全局按天总数由各机构按天汇总再按日期聚合
     rows = (
         db.query(
-            Analytics.report_date,
-            sa_func.sum(Analytics.active_user_count).label("active_users"),
-            sa_func.sum(Analytics.experiment_count).label("experiment_count"),
+            AnalyticsOrgDaily.report_date,
+            sa_func.sum(AnalyticsOrgDaily.active_user_count).label("active_users"),
+            sa_func.sum(AnalyticsOrgDaily.experiment_count).label("experiment_count"),
         )
-        .filter(Analytics.report_date >= start, Analytics.report_date <= end)
-        .group_by(Analytics.report_date)
-        .order_by(Analytics.report_date)
+        .filter(AnalyticsOrgDaily.report_date >= start, AnalyticsOrgDaily.report_date <= end)
+        .group_by(AnalyticsOrgDaily.report_date)
+        .order_by(AnalyticsOrgDaily.report_date)
         .all()
     )
     return TrendsResponse(data=[
@@ -112,16 +208,22 @@ def analytics_trends(
 
 @router.get("/modules", response_model=ModulesResponse)
 def analytics_modules(
-    db: Session = Depends(get_db),
+    start: date | None = Query(None),
+    end: date | None = Query(None),
+    org_id: int | None = Query(None),
+    db: Session = Depends(get_read_db),
     _=Depends(require_role("super_admin")),
 ):
-    records = db.query(Analytics).filter(Analytics.module_usage.isnot(None)).all()
-    totals: dict[str, int] = defaultdict(int)
-    for rec in records:
-        if isinstance(rec.module_usage, dict):
-            for mod, cnt in rec.module_usage.items():
-                totals[mod] += cnt
-    sorted_items = sorted(totals.items(), key=lambda x: x[1], reverse=True)
+    # 在数据库端对按天按模块汇总表 SUM / GROUP BY，不再加载 analytics 明细
+    total = sa_func.sum(AnalyticsModuleDaily.usage_count)
+    q = db.query(AnalyticsModuleDaily.module_id, total.label("total_count"))
+    if start is not None:
+        q = q.filter(AnalyticsModuleDaily.report_date >= start)
+    if end is not None:
+        q = q.filter(AnalyticsModuleDaily.report_date <= end)
+    if org_id is not None:
+        q = q.filter(AnalyticsModuleDaily.org_id == org_id)
+    rows = q.group_by(AnalyticsModuleDaily.module_id).order_by(total.desc(), AnalyticsModuleDaily.module_id).all()
     return ModulesResponse(data=[
-        ModuleUsageItem(module_id=mod, total_count=cnt) for mod, cnt in sorted_items
+        ModuleUsageItem(module_id=r.module_id, total_count=r.total_count or 0) for r in rows
     ])
@@ -1,19 +1,34 @@
 """
-License 管理路由：生成、吊销、列表、激活、验证。
+License 管理路由：生成（单个 / 批量导出 CSV）、吊销、列表、激活、验证、签名公钥（JWKS）。
 """
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import csv
+import io
+from datetime import datetime, timezone
+from typing import Iterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_async_db, get_db, get_read_db
 from ..deps import require_role
 from ..models.license import License
 from ..schemas.license import (
-    LicenseCreate, LicenseRead,
+    LicenseBulkCreate, LicenseCreate, LicenseRead,
     LicenseActivateRequest, LicenseActivateResponse,
     LicenseVerifyRequest, LicenseVerifyResponse,
 )
 from ..schemas.common import PagedResponse
-from ..services.license import generate_license_key, calculate_expiry, activate_license, verify_activation_token
+from ..services.pagination import CountMode, paginate
+from ..services.download import content_disposition
+from ..services.license import (
+    LicenseQuotaExceeded, activate_license, check_quota, create_licenses, generate_license_key,
+    lock_org_for_quota, verify_activation_token,
+)
+from ..services.revocation import get_revocations
+from ..services.signing import get_keyring
 
 router = APIRouter(prefix="/api/cloud/licenses", tags=["License 管理"])
 
@@ -22,17 +37,16 @@ router = APIRouter(prefix="/api/cloud/licenses", tags=["License 管理"])
 def list_licenses(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=50),
+    cursor: str | None = Query(None),
+    count: CountMode = Query("exact"),
     org_id: int | None = Query(None),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _=Depends(require_role("super_admin")),
 ):
     q = db.query(License)
     if org_id is not None:
         q = q.filter(License.org_id == org_id)
-    total = q.count()
-    pages = (total + page_size - 1) // page_size if total > 0 else 1
-    items = q.order_by(License.id.desc()).offset((page - 1) * page_size).limit(page_size).all()
-    return PagedResponse(items=items, total=total, page=page, page_size=page_size, pages=pages)
+    return paginate(q, License.id, page, page_size, cursor=cursor, count=count)
 
 
 @router.post("/generate", response_model=LicenseRead, status_code=status.HTTP_201_CREATED)
@@ -41,6 +55,11 @@ def generate_license(
     db: Session = Depends(get_db),
     _=Depends(require_role("super_admin")),
 ):
+    org = _lock_org(db, body.org_id)
+    try:
+        check_quota(db, org, 1)
+    except LicenseQuotaExceeded as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     key = generate_license_key()
     lic = License(
         license_key=key,
@@ -53,6 +72,62 @@ def generate_license(
     return lic
 
 
+def _lock_org(db: Session, org_id: int):
+    org = lock_org_for_quota(db, org_id)
+    if org is None:
+        raise HTTPException(status_code=404, detail="机构不存在")
+    return org
+
+
+_CSV_ROWS_PER_CHUNK = 500
+
+
+def _license_csv(rows: list[tuple[int, str]], org_id: int, license_type: str) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    # utf-8-sig 便于 Excel 直接打开
+    buf.write("\ufeff")
+    writer.writerow(["id", "license_key", "org_id", "license_type"])
+    for i, (license_id, key) in enumerate(rows, start=1):
+        writer.writerow([license_id, key, org_id, license_type])
+        if i % _CSV_ROWS_PER_CHUNK == 0:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode("utf-8")
+
+
+@router.post("/generate/bulk", status_code=status.HTTP_201_CREATED)
+def generate_licenses_bulk(
+    body: LicenseBulkCreate,
+    db: Session = Depends(get_db),
+    _=Depends(require_role("super_admin")),
+):
+    """
+    为机构一次生成 count 个 License（单个事务，超出 license_quota 时整体拒绝），
+    以 CSV 流式返回 id、license_key 等，供分发给各学校。
+    """
+    org = _lock_org(db, body.org_id)
+    try:
+        rows = create_licenses(db, org, body.license_type, body.count)
+        db.commit()
+    except LicenseQuotaExceeded as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except IntegrityError:
+        # 预先查重后仍冲突，只可能是并发生成了相同的 key
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="License key 冲突，请重试")
+
+    filename = f"licenses_org{body.org_id}_{datetime.now(timezone.utc):%Y%m%d%H%M%S}.csv"
+    return StreamingResponse(
+        _license_csv(rows, body.org_id, body.license_type),
+        status_code=status.HTTP_201_CREATED,
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": content_disposition(filename)},
+    )
+
+
 @router.put("/{license_id}/revoke", response_model=LicenseRead)
 def revoke_license(
     license_id: int,
@@ -87,6 +162,16 @@ def activate(body: LicenseActivateRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/verify", response_model=LicenseVerifyResponse)
-def verify(body: LicenseVerifyRequest, db: Session = Depends(get_db)):
-    result = verify_activation_token(db, body.activation_token)
+async def verify(body: LicenseVerifyRequest, db: AsyncSession = Depends(get_async_db)):
+    if get_revocations().ready:
+        result = verify_activation_token(None, body.activation_token)   # 纯内存校验，不占用数据库连接
+    else:
+        result = await db.run_sync(verify_activation_token, body.activation_token)
     return LicenseVerifyResponse(**result)
+
+
+@router.get("/jwks")
+def jwks(response: Response):
+    """Activation_Token 签名公钥（JWKS）。客户端按令牌 header 中的 kid 选取公钥离线验证，遇到未知 kid 时重新拉取。"""
+    response.headers["Cache-Control"] = "public, max-age=3600"
+    return get_keyring().jwks()
@@ -5,13 +5,14 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import func as sa_func
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..deps import require_role
 from ..models.organization import Organization
 from ..models.license import License
 from ..models.user import User
 from ..schemas.organization import OrgCreate, OrgRead, OrgUpdate, OrgDetail
 from ..schemas.common import PagedResponse
+from ..services.pagination import CountMode, paginate
 
 router = APIRouter(prefix="/api/cloud/orgs", tags=["机构管理"])
 
@@ -20,17 +21,16 @@ router = APIRouter(prefix="/api/cloud/orgs", tags=["机构管理"])
 def list_orgs(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=50),
+    cursor: str | None = Query(None),
+    count: CountMode = Query("exact"),
     search: str = Query("", max_length=100),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _=Depends(require_role("super_admin")),
 ):
     q = db.query(Organization)
     if search:
         q = q.filter(Organization.name.contains(search))
-    total = q.count()
-    pages = (total + page_size - 1) // page_size if total > 0 else 1
-    items = q.order_by(Organization.id.desc()).offset((page - 1) * page_size).limit(page_size).all()
-    return PagedResponse(items=items, total=total, page=page, page_size=page_size, pages=pages)
+    return paginate(q, Organization.id, page, page_size, cursor=cursor, count=count)
 
 
 @router.post("", response_model=OrgRead, status_code=status.HTTP_201_CREATED)
@@ -1,19 +1,23 @@
 """
-报告管理路由：上传、列表、评分、下载。
+报告管理路由：上传（含断点续传）、列表、评分、下载。
 """
-import os
-from datetime import datetime, timezone
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form, status
-from fastapi.responses import FileResponse
+import uuid
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File, Form, status
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..deps import get_current_user, require_role
 from ..config import get_settings
 from ..models.report import Report
+from ..models.upload_session import UploadSession
 from ..models.user import User
-from ..schemas.report import ReportRead, GradeRequest
+from ..schemas.report import ReportRead, GradeRequest, UploadSessionCreate, UploadSessionRead
 from ..schemas.common import PagedResponse
+from ..services.pagination import CountMode, paginate
+from ..services import upload_session as resumable
+from ..services.download import file_download_response
+from ..services.storage import BlobStore, UploadTooLarge, get_blob_store, resolve_report_path
 
 router = APIRouter(prefix="/api/cloud/reports", tags=["报告管理"])
 
@@ -22,10 +26,12 @@ router = APIRouter(prefix="/api/cloud/reports", tags=["报告管理"])
 def list_reports(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=50),
+    cursor: str | None = Query(None),
+    count: CountMode = Query("exact"),
     task_id: int | None = Query(None),
     student_id: int | None = Query(None),
     status_filter: str | None = Query(None, alias="status"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     q = db.query(Report)
@@ -35,10 +41,7 @@ def list_reports(
         q = q.filter(Report.student_id == student_id)
     if status_filter:
         q = q.filter(Report.status == status_filter)
-    total = q.count()
-    pages = (total + page_size - 1) // page_size if total > 0 else 1
-    items = q.order_by(Report.id.desc()).offset((page - 1) * page_size).limit(page_size).all()
-    return PagedResponse(items=items, total=total, page=page, page_size=page_size, pages=pages)
+    return paginate(q, Report.id, page, page_size, cursor=cursor, count=count)
 
 
 @router.post("/upload", response_model=ReportRead, status_code=status.HTTP_201_CREATED)
@@ -49,20 +52,36 @@ def upload_report(
     db: Session = Depends(get_db),
 ):
     settings = get_settings()
-    upload_dir = os.path.join(settings.upload_dir, "reports")
-    os.makedirs(upload_dir, exist_ok=True)
+    max_bytes = settings.report_max_upload_bytes
+    if file.size is not None and file.size > max_bytes:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="文件过大")
+
+    # 内容寻址存储：相同文件只落盘一份
+    store = get_blob_store()
+    try:
+        size, checksum = store.put(file.file, max_bytes, settings.upload_chunk_bytes)
+    except UploadTooLarge:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="文件过大")
 
-    file_path = os.path.join(upload_dir, f"{task_id}_{student_id}_{file.filename}")
-    content = file.file.read()
-    with open(file_path, "wb") as f:
-        f.write(content)
+    return _create_report(db, store, task_id, student_id, file.filename, size, checksum)
 
+
+def _create_report(
+    db: Session,
+    store: BlobStore,
+    task_id: int,
+    student_id: int,
+    filename: str | None,
+    size: int,
+    checksum: str,
+) -> Report:
     report = Report(
         task_id=task_id,
         student_id=student_id,
-        file_path=file_path,
-        original_filename=file.filename,
-        file_size=len(content),
+        file_path=store.path_for(checksum),
+        original_filename=filename,
+        file_size=size,
+        checksum=checksum,
     )
     db.add(report)
     db.commit()
@@ -70,6 +89,126 @@ def upload_report(
     return report
 
 
+# --- 断点续传：创建会话 → PUT 分片（可重传/乱序）→ 查询已接收范围 → complete 合并 ---
+
+def _get_upload_session(db: Session, upload_id: str) -> UploadSession:
+    sess = db.query(UploadSession).filter(UploadSession.id == upload_id).first()
+    if sess is None or sess.expires_at < resumable.utcnow():
+        raise HTTPException(status_code=404, detail="上传会话不存在或已过期")
+    return sess
+
+
+def _upload_session_read(sess: UploadSession) -> UploadSessionRead:
+    chunks = resumable.received_chunks(sess)
+    ranges = resumable.received_ranges(sess, chunks)
+    return UploadSessionRead(
+        upload_id=sess.id,
+        task_id=sess.task_id,
+        student_id=sess.student_id,
+        filename=sess.filename,
+        total_size=sess.total_size,
+        chunk_size=sess.chunk_size,
+        chunk_count=resumable.chunk_count(sess),
+        received_chunks=chunks,
+        received_ranges=[[start, end] for start, end in ranges],
+        received_bytes=sum(end - start for start, end in ranges),
+        expires_at=sess.expires_at,
+    )
+
+
+async def _read_chunk_body(request: Request) -> bytes:
+    """读取分片请求体（application/octet-stream），超过分片上限时提前终止。"""
+    limit = get_settings().upload_session_chunk_bytes
+    body = bytearray()
+    async for part in request.stream():
+        body.extend(part)
+        if len(body) > limit:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="分片过大")
+    return bytes(body)
+
+
+@router.post("/uploads", response_model=UploadSessionRead, status_code=status.HTTP_201_CREATED)
+def create_upload_session(body: UploadSessionCreate, db: Session = Depends(get_db)):
+    settings = get_settings()
+    if body.total_size > settings.report_max_upload_bytes:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="文件过大")
+    chunk_size = min(body.chunk_size or settings.upload_session_chunk_bytes, settings.upload_session_chunk_bytes)
+
+    sess = UploadSession(
+        id=uuid.uuid4().hex,
+        task_id=body.task_id,
+        student_id=body.student_id,
+        filename=body.filename,
+        total_size=body.total_size,
+        chunk_size=chunk_size,
+        expires_at=resumable.utcnow() + timedelta(hours=settings.upload_session_ttl_hours),
+    )
+    db.add(sess)
+    db.commit()
+    db.refresh(sess)
+    return _upload_session_read(sess)
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadSessionRead)
+def get_upload_session(upload_id: str, db: Session = Depends(get_db)):
+    return _upload_session_read(_get_upload_session(db, upload_id))
+
+
+@router.put("/uploads/{upload_id}/chunks/{index}", response_model=UploadSessionRead)
+def put_upload_chunk(
+    upload_id: str,
+    index: int,
+    offset: int | None = Query(None, ge=0),
+    data: bytes = Depends(_read_chunk_body),
+    db: Session = Depends(get_db),
+):
+    """上传第 index 个分片；offset 可选，传入时必须等于 index * chunk_size。"""
+    sess = _get_upload_session(db, upload_id)
+    if not 0 <= index < resumable.chunk_count(sess):
+        raise HTTPException(status_code=400, detail="分片序号超出范围")
+    if offset is not None and offset != index * sess.chunk_size:
+        raise HTTPException(status_code=400, detail="分片偏移量与序号不匹配")
+    if len(data) != resumable.expected_chunk_length(sess, index):
+        raise HTTPException(status_code=400, detail="分片长度不正确")
+    resumable.write_chunk(sess, index, data)
+    return _upload_session_read(sess)
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=ReportRead, status_code=status.HTTP_201_CREATED)
+def complete_upload_session(upload_id: str, db: Session = Depends(get_db)):
+    """全部分片到齐后合并，创建 Report（与 /upload 结果一致）并删除会话。"""
+    sess = _get_upload_session(db, upload_id)
+    missing = sorted(set(range(resumable.chunk_count(sess))) - set(resumable.received_chunks(sess)))
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "分片未全部上传", "missing_chunks": missing},
+        )
+
+    store = get_blob_store()
+    try:
+        size, checksum = resumable.assemble(sess, store)
+    except FileNotFoundError:
+        # 并发的 complete / abort 已提交并删除了分片
+        raise HTTPException(status_code=404, detail="上传会话不存在或已过期")
+    task_id, student_id, filename = sess.task_id, sess.student_id, sess.filename
+    # 认领会话与创建 Report 在同一事务内：并发 complete 只有一个能认领，提交失败时会话与分片都保留
+    if not resumable.claim(db, upload_id):
+        db.rollback()
+        raise HTTPException(status_code=404, detail="上传会话不存在或已过期")
+    report = _create_report(db, store, task_id, student_id, filename, size, checksum)
+    resumable.remove_chunks(upload_id)
+    return report
+
+
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+def abort_upload_session(upload_id: str, db: Session = Depends(get_db)):
+    _get_upload_session(db, upload_id)
+    if resumable.claim(db, upload_id):
+        db.commit()
+        resumable.remove_chunks(upload_id)
+
+
 @router.put("/{report_id}/grade", response_model=ReportRead)
 def grade_report(
     report_id: int,
@@ -93,12 +232,14 @@ def grade_report(
 @router.get("/{report_id}/download")
 def download_report(
     report_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role("super_admin", "org_admin", "teacher")),
 ):
     report = db.query(Report).filter(Report.id == report_id).first()
     if report is None:
         raise HTTPException(status_code=404, detail="报告不存在")
-    if not report.file_path or not os.path.exists(report.file_path):
+    path = resolve_report_path(report)
+    if path is None:
         raise HTTPException(status_code=404, detail="文件不存在")
-    return FileResponse(report.file_path, filename=report.original_filename)
+    return file_download_response(request, path, report.original_filename, checksum=report.checksum)
@@ -1,65 +1,297 @@
 """
 数据同步路由：供 Local_Client 调用。
+
+两种协议：
+- 旧协议：只传 since，返回 since 之后的全部记录（列表）；
+- 分页协议：传 cursor（首次可省略或配合 since）和/或 limit，返回 SyncPage：
+  items + next_cursor + has_more，游标为 (时间戳, id)，同一时间戳的记录不会被跳过或重复。
+- /delta：一次请求按各自游标返回机构内任务、用户、已评分报告，每类数据记录一条 SyncLog。
+- /changes：基于变更日志（ChangeLog）按 seq 拉取机构内的增删改，删除同样会下发。
+- /events（SSE）与 /wait（长轮询）：按机构订阅变更通知，数据提交后立即唤醒客户端，
+  传入 after（变更日志 seq）时若已有更新的变更则立即返回，避免两次同步之间漏掉通知。
+
+所有接口支持按 Accept 返回列式 JSON 或 MessagePack（见 services/encoding.py）。
+客户端调用量大，全部使用异步会话，等待数据库时不占用线程池。数据读取走只读副本（get_async_read_db，
+延迟过大时自动回退主库）；License 校验、SyncLog 写入以及 /events、/wait 的变更检查始终使用主库，
+保证吊销立即生效、订阅后不漏掉已提交的变更。
 """
+import asyncio
+import json
 from datetime import datetime, timezone
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from typing import AsyncIterator, Awaitable, Callable
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database import get_db
+from ..database import get_async_db, get_async_read_db
+from ..config import get_settings
+from ..models.change_log import ChangeLog
+from ..models.license import License
+from ..models.sync_log import SyncLog
 from ..models.task import Task
 from ..models.user import User
 from ..models.report import Report
+from ..schemas.common import SyncPage
+from ..schemas.sync import ChangeFeed, SyncDeltaRequest, SyncDeltaResponse, SyncNotification
 from ..schemas.task import TaskRead
 from ..schemas.user import UserRead
 from ..schemas.report import ReportRead
+from ..services.changelog import read_changes
+from ..services.encoding import NegotiatedRoute
+from ..services.notify import Subscription, get_notifier
+from ..services.pagination import sync_page_async
+
+router = APIRouter(prefix="/api/cloud/sync", tags=["数据同步"], route_class=NegotiatedRoute)
+
+SYNC_DEFAULT_LIMIT = 500
+SYNC_MAX_LIMIT = 2000
 
-router = APIRouter(prefix="/api/cloud/sync", tags=["数据同步"])
+_READ_SCHEMAS = {"tasks": TaskRead, "users": UserRead, "grades": ReportRead}
 
 
-@router.get("/tasks", response_model=list[TaskRead])
-def sync_tasks(
-    since: datetime = Query(...),
+async def _sync(
+    db: AsyncSession,
+    stmt: Select,
+    ts_col,
+    id_col,
+    since: datetime | None,
+    cursor: str | None,
+    limit: int | None,
+):
+    if cursor is None and limit is None:
+        if since is None:
+            raise HTTPException(status_code=422, detail="since 与 cursor 至少提供一个")
+        return (await db.scalars(stmt.where(ts_col > since).order_by(ts_col))).all()
+    return await sync_page_async(db, stmt, ts_col, id_col, limit or SYNC_DEFAULT_LIMIT, since=since, cursor=cursor)
+
+
+@router.get("/tasks", response_model=list[TaskRead] | SyncPage[TaskRead])
+async def sync_tasks(
     org_id: int = Query(...),
-    db: Session = Depends(get_db),
+    since: datetime | None = Query(None),
+    cursor: str | None = Query(None),
+    limit: int | None = Query(None, ge=1, le=SYNC_MAX_LIMIT),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    tasks = (
-        db.query(Task)
-        .filter(Task.org_id == org_id, Task.status == "published", Task.updated_at > since)
-        .order_by(Task.updated_at)
-        .all()
-    )
-    return tasks
+    stmt = select(Task).where(Task.org_id == org_id, Task.status == "published")
+    return await _sync(db, stmt, Task.updated_at, Task.id, since, cursor, limit)
 
 
-@router.get("/users", response_model=list[UserRead])
-def sync_users(
-    since: datetime = Query(...),
+@router.get("/users", response_model=list[UserRead] | SyncPage[UserRead])
+async def sync_users(
     org_id: int = Query(...),
-    db: Session = Depends(get_db),
+    since: datetime | None = Query(None),
+    cursor: str | None = Query(None),
+    limit: int | None = Query(None, ge=1, le=SYNC_MAX_LIMIT),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    users = (
-        db.query(User)
-        .filter(User.org_id == org_id, User.updated_at > since)
-        .order_by(User.updated_at)
-        .all()
-    )
-    return users
+    stmt = select(User).where(User.org_id == org_id)
+    return await _sync(db, stmt, User.updated_at, User.id, since, cursor, limit)
 
 
-@router.get("/grades", response_model=list[ReportRead])
-def sync_grades(
-    since: datetime = Query(...),
+@router.get("/grades", response_model=list[ReportRead] | SyncPage[ReportRead])
+async def sync_grades(
     student_id: int = Query(...),
-    db: Session = Depends(get_db),
+    since: datetime | None = Query(None),
+    cursor: str | None = Query(None),
+    limit: int | None = Query(None, ge=1, le=SYNC_MAX_LIMIT),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    reports = (
-        db.query(Report)
-        .filter(
-            Report.student_id == student_id,
-            Report.status == "graded",
-            Report.graded_at > since,
+    stmt = select(Report).where(Report.student_id == student_id, Report.status == "graded")
+    return await _sync(db, stmt, Report.graded_at, Report.id, since, cursor, limit)
+
+
+async def _resolve_scope(db: AsyncSession, org_id: int | None, license_id: int | None) -> tuple[int, int | None]:
+    """返回 (org_id, license_id)；传入 license_id 时校验其有效且属于该机构。"""
+    if license_id is None:
+        if org_id is None:
+            raise HTTPException(status_code=422, detail="org_id 与 license_id 至少提供一个")
+        return org_id, None
+
+    lic = await db.get(License, license_id)
+    if lic is None or not lic.is_active:
+        raise HTTPException(status_code=403, detail="License 无效或已被吊销")
+    if lic.org_id is None or (org_id is not None and org_id != lic.org_id):
+        raise HTTPException(status_code=403, detail="License 不属于该机构")
+    return lic.org_id, lic.id
+
+
+def _delta_queries(org_id: int) -> dict[str, tuple[Select, object, object]]:
+    """/delta 各实体的 (查询, 游标时间列, 游标 id 列)。"""
+    return {
+        "tasks": (
+            select(Task).where(Task.org_id == org_id, Task.status == "published"),
+            Task.updated_at, Task.id,
+        ),
+        "users": (
+            select(User).where(User.org_id == org_id),
+            User.updated_at, User.id,
+        ),
+        # 先取机构内学生 id，再按 (student_id, status, graded_at) 索引取报告；
+        # 直接 JOIN users 过滤 org_id 时规划器会按 ix_reports_status 扫描全部机构的已评分报告
+        "grades": (
+            select(Report).where(
+                Report.student_id.in_(select(User.id).where(User.org_id == org_id)),
+                Report.status == "graded",
+            ),
+            Report.graded_at, Report.id,
+        ),
+    }
+
+
+@router.post("/delta", response_model=SyncDeltaResponse)
+async def sync_delta(
+    body: SyncDeltaRequest,
+    db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_async_read_db),
+):
+    """单次往返同步整个机构：已发布任务、用户、已评分报告（按学生所属机构）。"""
+    org_id, license_id = await _resolve_scope(db, body.org_id, body.license_id)
+
+    queries = _delta_queries(org_id)
+    result = {}
+    for entity in dict.fromkeys(body.entities):
+        stmt, ts_col, id_col = queries[entity]
+        schema = _READ_SCHEMAS[entity]
+        page = await sync_page_async(read_db, stmt, ts_col, id_col, body.limit, cursor=body.cursors.get(entity))
+        # 提交 SyncLog 前完成序列化，避免提交后 ORM 对象过期逐个重新加载
+        result[entity] = SyncPage[schema](
+            items=[schema.model_validate(item) for item in page.items],
+            next_cursor=page.next_cursor,
+            has_more=page.has_more,
         )
-        .order_by(Report.graded_at)
-        .all()
+        db.add(SyncLog(
+            license_id=license_id,
+            sync_type=entity,
+            direction="download",
+            record_count=len(page.items),
+            status="success",
+        ))
+    await db.commit()
+    return SyncDeltaResponse(**result)
+
+
+@router.get("/changes", response_model=ChangeFeed)
+async def sync_changes(
+    org_id: int | None = Query(None),
+    license_id: int | None = Query(None),
+    after: int = Query(0, ge=0),
+    limit: int = Query(SYNC_DEFAULT_LIMIT, ge=1, le=SYNC_MAX_LIMIT),
+    db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_async_read_db),
+):
+    """按变更日志拉取 seq > after 的变更；首次同步传 after=0（需已执行 backfill-change-log）。"""
+    org_id, license_id = await _resolve_scope(db, org_id, license_id)
+    changes, next_seq, has_more = await read_db.run_sync(read_changes, org_id, after, limit)
+    feed = ChangeFeed(
+        items=[
+            {**c, "data": _READ_SCHEMAS[c["entity"]].model_validate(c["data"]) if c["data"] is not None else None}
+            for c in changes
+        ],
+        next_seq=next_seq,
+        has_more=has_more,
+    )
+    db.add(SyncLog(
+        license_id=license_id,
+        sync_type="changes",
+        direction="download",
+        record_count=len(changes),
+        status="success",
+    ))
+    await db.commit()
+    return feed
+
+
+async def _pending_entities(db: AsyncSession, org_id: int, after: int | None) -> list[str]:
+    """seq > after 的变更涉及的实体；检查完毕即释放数据库连接，等待期间不占用连接池。"""
+    try:
+        if after is None:
+            return []
+        return list(await db.scalars(
+            select(ChangeLog.entity)
+            .where(ChangeLog.org_id == org_id, ChangeLog.seq > after)
+            .group_by(ChangeLog.entity)
+            .order_by(ChangeLog.entity)
+        ))
+    finally:
+        await db.close()   # 把连接还给连接池
+
+
+async def _subscribe(
+    db: AsyncSession, org_id: int | None, license_id: int | None, after: int | None,
+) -> tuple[Subscription, list[str]]:
+    """先订阅再检查变更日志，保证检查之后提交的变更一定会收到通知。"""
+    org_id, _ = await _resolve_scope(db, org_id, license_id)
+    sub = get_notifier().subscribe(org_id)
+    try:
+        return sub, await _pending_entities(db, org_id, after)
+    except BaseException:
+        get_notifier().unsubscribe(sub)
+        raise
+
+
+def _merge_entities(events: list[dict]) -> list[str]:
+    return sorted({e for event in events for e in event["entities"]})
+
+
+async def _event_stream(
+    sub: Subscription,
+    pending: list[str],
+    heartbeat: float,
+    is_disconnected: Callable[[], Awaitable[bool]],
+) -> AsyncIterator[str]:
+    try:
+        yield "retry: 5000\n\n"
+        if pending:
+            yield f"event: change\ndata: {json.dumps({'entities': pending})}\n\n"
+        while not await is_disconnected():
+            try:
+                event = await asyncio.wait_for(sub.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            entities = _merge_entities([event, *sub.drain()])
+            yield f"event: change\ndata: {json.dumps({'entities': entities})}\n\n"
+    finally:
+        get_notifier().unsubscribe(sub)
+
+
+@router.get("/events")
+async def sync_events(
+    request: Request,
+    org_id: int | None = Query(None),
+    license_id: int | None = Query(None),
+    after: int | None = Query(None, ge=0),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """SSE 推送：机构内任务、用户、成绩有变更提交时发送 change 事件，空闲时定期发送心跳注释。"""
+    sub, pending = await _subscribe(db, org_id, license_id, after)
+    return StreamingResponse(
+        _event_stream(sub, pending, get_settings().sync_event_heartbeat_seconds, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    return reports
+
+
+@router.get("/wait", response_model=SyncNotification)
+async def sync_wait(
+    org_id: int | None = Query(None),
+    license_id: int | None = Query(None),
+    after: int | None = Query(None, ge=0),
+    timeout: float = Query(25, ge=0, le=60),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """长轮询：有变更（或 after 之后已有变更）时立即返回，否则最多等待 timeout 秒后返回 changed=false。"""
+    sub, pending = await _subscribe(db, org_id, license_id, after)
+    try:
+        if pending:
+            return SyncNotification(changed=True, entities=pending)
+        try:
+            event = await asyncio.wait_for(sub.get(), timeout)
+        except asyncio.TimeoutError:
+            return SyncNotification(changed=False)
+        return SyncNotification(changed=True, entities=_merge_entities([event, *sub.drain()]))
+    finally:
+        get_notifier().unsubscribe(sub)
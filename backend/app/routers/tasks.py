@@ -1,18 +1,26 @@
 """
-任务管理路由：CRUD + 发布。
+任务管理路由：CRUD + 发布 + 报告打包下载。
 """
+import csv
+import io
+import os
 from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy import func as sa_func
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..deps import get_current_user, require_role
 from ..models.task import Task
 from ..models.report import Report
 from ..models.user import User
 from ..schemas.task import TaskCreate, TaskRead, TaskUpdate
 from ..schemas.common import PagedResponse
+from ..services.pagination import CountMode, paginate
+from ..services.archive import stream_zip
+from ..services.download import content_disposition
+from ..services.storage import get_blob_store, resolve_report_path
 
 router = APIRouter(prefix="/api/cloud/tasks", tags=["任务管理"])
 
@@ -21,9 +29,11 @@ router = APIRouter(prefix="/api/cloud/tasks", tags=["任务管理"])
 def list_tasks(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=50),
+    cursor: str | None = Query(None),
+    count: CountMode = Query("exact"),
     org_id: int | None = Query(None),
     status_filter: str | None = Query(None, alias="status"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     q = db.query(Task)
@@ -33,10 +43,7 @@ def list_tasks(
         q = q.filter(Task.org_id == org_id)
     if status_filter:
         q = q.filter(Task.status == status_filter)
-    total = q.count()
-    pages = (total + page_size - 1) // page_size if total > 0 else 1
-    items = q.order_by(Task.id.desc()).offset((page - 1) * page_size).limit(page_size).all()
-    return PagedResponse(items=items, total=total, page=page, page_size=page_size, pages=pages)
+    return paginate(q, Task.id, page, page_size, cursor=cursor, count=count)
 
 
 @router.post("", response_model=TaskRead, status_code=status.HTTP_201_CREATED)
@@ -112,3 +119,52 @@ def publish_task(
     db.commit()
     db.refresh(task)
     return task
+
+
+@router.get("/{task_id}/reports/archive")
+def download_task_reports_archive(
+    task_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("super_admin", "org_admin", "teacher")),
+):
+    """
+    流式返回该任务所有已提交报告的 ZIP（含 manifest.csv：学生、成绩、提交时间）。
+    元数据在请求内一次查出，文件内容在响应阶段逐块读取，不缓冲整个归档。
+    """
+    task = db.query(Task).filter(Task.id == task_id).first()
+    if task is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+
+    rows = (
+        db.query(Report, User.username, User.real_name)
+        .outerjoin(User, User.id == Report.student_id)
+        .filter(Report.task_id == task_id)
+        .order_by(Report.student_id, Report.id)
+        .all()
+    )
+
+    store = get_blob_store()
+    manifest = io.StringIO()
+    writer = csv.writer(manifest)
+    writer.writerow(["report_id", "student_id", "username", "real_name", "score", "status", "submitted_at", "file"])
+    files = []
+    for report, username, real_name in rows:
+        path = resolve_report_path(report, store)
+        arcname = ""
+        if path is not None:
+            filename = os.path.basename(report.original_filename or "report")
+            arcname = f"{username or report.student_id}_{report.id}_{filename}"
+            files.append((arcname, path, report.submitted_at))
+        writer.writerow([
+            report.id, report.student_id, username or "", real_name or "",
+            "" if report.score is None else report.score, report.status,
+            report.submitted_at.isoformat() if report.submitted_at else "", arcname,
+        ])
+
+    # utf-8-sig 便于 Excel 直接打开中文
+    extra = [("manifest.csv", manifest.getvalue().encode("utf-8-sig"))]
+    return StreamingResponse(
+        stream_zip(files, extra),
+        media_type="application/zip",
+        headers={"Content-Disposition": content_disposition(f"task_{task_id}_reports.zip")},
+    )
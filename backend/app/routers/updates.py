@@ -3,13 +3,16 @@
 """
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from packaging.version import Version
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_async_db, get_db, get_read_db
 from ..deps import require_role
 from ..models.update import SoftwareUpdate
 from ..schemas.update import UpdateCreate, UpdateRead, UpdateCheckResponse
 from ..schemas.common import PagedResponse
+from ..services.pagination import CountMode, paginate
 
 router = APIRouter(prefix="/api/cloud/updates", tags=["版本更新"])
 
@@ -18,14 +21,13 @@ router = APIRouter(prefix="/api/cloud/updates", tags=["版本更新"])
 def list_updates(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(None),
+    count: CountMode = Query("exact"),
+    db: Session = Depends(get_read_db),
     _=Depends(require_role("super_admin")),
 ):
     q = db.query(SoftwareUpdate)
-    total = q.count()
-    pages = (total + page_size - 1) // page_size if total > 0 else 1
-    items = q.order_by(SoftwareUpdate.id.desc()).offset((page - 1) * page_size).limit(page_size).all()
-    return PagedResponse(items=items, total=total, page=page, page_size=page_size, pages=pages)
+    return paginate(q, SoftwareUpdate.id, page, page_size, cursor=cursor, count=count)
 
 
 @router.post("", response_model=UpdateRead, status_code=status.HTTP_201_CREATED)
@@ -42,11 +44,11 @@ def create_update(
 
 
 @router.get("/check", response_model=UpdateCheckResponse)
-def check_update(
+async def check_update(
     version: str = Query(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    latest = db.query(SoftwareUpdate).order_by(SoftwareUpdate.id.desc()).first()
+    latest = await db.scalar(select(SoftwareUpdate).order_by(SoftwareUpdate.id.desc()).limit(1))
     if latest is None:
         return UpdateCheckResponse(up_to_date=True)
     try:
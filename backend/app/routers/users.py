@@ -6,11 +6,12 @@ import io
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, status
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..deps import get_current_user, require_role
 from ..models.user import User
 from ..schemas.user import UserCreate, UserRead, UserUpdate, PasswordResetRequest
 from ..schemas.common import PagedResponse
+from ..services.pagination import CountMode, paginate
 from ..services.auth import hash_password, revoke_all_refresh_tokens
 
 router = APIRouter(prefix="/api/cloud/users", tags=["用户管理"])
@@ -20,9 +21,11 @@ router = APIRouter(prefix="/api/cloud/users", tags=["用户管理"])
 def list_users(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=50),
+    cursor: str | None = Query(None),
+    count: CountMode = Query("exact"),
     org_id: int | None = Query(None),
     role: str | None = Query(None),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     # Org_Admin 只能看本机构用户
@@ -33,10 +36,7 @@ def list_users(
         q = q.filter(User.org_id == org_id)
     if role:
         q = q.filter(User.role == role)
-    total = q.count()
-    pages = (total + page_size - 1) // page_size if total > 0 else 1
-    items = q.order_by(User.id.desc()).offset((page - 1) * page_size).limit(page_size).all()
-    return PagedResponse(items=items, total=total, page=page, page_size=page_size, pages=pages)
+    return paginate(q, User.id, page, page_size, cursor=cursor, count=count)
 
 
 @router.post("", response_model=UserRead, status_code=status.HTTP_201_CREATED)
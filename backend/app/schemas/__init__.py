@@ -1,7 +1,7 @@
-from .common import PagedResponse
+from .common import PagedResponse, SyncPage
 from .organization import OrgCreate, OrgRead, OrgUpdate, OrgDetail
 from .license import (
-    LicenseCreate, LicenseRead,
+    LicenseCreate, LicenseBulkCreate, LicenseRead,
     LicenseActivateRequest, LicenseActivateResponse,
     LicenseVerifyRequest, LicenseVerifyResponse,
 )
@@ -11,25 +11,29 @@ from .user import (
     PasswordResetRequest, TokenRefreshRequest, TokenRefreshResponse,
 )
 from .task import TaskCreate, TaskRead, TaskUpdate
-from .report import ReportRead, GradeRequest
+from .report import ReportRead, GradeRequest, UploadSessionCreate, UploadSessionRead
 from .analytics import (
     AnalyticsReport, AnalyticsRead,
+    AnalyticsBatchItemResult, AnalyticsBatchResponse,
     OverviewResponse, TrendsResponse, ModulesResponse,
 )
 from .update import UpdateCreate, UpdateRead, UpdateCheckResponse
+from .sync import SyncDeltaRequest, SyncDeltaResponse, ChangeItem, ChangeFeed, SyncNotification
 
 __all__ = [
-    "PagedResponse",
+    "PagedResponse", "SyncPage",
     "OrgCreate", "OrgRead", "OrgUpdate", "OrgDetail",
-    "LicenseCreate", "LicenseRead",
+    "LicenseCreate", "LicenseBulkCreate", "LicenseRead",
     "LicenseActivateRequest", "LicenseActivateResponse",
     "LicenseVerifyRequest", "LicenseVerifyResponse",
     "UserCreate", "UserRead", "UserUpdate",
     "LoginRequest", "LoginResponse",
     "PasswordResetRequest", "TokenRefreshRequest", "TokenRefreshResponse",
     "TaskCreate", "TaskRead", "TaskUpdate",
-    "ReportRead", "GradeRequest",
+    "ReportRead", "GradeRequest", "UploadSessionCreate", "UploadSessionRead",
     "AnalyticsReport", "AnalyticsRead",
+    "AnalyticsBatchItemResult", "AnalyticsBatchResponse",
     "OverviewResponse", "TrendsResponse", "ModulesResponse",
     "UpdateCreate", "UpdateRead", "UpdateCheckResponse",
+    "SyncDeltaRequest", "SyncDeltaResponse", "ChangeItem", "ChangeFeed", "SyncNotification",
 ]
@@ -1,6 +1,8 @@
 from datetime import date, datetime
-from typing import Dict, List
-from pydantic import BaseModel, ConfigDict
+from typing import Dict, List, Literal
+from pydantic import BaseModel, ConfigDict, field_validator
+
+MODULE_ID_MAX_LENGTH = 50   # 与 analytics_module_daily.module_id 列长度一致
 
 
 class AnalyticsReport(BaseModel):
@@ -12,6 +14,14 @@ class AnalyticsReport(BaseModel):
     experiment_count: int = 0
     module_usage: Dict[str, int] = {}
 
+    @field_validator("module_usage")
+    @classmethod
+    def module_id_length(cls, v: Dict[str, int]) -> Dict[str, int]:
+        for module_id in v:
+            if len(module_id) > MODULE_ID_MAX_LENGTH:
+                raise ValueError(f"module_id 长度不能超过 {MODULE_ID_MAX_LENGTH}: {module_id[:MODULE_ID_MAX_LENGTH]}...")
+        return v
+
 
 class AnalyticsRead(BaseModel):
     id: int
@@ -25,6 +35,20 @@ class AnalyticsRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class AnalyticsBatchItemResult(BaseModel):
+    """批量上报中单条数据的处理结果"""
+    index: int
+    status: Literal["created", "invalid"]
+    id: int | None = None
+    error: str | None = None
+
+
+class AnalyticsBatchResponse(BaseModel):
+    accepted: int
+    rejected: int
+    results: List[AnalyticsBatchItemResult]
+
+
 class OrgSummary(BaseModel):
     org_id: int
     org_name: str
@@ -38,6 +62,7 @@ class OverviewResponse(BaseModel):
     active_users_last_30d: int
     total_experiments: int
     org_summaries: List[OrgSummary]
+    org_summary_total: int = 0   # 有上报记录的机构总数（org_summaries 按 org_limit/org_offset 分页）
 
 
 class TrendPoint(BaseModel):
@@ -6,7 +6,15 @@ T = TypeVar("T")
 
 class PagedResponse(BaseModel, Generic[T]):
     items: List[T]
-    total: int
-    page: int
+    total: int | None        # count=none 时为 null
+    page: int | None         # 游标模式下为 null
     page_size: int
-    pages: int
+    pages: int | None
+    next_cursor: str | None = None   # 游标模式下的下一页游标，没有更多数据时为 null
+
+
+class SyncPage(BaseModel, Generic[T]):
+    """增量同步分页：按 (时间戳, id) 单调游标推进"""
+    items: List[T]
+    next_cursor: str | None   # 下次同步从此处继续（无数据且未传入游标时为 null）
+    has_more: bool            # 为 true 时应立即用 next_cursor 继续拉取
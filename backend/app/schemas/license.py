@@ -1,5 +1,7 @@
 from datetime import datetime
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
+
+LICENSE_BULK_MAX = 10000
 
 
 class LicenseCreate(BaseModel):
@@ -7,6 +9,10 @@ class LicenseCreate(BaseModel):
     license_type: str  # trial / education / permanent
 
 
+class LicenseBulkCreate(LicenseCreate):
+    count: int = Field(ge=1, le=LICENSE_BULK_MAX)
+
+
 class LicenseRead(BaseModel):
     id: int
     license_key: str
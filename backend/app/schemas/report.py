@@ -1,5 +1,6 @@
 from datetime import datetime
-from pydantic import BaseModel, ConfigDict, field_validator
+from typing import List
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 class ReportRead(BaseModel):
@@ -8,6 +9,7 @@ class ReportRead(BaseModel):
     student_id: int | None
     original_filename: str | None
     file_size: int | None
+    checksum: str | None = None
     score: int | None
     feedback: str | None
     grader_id: int | None
@@ -29,3 +31,26 @@ class GradeRequest(BaseModel):
         if not (0 <= v <= 100):
             raise ValueError("score must be between 0 and 100")
         return v
+
+
+class UploadSessionCreate(BaseModel):
+    """创建断点续传会话"""
+    task_id: int
+    student_id: int
+    filename: str = Field(min_length=1, max_length=255)
+    total_size: int = Field(ge=0)
+    chunk_size: int | None = Field(None, ge=64 * 1024)   # 不传则使用服务端默认值
+
+
+class UploadSessionRead(BaseModel):
+    upload_id: str
+    task_id: int
+    student_id: int
+    filename: str
+    total_size: int
+    chunk_size: int
+    chunk_count: int
+    received_chunks: List[int]
+    received_ranges: List[List[int]]   # [[start, end_exclusive], ...]
+    received_bytes: int
+    expires_at: datetime
@@ -0,0 +1,45 @@
+from typing import Dict, List, Literal
+from pydantic import BaseModel, Field
+
+from .common import SyncPage
+from .task import TaskRead
+from .user import UserRead
+from .report import ReportRead
+
+SyncEntity = Literal["tasks", "users", "grades"]
+
+
+class SyncDeltaRequest(BaseModel):
+    """一次拉取机构内多类数据的增量（org_id 与 license_id 至少提供一个）"""
+    org_id: int | None = None
+    license_id: int | None = None
+    entities: List[SyncEntity] = ["tasks", "users", "grades"]
+    cursors: Dict[SyncEntity, str] = {}   # 各类数据上次返回的 next_cursor；缺省表示从头同步
+    limit: int = Field(500, ge=1, le=2000)   # 每类数据本次最多返回条数
+
+
+class SyncDeltaResponse(BaseModel):
+    tasks: SyncPage[TaskRead] | None = None
+    users: SyncPage[UserRead] | None = None
+    grades: SyncPage[ReportRead] | None = None
+
+
+class ChangeItem(BaseModel):
+    seq: int
+    entity: SyncEntity
+    entity_id: int
+    op: Literal["upsert", "delete"]   # delete：实体已删除或已不在同步范围内，客户端应移除本地副本
+    data: TaskRead | UserRead | ReportRead | None = None
+
+
+class ChangeFeed(BaseModel):
+    """变更日志分页：按 seq 单调推进"""
+    items: List[ChangeItem]
+    next_seq: int     # 下次以 after=next_seq 继续
+    has_more: bool
+
+
+class SyncNotification(BaseModel):
+    """长轮询结果：changed 为 true 时按 entities 拉取增量"""
+    changed: bool
+    entities: List[SyncEntity] = []
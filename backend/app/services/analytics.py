@@ -0,0 +1,126 @@
+"""
+统计服务：按天汇总表（analytics_org_daily / analytics_module_daily）的增量维护与重建。
+"""
+from collections import defaultdict
+from typing import Iterable
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from ..models.analytics import Analytics, AnalyticsOrgDaily, AnalyticsModuleDaily
+
+_COUNTERS = ("active_user_count", "experiment_count", "report_count")
+# 上报时已校验模块名长度（schemas.analytics.AnalyticsReport）；校验之前写入的历史明细中超长的模块名
+# 在重建汇总时跳过（明细 module_usage 中仍保留原值），否则 PostgreSQL 上 upsert 失败
+_MODULE_ID_MAX = AnalyticsModuleDaily.__table__.c.module_id.type.length
+
+
+def _upsert_counters(
+    db: Session,
+    model,
+    key_cols: tuple[str, ...],
+    rows: list[dict],
+    counters: tuple[str, ...] = _COUNTERS,
+) -> None:
+    """按主键累加计数；PostgreSQL / SQLite 使用 ON CONFLICT，其它数据库逐行 UPDATE 后补 INSERT。"""
+    if not rows:
+        return
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_cols),
+            set_={c: table.c[c] + stmt.excluded[c] for c in counters},
+        )
+        db.execute(stmt, rows)
+        return
+
+    for row in rows:
+        cond = [table.c[k] == row[k] for k in key_cols]
+        result = db.execute(
+            update(table).where(*cond).values({c: table.c[c] + row[c] for c in counters})
+        )
+        if result.rowcount == 0:
+            db.execute(insert(table).values(**row))
+
+
+def apply_to_rollups(db: Session, reports: Iterable) -> None:
+    """
+    将新上报的数据累加到汇总表（与明细写入处于同一事务，由调用方提交）。
+    reports 为具有 org_id / report_date / active_user_count / experiment_count / module_usage 属性的对象。
+    全局按天总数由 analytics_org_daily 按日期聚合得到，不另设全局汇总行，避免所有上报争用同一行；
+    各批按主键排序后写入，并发批次以相同顺序加锁，不会相互死锁。
+    """
+    per_org: dict[tuple[int, object], list[int]] = defaultdict(lambda: [0, 0, 0])
+    per_module: dict[tuple[int, object, str], int] = defaultdict(int)
+    for r in reports:
+        if r.org_id is None:
+            continue
+        acc = per_org[(r.org_id, r.report_date)]
+        acc[0] += r.active_user_count or 0
+        acc[1] += r.experiment_count or 0
+        acc[2] += 1
+        _accumulate_modules(per_module, r.org_id, r.report_date, r.module_usage)
+
+    _upsert_counters(db, AnalyticsOrgDaily, ("org_id", "report_date"), [
+        {"org_id": org_id, "report_date": d, **dict(zip(_COUNTERS, v))}
+        for (org_id, d), v in sorted(per_org.items())
+    ])
+    _upsert_module_counts(db, per_module)
+
+
+def _accumulate_modules(acc: dict, org_id: int, report_date, module_usage) -> None:
+    if not isinstance(module_usage, dict):
+        return
+    for module_id, count in module_usage.items():
+        if len(str(module_id)) > _MODULE_ID_MAX:
+            continue
+        try:
+            acc[(org_id, report_date, str(module_id))] += int(count)
+        except (TypeError, ValueError):
+            continue
+
+
+def _upsert_module_counts(db: Session, per_module: dict) -> None:
+    _upsert_counters(db, AnalyticsModuleDaily, ("org_id", "report_date", "module_id"), [
+        {"org_id": org_id, "report_date": d, "module_id": m, "usage_count": cnt}
+        for (org_id, d, m), cnt in sorted(per_module.items())
+    ], counters=("usage_count",))
+
+
+def rebuild_rollups(db: Session) -> None:
+    """清空汇总表并从 analytics 明细全量重建（计数表在数据库端 INSERT ... SELECT，模块表流式展开）。"""
+    db.execute(delete(AnalyticsOrgDaily))
+    db.execute(delete(AnalyticsModuleDaily))
+
+    db.execute(insert(AnalyticsOrgDaily).from_select(
+        ["org_id", "report_date", *_COUNTERS],
+        select(
+            Analytics.org_id,
+            Analytics.report_date,
+            func.coalesce(func.sum(Analytics.active_user_count), 0),
+            func.coalesce(func.sum(Analytics.experiment_count), 0),
+            func.count(Analytics.id),
+        )
+        .where(Analytics.org_id.isnot(None))
+        .group_by(Analytics.org_id, Analytics.report_date),
+    ))
+
+    # module_usage 为 JSON 列，各数据库展开语法不同，这里流式读取后在内存按 (机构, 日期, 模块) 累加，
+    # 内存占用取决于不同键的数量而非明细行数
+    per_module: dict[tuple[int, object, str], int] = defaultdict(int)
+    rows = db.execute(
+        select(Analytics.org_id, Analytics.report_date, Analytics.module_usage)
+        .where(Analytics.org_id.isnot(None), Analytics.module_usage.isnot(None))
+        .execution_options(yield_per=2000)
+    )
+    for org_id, report_date, module_usage in rows:
+        _accumulate_modules(per_module, org_id, report_date, module_usage)
+    _upsert_module_counts(db, per_module)
+    db.commit()
@@ -0,0 +1,59 @@
+"""
+流式 ZIP 打包：边读文件边产出 ZIP 字节块，不在内存或磁盘上缓冲整个归档。
+"""
+import zipfile
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+
+_READ_SIZE = 64 * 1024
+
+
+class _ChunkSink:
+    """zipfile 的只写目标：收集写入的字节，由生成器取走后清空（不可 seek，zipfile 会使用数据描述符）。"""
+
+    def __init__(self):
+        self._parts: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _zip_info(arcname: str, mtime: Optional[datetime], compress_type: int) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(arcname, date_time=(mtime or datetime.now()).timetuple()[:6])
+    info.compress_type = compress_type
+    return info
+
+
+def stream_zip(
+    files: Iterable[tuple[str, str, Optional[datetime]]],
+    extra: Iterable[tuple[str, bytes]] = (),
+) -> Iterator[bytes]:
+    """
+    files：(归档内文件名, 本地路径, 修改时间) —— 以 STORED 方式逐块写入（报告多为 PDF/视频，已压缩）；
+    extra：(归档内文件名, 内容) —— 小文件（如清单 CSV），DEFLATE 压缩。
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, mode="w", allowZip64=True) as zf:
+        for arcname, content in extra:
+            zf.writestr(_zip_info(arcname, None, zipfile.ZIP_DEFLATED), content)
+            yield sink.drain()
+        for arcname, path, mtime in files:
+            info = _zip_info(arcname, mtime, zipfile.ZIP_STORED)
+            with open(path, "rb") as src, zf.open(info, "w", force_zip64=True) as dst:
+                while True:
+                    block = src.read(_READ_SIZE)
+                    if not block:
+                        break
+                    dst.write(block)
+                    yield sink.drain()
+            yield sink.drain()   # 数据描述符
+    yield sink.drain()           # 中央目录
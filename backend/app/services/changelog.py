@@ -0,0 +1,199 @@
+"""
+同步变更日志服务。
+
+写入：监听 Session 的 before_flush / after_flush 事件，tasks/users/reports 的每次增删改
+在同一事务内追加一条 ChangeLog（按机构划分；报告归属学生所在机构）。
+用户或任务更换机构时，额外为原机构写一条 delete，使其从原机构的客户端中移除。
+
+读取：客户端按 (org_id, seq > after) 做索引范围扫描，同一实体在一页内只返回最后一次变更，
+返回时附带实体的当前数据；已删除或已不在同步范围内（未发布的任务、未评分的报告）的实体返回 delete。
+
+按机构发布同步通知（services/notify.py），唤醒等待中的 SSE / 长轮询客户端：postgres 后端在提交前
+于同一事务内 NOTIFY，其它后端在提交后发布。
+
+PostgreSQL 上写日志前按涉及的机构获取事务级 advisory 锁（按 org_id 升序），保证同一机构内
+seq 的分配顺序与提交顺序一致，客户端不会因为并发事务先取号后提交而漏掉变更。客户端游标按机构
+划分，不同机构的写事务互不等待。
+"""
+from typing import Iterable, Optional
+
+from sqlalchemy import event, func, insert, inspect, literal, select, text
+from sqlalchemy.orm import Session, aliased
+
+from ..models.change_log import ChangeLog
+from ..models.report import Report
+from ..models.task import Task
+from ..models.user import User
+from .notify import get_notifier, publish_changes
+
+_TRACKED = {Task: "tasks", User: "users", Report: "grades"}
+_MODELS = {entity: model for model, entity in _TRACKED.items()}
+
+_PG_LOCK_KEY = 0x5359_4E43   # "SYNC"
+
+
+def _entity_of(obj) -> Optional[str]:
+    return _TRACKED.get(type(obj))
+
+
+def _old_org(obj) -> Optional[int]:
+    """用户/任务本次 flush 中被改掉的原 org_id（未修改时返回 None）。"""
+    if isinstance(obj, Report):
+        return None
+    history = inspect(obj).attrs.org_id.history
+    if history.deleted and history.deleted[0] is not None and history.deleted[0] != obj.org_id:
+        return history.deleted[0]
+    return None
+
+
+@event.listens_for(Session, "before_flush")
+def _load_deleted(session: Session, flush_context, instances) -> None:
+    # 提交后属性已过期；在行被删除前加载 after_flush 需要的列
+    for obj in session.deleted:
+        if isinstance(obj, Report):
+            obj.student_id
+        elif _entity_of(obj):
+            obj.org_id
+
+
+@event.listens_for(Session, "after_flush")
+def _record_changes(session: Session, flush_context) -> None:
+    changes: list[tuple[str, object]] = []
+    for obj in session.new:
+        if _entity_of(obj):
+            changes.append(("upsert", obj))
+    for obj in session.dirty:
+        if _entity_of(obj) and session.is_modified(obj, include_collections=False):
+            changes.append(("upsert", obj))
+    for obj in session.deleted:
+        if _entity_of(obj):
+            changes.append(("delete", obj))
+    if not changes:
+        return
+
+    conn = session.connection()
+    student_ids = {obj.student_id for _, obj in changes if isinstance(obj, Report) and obj.student_id}
+    student_orgs = dict(conn.execute(
+        select(User.id, User.org_id).where(User.id.in_(student_ids))
+    ).all()) if student_ids else {}
+
+    rows = []
+    for op, obj in changes:
+        entity = _entity_of(obj)
+        if isinstance(obj, Report):
+            org_id = student_orgs.get(obj.student_id)
+        else:
+            org_id = obj.org_id
+            old_org = _old_org(obj) if op == "upsert" else None
+            if old_org is not None:
+                rows.append({"org_id": old_org, "entity": entity, "entity_id": obj.id, "op": "delete"})
+        rows.append({"org_id": org_id, "entity": entity, "entity_id": obj.id, "op": op})
+
+    if conn.dialect.name == "postgresql":
+        # 无机构的记录（学生已无机构的报告）不会被任何客户端读到，用 0 号锁即可
+        for org_id in sorted({r["org_id"] or 0 for r in rows}):
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key, :org_id)"), {"key": _PG_LOCK_KEY, "org_id": org_id})
+    conn.execute(insert(ChangeLog), rows)
+    session.info.setdefault("sync_notify", set()).update((r["org_id"], r["entity"]) for r in rows)
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_in_transaction(session: Session) -> None:
+    # transactional 后端（postgres）在提交事务的连接上 NOTIFY，不另开连接；
+    # before_commit 先于提交前的最后一次 flush，这里先 flush 以收集全部变更
+    if not get_notifier().backend.transactional:
+        return
+    session.flush()
+    pending = session.info.pop("sync_notify", None)
+    if pending:
+        publish_changes(pending, session.connection())
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_committed(session: Session) -> None:
+    pending = session.info.pop("sync_notify", None)
+    if pending:
+        publish_changes(pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session: Session, previous_transaction) -> None:
+    session.info.pop("sync_notify", None)
+
+
+def _visible(entity: str, obj) -> bool:
+    if entity == "tasks":
+        return obj.status == "published"
+    if entity == "grades":
+        return obj.status == "graded"
+    return True
+
+
+def read_changes(db: Session, org_id: int, after: int, limit: int) -> tuple[list[dict], int, bool]:
+    """
+    返回 (变更列表, next_seq, has_more)。变更项为 {seq, entity, entity_id, op, data}，
+    op 为 upsert 时 data 为当前 ORM 对象。
+    """
+    rows = (
+        db.query(ChangeLog)
+        .filter(ChangeLog.org_id == org_id, ChangeLog.seq > after)
+        .order_by(ChangeLog.seq)
+        .limit(limit + 1)
+        .all()
+    )
+    page = rows[:limit]
+    next_seq = page[-1].seq if page else after
+
+    latest: dict[tuple[str, int], ChangeLog] = {}
+    for row in page:
+        latest.pop((row.entity, row.entity_id), None)
+        latest[(row.entity, row.entity_id)] = row
+
+    current: dict[str, dict[int, object]] = {}
+    for entity, model in _MODELS.items():
+        ids = [eid for (e, eid), row in latest.items() if e == entity and row.op == "upsert"]
+        if ids:
+            current[entity] = {obj.id: obj for obj in db.query(model).filter(model.id.in_(ids))}
+
+    items = []
+    for (entity, entity_id), row in latest.items():
+        obj = current.get(entity, {}).get(entity_id)
+        if row.op == "upsert" and obj is not None and _visible(entity, obj):
+            items.append({"seq": row.seq, "entity": entity, "entity_id": entity_id, "op": "upsert", "data": obj})
+        else:
+            items.append({"seq": row.seq, "entity": entity, "entity_id": entity_id, "op": "delete", "data": None})
+    return items, next_seq, len(rows) > limit
+
+
+def backfill(db: Session, entities: Iterable[str] = ("tasks", "users", "grades")) -> int:
+    """为已有数据各写一条 upsert，使 after=0 的客户端可从日志拿到完整快照。返回写入条数。"""
+    student = aliased(User)
+    sources = {
+        "tasks": select(Task.org_id, literal("tasks"), Task.id, literal("upsert")),
+        "users": select(User.org_id, literal("users"), User.id, literal("upsert")),
+        "grades": select(student.org_id, literal("grades"), Report.id, literal("upsert"))
+            .join(student, student.id == Report.student_id),
+    }
+    before = db.query(func.count(ChangeLog.seq)).scalar()
+    for entity in entities:
+        db.execute(insert(ChangeLog).from_select(["org_id", "entity", "entity_id", "op"], sources[entity]))
+    db.commit()
+    return db.query(func.count(ChangeLog.seq)).scalar() - before
+
+
+def compact(db: Session) -> int:
+    """删除已被同一机构内同一实体更新的记录所覆盖的旧记录（对任何游标位置都不丢变更）。返回删除条数。"""
+    newer = aliased(ChangeLog)
+    superseded = (
+        select(newer.seq)
+        .where(
+            newer.entity == ChangeLog.entity,
+            newer.entity_id == ChangeLog.entity_id,
+            newer.org_id == ChangeLog.org_id,
+            newer.seq > ChangeLog.seq,
+        )
+        .exists()
+    )
+    deleted = db.query(ChangeLog).filter(superseded).delete(synchronize_session=False)
+    db.commit()
+    return deleted
@@ -0,0 +1,147 @@
+"""
+文件下载响应：强 ETag、条件请求（If-None-Match / If-Modified-Since → 304）、
+单区间 Range（206 / 416）以及可选的 nginx X-Accel-Redirect 转交。
+"""
+import mimetypes
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Iterator, Optional
+from urllib.parse import quote
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from ..config import get_settings
+
+_READ_SIZE = 64 * 1024
+
+
+def content_disposition(filename: str, disposition: str = "attachment") -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    candidates = [c.strip() for c in header.split(",")]
+    # If-None-Match 使用弱比较
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        return _etag_matches(inm, etag)
+    ims = request.headers.get("if-modified-since")
+    if ims:
+        try:
+            return int(mtime) <= parsedate_to_datetime(ims).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def _parse_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    解析单区间 Range 头，返回 (start, end_inclusive)。
+    多区间或格式错误返回 None（按规范回退为完整响应）；区间不可满足时抛出 RangeNotSatisfiable。
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_s, sep, end_s = spec.strip().partition("-")
+    if not sep or not (start_s or end_s):
+        return None
+    if (start_s and not start_s.isdigit()) or (end_s and not end_s.isdigit()):
+        return None
+
+    if start_s == "":
+        suffix = int(end_s)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(size - suffix, 0), size - 1
+
+    start = int(start_s)
+    end = int(end_s) if end_s else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def _iter_file_range(path: str, start: int, length: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(_READ_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def file_download_response(
+    request: Request,
+    path: str,
+    filename: Optional[str],
+    checksum: Optional[str] = None,
+    media_type: Optional[str] = None,
+) -> Response:
+    """
+    构造下载响应。checksum 存在时作为强 ETag，否则退化为基于 mtime/size 的 ETag。
+    设置了 Settings.download_accel_redirect_prefix 时，只返回 X-Accel-Redirect 头，由 nginx 发送文件
+    （nginx 自行处理 Range）。
+    """
+    st = os.stat(path)
+    media_type = media_type or mimetypes.guess_type(filename or path)[0] or "application/octet-stream"
+    etag = f'"{checksum}"' if checksum else f'"{int(st.st_mtime)}-{st.st_size}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",
+    }
+    if filename:
+        headers["Content-Disposition"] = content_disposition(filename)
+
+    if _not_modified(request, etag, st.st_mtime):
+        return Response(status_code=304, headers={k: headers[k] for k in ("ETag", "Last-Modified", "Cache-Control")})
+
+    settings = get_settings()
+    if settings.download_accel_redirect_prefix:
+        rel = os.path.relpath(os.path.abspath(path), os.path.abspath(settings.upload_dir))
+        if not rel.startswith(".."):
+            headers["X-Accel-Redirect"] = settings.download_accel_redirect_prefix.rstrip("/") + "/" + quote(
+                rel.replace(os.sep, "/")
+            )
+            return Response(headers=headers, media_type=media_type)
+
+    range_header = request.headers.get("range")
+    if range_header:
+        if_range = request.headers.get("if-range")
+        if if_range is None or if_range.strip() == etag:
+            try:
+                byte_range = _parse_range(range_header, st.st_size)
+            except RangeNotSatisfiable:
+                return Response(status_code=416, headers={"Content-Range": f"bytes */{st.st_size}", "ETag": etag})
+            if byte_range is not None:
+                start, end = byte_range
+                length = end - start + 1
+                headers["Content-Range"] = f"bytes {start}-{end}/{st.st_size}"
+                headers["Content-Length"] = str(length)
+                return StreamingResponse(
+                    _iter_file_range(path, start, length),
+                    status_code=206,
+                    headers=headers,
+                    media_type=media_type,
+                )
+
+    headers.pop("Content-Disposition", None)   # 由 FileResponse 根据 filename 生成
+    return FileResponse(path, filename=filename, headers=headers, media_type=media_type, stat_result=st)
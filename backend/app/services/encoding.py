@@ -0,0 +1,90 @@
+"""
+同步接口的紧凑编码：按 Accept 在 JSON、列式 JSON、MessagePack 之间协商。
+
+列式 JSON（application/vnd.zhixin.columnar+json）：响应中每个“对象数组”都改写为
+{"columns": [字段名...], "rows": [[值...], ...]}，字段名只出现一次；其余结构不变。
+MessagePack（application/msgpack）依赖可选包 msgpack，未安装时回退为 JSON。
+"""
+import json
+from typing import Any, Callable, Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute
+
+from ..compression import parse_qvalues
+
+try:
+    import msgpack
+except ImportError:   # 可选依赖
+    msgpack = None
+
+JSON = "application/json"
+COLUMNAR = "application/vnd.zhixin.columnar+json"
+MSGPACK = "application/msgpack"
+
+_ALIASES = {"application/x-msgpack": MSGPACK}
+
+
+def to_columnar(value: Any) -> Any:
+    if isinstance(value, list):
+        if value and all(isinstance(v, dict) for v in value):
+            columns = list(dict.fromkeys(k for v in value for k in v))
+            return {"columns": columns, "rows": [[to_columnar(v.get(c)) for c in columns] for v in value]}
+        return [to_columnar(v) for v in value]
+    if isinstance(value, dict):
+        return {k: to_columnar(v) for k, v in value.items()}
+    return value
+
+
+def available_media_types() -> list[str]:
+    offers = [JSON, COLUMNAR]
+    if msgpack is not None:
+        offers.append(MSGPACK)
+    return offers
+
+
+def choose_media_type(accept: Optional[str]) -> str:
+    """按 q 值选择客户端最偏好且服务端支持的表示；没有匹配时返回 JSON。"""
+    if not accept:
+        return JSON
+    offers = available_media_types()
+    best, best_q = JSON, 0.0
+    for media_type, q in parse_qvalues(accept).items():
+        media_type = _ALIASES.get(media_type, media_type)
+        if media_type in ("*/*", "application/*"):
+            media_type = JSON
+        if media_type in offers and q > best_q:
+            best, best_q = media_type, q
+    return best
+
+
+def encode(data: Any, media_type: str) -> bytes:
+    if media_type == MSGPACK:
+        return msgpack.packb(data, use_bin_type=True)
+    if media_type == COLUMNAR:
+        data = to_columnar(data)
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class NegotiatedRoute(APIRoute):
+    """在 FastAPI 完成 response_model 序列化后，按 Accept 把 JSON 响应改写为紧凑编码。"""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def negotiated_handler(request: Request) -> Response:
+            response = await handler(request)
+            media_type = choose_media_type(request.headers.get("accept"))
+            if media_type != JSON and isinstance(response, JSONResponse) and response.status_code == 200:
+                headers = {k: v for k, v in response.headers.items() if k not in ("content-length", "content-type")}
+                response = Response(
+                    content=encode(json.loads(response.body), media_type),
+                    status_code=response.status_code,
+                    headers=headers,
+                    media_type=media_type,
+                )
+            response.headers.append("Vary", "Accept")
+            return response
+
+        return negotiated_handler
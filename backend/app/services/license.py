@@ -1,16 +1,29 @@
 """
-License 服务：License key 生成、RSA 签名/验证 Activation_Token。
+License 服务：License key 生成、签名/验证 Activation_Token。
+
+配置了签名私钥时签发 Ed25519 / RSA 签名的 JWS 令牌（见 services/signing.py），客户端可离线验证；
+未配置时沿用旧的对称签名格式 base64(payload).base64(signature)。旧格式令牌在
+Settings.license_accept_legacy_tokens 为 True 时仍可验证，便于已安装的客户端平滑过渡。
+
+配额：Organization.license_quota 限制机构持有（未吊销）的 License 数，是否激活不影响计数。
+只在生成时检查（check_quota）；已发出的 License 总能激活，配额被调低或引入配额之前就超出的机构
+只是不能再生成新的 License。
 """
 import json
 import base64
 import secrets
 import hashlib
+import hmac
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
+from sqlalchemy import func, insert, select, update
 from sqlalchemy.orm import Session
 
 from ..models.license import License
+from ..models.organization import Organization
+from .revocation import get_revocations
+from .signing import get_keyring
 
 
 def generate_license_key() -> str:
@@ -19,6 +32,71 @@ def generate_license_key() -> str:
     return f"{raw[:4]}-{raw[4:8]}-{raw[8:12]}-{raw[12:16]}"
 
 
+class LicenseQuotaExceeded(Exception):
+    """机构未吊销的 License 数量将超过 Organization.license_quota。"""
+
+    def __init__(self, quota: int, used: int, requested: int):
+        super().__init__(f"超出机构 License 配额（配额 {quota}，已有 {used}，本次 {requested}）")
+        self.quota = quota
+        self.used = used
+        self.requested = requested
+
+
+# 批量生成：每条 INSERT 语句包含的行数、按 license_key 查重时每次 IN 的个数
+BULK_INSERT_CHUNK = 1000
+_KEY_CHECK_CHUNK = 500
+
+
+def lock_org_for_quota(db: Session, org_id: int) -> Optional[Organization]:
+    """锁定机构行，同一机构的配额检查与写入串行执行。"""
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite 忽略 FOR UPDATE，且 pysqlite 在第一条写语句时才开始事务：先执行一条不改变数据的
+        # UPDATE 取得数据库写锁，之后的计数与插入不会与其它写事务交错
+        db.execute(
+            update(Organization).where(Organization.id == org_id)
+            .values(updated_at=Organization.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+    return db.query(Organization).filter(Organization.id == org_id).with_for_update().first()
+
+
+def check_quota(db: Session, org: Organization, requested: int) -> None:
+    """持有的 License 数 + requested 不得超过配额；调用前应已持有 lock_org_for_quota 的锁。"""
+    used = db.query(func.count(License.id)).filter(License.org_id == org.id, License.is_active == True).scalar() or 0  # noqa: E712
+    if used + requested > org.license_quota:
+        raise LicenseQuotaExceeded(org.license_quota, used, requested)
+
+
+def generate_unused_keys(db: Session, count: int) -> list[str]:
+    """生成 count 个互不相同且数据库中不存在的 key（唯一约束仍是最终保证）。"""
+    keys: set[str] = set()
+    while len(keys) < count:
+        fresh = {generate_license_key() for _ in range(count - len(keys))} - keys
+        fresh_list = list(fresh)
+        for start in range(0, len(fresh_list), _KEY_CHECK_CHUNK):
+            chunk = fresh_list[start:start + _KEY_CHECK_CHUNK]
+            fresh -= set(db.scalars(select(License.license_key).where(License.license_key.in_(chunk))))
+        keys |= fresh
+    return list(keys)
+
+
+def create_licenses(db: Session, org: Organization, license_type: str, count: int) -> list[tuple[int, str]]:
+    """
+    在当前事务中为机构批量插入 count 个 License，返回 [(id, license_key)]（由调用方提交）。
+    先检查配额，key 预先查重后按 BULK_INSERT_CHUNK 分块多行插入。
+    """
+    check_quota(db, org, count)
+    rows = [
+        {"license_key": key, "org_id": org.id, "license_type": license_type}
+        for key in generate_unused_keys(db, count)
+    ]
+    stmt = insert(License).returning(License.id, License.license_key, sort_by_parameter_order=True)
+    created = []
+    for start in range(0, len(rows), BULK_INSERT_CHUNK):
+        created.extend(tuple(r) for r in db.execute(stmt, rows[start:start + BULK_INSERT_CHUNK]))
+    return created
+
+
 def calculate_expiry(license_type: str, from_dt: Optional[datetime] = None) -> Optional[datetime]:
     """根据 license 类型计算过期时间。"""
     base = from_dt or datetime.now(timezone.utc)
@@ -30,11 +108,16 @@ def calculate_expiry(license_type: str, from_dt: Optional[datetime] = None) -> O
 
 
 def _sign_payload(payload: dict) -> str:
+    """签名 Activation_Token：有签名私钥时为 JWS（header 含 kid），否则为旧的对称签名格式。"""
+    keyring = get_keyring()
+    if keyring.active is not None:
+        return keyring.sign(payload)
+    return _sign_legacy(payload)
+
+
+def _sign_legacy(payload: dict) -> str:
     """
-    签名 Activation_Token。
-    简化实现：使用 HMAC-SHA256（与 SECRET_KEY 对称签名）。
-    生产环境可替换为 RSA 非对称签名。
-    格式：base64(json_payload).base64(signature)
+    旧格式：base64(json_payload).base64(sha256(payload_b64.SECRET_KEY))，只能由服务端验证。
     """
     from ..config import get_settings
     settings = get_settings()
@@ -54,8 +137,11 @@ def _verify_signature(token: str) -> Optional[dict]:
     from ..config import get_settings
     settings = get_settings()
 
+    if token.count(".") == 2:
+        return get_keyring().verify(token)
+
     parts = token.split(".", 1)
-    if len(parts) != 2:
+    if len(parts) != 2 or not settings.license_accept_legacy_tokens:
         return None
 
     payload_b64, sig_b64 = parts
@@ -65,7 +151,7 @@ def _verify_signature(token: str) -> Optional[dict]:
     expected_sig = hashlib.sha256(sig_input).hexdigest()
     expected_b64 = base64.urlsafe_b64encode(expected_sig.encode()).decode()
 
-    if sig_b64 != expected_b64:
+    if not hmac.compare_digest(sig_b64, expected_b64):
         return None
 
     try:
@@ -75,30 +161,56 @@ def _verify_signature(token: str) -> Optional[dict]:
         return None
 
 
+def _bind_error(lic: License, machine_id: str) -> Optional[str]:
+    if not lic.is_active:
+        return "LICENSE_REVOKED"
+    if lic.machine_id and lic.machine_id != machine_id:
+        return "LICENSE_ALREADY_BOUND"
+    return None
+
+
+def _bind_machine(db: Session, lic: License, machine_id: str) -> bool:
+    """
+    原子地把未绑定的 License 绑定到 machine_id：单条条件 UPDATE，仅当仍未绑定且未吊销时生效，
+    返回是否更新成功。不锁定机构行，同一机构的并发激活互不阻塞。
+    """
+    now = datetime.now(timezone.utc)
+    result = db.execute(
+        update(License)
+        .where(License.id == lic.id, License.machine_id.is_(None), License.is_active == True)  # noqa: E712
+        .values(
+            machine_id=machine_id,
+            activated_at=now,
+            expires_at=func.coalesce(License.expires_at, calculate_expiry(lic.license_type, now)),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
 def activate_license(db: Session, license_key: str, machine_id: str) -> Optional[dict]:
     """
     激活 License：绑定 machine_id，返回签名的 Activation_Token 信息。
     返回 None 表示失败，返回 dict 包含 error 字段表示具体错误。
+    已绑定到同一 machine_id 时直接重新签发令牌（客户端可借此换取新格式 / 新密钥签名的令牌）。
     """
     lic = db.query(License).filter(License.license_key == license_key).first()
     if lic is None:
         return {"error": "LICENSE_NOT_FOUND"}
 
-    if not lic.is_active:
-        return {"error": "LICENSE_REVOKED"}
-
-    if lic.machine_id and lic.machine_id != machine_id:
-        return {"error": "LICENSE_ALREADY_BOUND"}
-
-    now = datetime.now(timezone.utc)
+    error = _bind_error(lic, machine_id)
+    if error:
+        return {"error": error}
 
     if lic.machine_id is None:
-        lic.machine_id = machine_id
-        lic.activated_at = now
-        if lic.expires_at is None:
-            lic.expires_at = calculate_expiry(lic.license_type, now)
+        bound = _bind_machine(db, lic, machine_id)
         db.commit()
         db.refresh(lic)
+        if not bound:
+            # 条件更新未命中：并发请求抢先绑定（可能是同一台机器）或刚被吊销
+            error = _bind_error(lic, machine_id)
+            if error:
+                return {"error": error}
 
     payload = {
         "license_id": lic.id,
@@ -118,8 +230,11 @@ def activate_license(db: Session, license_key: str, machine_id: str) -> Optional
     }
 
 
-def verify_activation_token(db: Session, token: str) -> dict:
-    """验证 Activation_Token，返回 license 状态。"""
+def verify_activation_token(db: Optional[Session], token: str) -> dict:
+    """
+    验证 Activation_Token，返回 license 状态。
+    吊销列表（services/revocation.py）可用时只查内存集合，db 可传 None；否则查询 License 行。
+    """
     payload = _verify_signature(token)
     if payload is None:
         return {"is_active": False, "error": "INVALID_TOKEN"}
@@ -133,11 +248,16 @@ def verify_activation_token(db: Session, token: str) -> dict:
         if datetime.now(timezone.utc) > expires_at:
             return {"is_active": False, "error": "LICENSE_EXPIRED"}
 
-    # 检查数据库中 license 是否仍然 active
+    # 检查 license 是否仍然 active
     license_id = payload.get("license_id")
     if license_id:
-        lic = db.query(License).filter(License.id == license_id).first()
-        if lic is None or not lic.is_active:
+        revocations = get_revocations()
+        if revocations.ready:
+            revoked = revocations.is_revoked(license_id)
+        else:
+            lic = db.query(License).filter(License.id == license_id).first()
+            revoked = lic is None or not lic.is_active
+        if revoked:
             return {"is_active": False, "error": "LICENSE_REVOKED"}
 
     return {
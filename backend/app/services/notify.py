@@ -0,0 +1,207 @@
+"""
+同步通知：数据变更提交后唤醒等待中的 Local_Client（SSE / 长轮询）。
+
+事件按机构路由，内容为 {"entities": [...]}，客户端收到后再调用 /sync/changes 等接口拉取数据。
+transactional 的后端（postgres）在提交前于提交事务的连接上发布，随事务一起提交、回滚时丢弃；
+其它后端在事务提交后发布（见 services/changelog.py 的 before_commit / after_commit 监听）。
+
+后端由 Settings.sync_notify_backend 选择：
+- memory：进程内分发（单 worker 部署）；
+- postgres：PostgreSQL LISTEN/NOTIFY，多 worker / 多实例之间互相唤醒（监听使用连接池之外的独立连接）；
+- 其它值视为 "模块路径:类名"，类需实现 NotificationBackend 的 publish/start/stop。
+
+NotificationBackend 只按整数键路由事件，License 吊销列表（services/revocation.py）以 license_id 为键复用同一组后端。
+"""
+import asyncio
+import importlib
+import json
+import logging
+import select
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from typing import Callable, Iterable
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+Dispatch = Callable[[int, dict], None]   # (路由键, 事件)
+
+
+class Subscription:
+    """单个等待者：在所属事件循环中通过队列接收事件。"""
+
+    def __init__(self, org_id: int):
+        self.org_id = org_id
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def deliver(self, event: dict) -> None:
+        # 可能由任意线程调用（同步路由在线程池中提交事务）
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+    async def get(self) -> dict:
+        return await self._queue.get()
+
+    def drain(self) -> list[dict]:
+        events = []
+        while not self._queue.empty():
+            events.append(self._queue.get_nowait())
+        return events
+
+
+class NotificationBackend:
+    """把 publish 的事件送达所有进程，并在本进程内调用 dispatch。"""
+
+    # 为 True 时由 publish_in 在提交前通过提交事务的连接发布，事务提交后才送达
+    transactional = False
+
+    def start(self, dispatch: Dispatch) -> None:
+        self._dispatch = dispatch
+
+    def publish(self, key: int, event: dict) -> None:
+        raise NotImplementedError
+
+    def publish_in(self, conn, key: int, event: dict) -> None:
+        raise NotImplementedError
+
+    def stop(self) -> None:
+        pass
+
+
+class MemoryBackend(NotificationBackend):
+    def publish(self, key: int, event: dict) -> None:
+        self._dispatch(key, event)
+
+
+class PostgresBackend(NotificationBackend):
+    """通过 NOTIFY 广播，后台线程 LISTEN 并在本进程分发。"""
+
+    transactional = True
+
+    def __init__(self, channel: str = "zxyk_sync_events"):
+        from ..database import engine
+        self._engine = engine
+        self.channel = channel
+        self._stopped = threading.Event()
+
+    def start(self, dispatch: Dispatch) -> None:
+        super().start(dispatch)
+        threading.Thread(target=self._listen, name=f"{self.channel}-listener", daemon=True).start()
+
+    def publish(self, key: int, event: dict) -> None:
+        with self._engine.begin() as conn:
+            self.publish_in(conn, key, event)
+
+    def publish_in(self, conn, key: int, event: dict) -> None:
+        # NOTIFY 随事务提交送达，回滚时丢弃
+        from sqlalchemy import text
+        payload = json.dumps({"key": key, **event})
+        conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": payload})
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _connect(self):
+        # LISTEN 连接在进程存续期间一直占用，不从连接池取，避免占掉业务请求的连接
+        dialect = self._engine.dialect
+        cargs, cparams = dialect.create_connect_args(self._engine.url)
+        return dialect.connect(*cargs, **cparams)
+
+    def _listen(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                conn = self._connect()
+                try:
+                    conn.autocommit = True
+                    conn.cursor().execute(f"LISTEN {self.channel}")
+                    while not self._stopped.is_set():
+                        if select.select([conn], [], [], 5)[0]:
+                            conn.poll()
+                            while conn.notifies:
+                                data = json.loads(conn.notifies.pop(0).payload)
+                                self._dispatch(data.pop("key"), data)
+                finally:
+                    conn.close()
+            except Exception:
+                logger.exception("同步通知监听连接异常，5 秒后重连")
+                self._stopped.wait(5)
+
+
+_BACKENDS = {"memory": MemoryBackend, "postgres": PostgresBackend}
+
+
+def load_backend(name: str, **kwargs) -> NotificationBackend:
+    """按名称创建后端；kwargs 传给内置后端（如 PostgresBackend 的 channel）。"""
+    if name == "postgres":
+        return PostgresBackend(**kwargs)
+    if name in _BACKENDS:
+        return _BACKENDS[name]()
+    module, _, cls = name.partition(":")
+    return getattr(importlib.import_module(module), cls)()
+
+
+class Notifier:
+    def __init__(self, backend: NotificationBackend):
+        self._lock = threading.Lock()
+        self._subs: dict[int, set[Subscription]] = defaultdict(set)
+        self.backend = backend
+        backend.start(self._dispatch)
+
+    def subscribe(self, org_id: int) -> Subscription:
+        sub = Subscription(org_id)
+        with self._lock:
+            self._subs[org_id].add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subs.get(sub.org_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.org_id]
+
+    def publish(self, org_id: int, entities: Iterable[str], conn=None) -> None:
+        """conn 为提交前的事务连接时随该事务发布（仅 transactional 后端）。"""
+        event = {"entities": sorted(set(entities))}
+        if conn is not None:
+            self.backend.publish_in(conn, org_id, event)
+        else:
+            self.backend.publish(org_id, event)
+
+    def _dispatch(self, org_id: int, event: dict) -> None:
+        with self._lock:
+            subs = list(self._subs.get(org_id, ()))
+        for sub in subs:
+            try:
+                sub.deliver(event)
+            except RuntimeError:   # 所属事件循环已关闭
+                self.unsubscribe(sub)
+
+
+@lru_cache
+def get_notifier() -> Notifier:
+    return Notifier(load_backend(get_settings().sync_notify_backend))
+
+
+def publish_changes(changes: Iterable[tuple[int, str]], conn=None) -> None:
+    """
+    发布 (org_id, entity) 集合，按机构合并为一条事件。
+    conn 为 None 时在事务提交后调用，发布失败只记录日志，不影响已提交的事务；
+    否则在提交前于该连接上发布，失败时异常向上抛出，事务随之回滚。
+    """
+    by_org: dict[int, set[str]] = defaultdict(set)
+    for org_id, entity in changes:
+        if org_id is not None:
+            by_org[org_id].add(entity)
+    notifier = get_notifier()
+    for org_id, entities in sorted(by_org.items()):
+        if conn is not None:
+            notifier.publish(org_id, entities, conn)
+            continue
+        try:
+            notifier.publish(org_id, entities)
+        except Exception:
+            logger.exception("发布同步通知失败 org_id=%s", org_id)
@@ -0,0 +1,141 @@
+"""
+列表分页：页码（OFFSET）与游标（keyset，按 id 倒序）两种模式，以及可选的总数统计方式；
+以及增量同步使用的 (时间戳, id) 单调游标分页。
+
+- 页码模式：?page=N&page_size=M，与原接口一致；
+- 游标模式：?cursor=（首页传空串）&page_size=M，返回 next_cursor，后续请求传回即可，不使用 OFFSET；
+- count：exact（默认，COUNT(*)）/ estimate（无过滤条件时在 PostgreSQL 上读取 pg_class.reltuples，
+  其它情况回退为 exact）/ none（不统计，total 与 pages 为 null）。
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import Select, and_, or_, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query as ORMQuery
+
+from ..schemas.common import PagedResponse, SyncPage
+
+CountMode = Literal["exact", "estimate", "none"]
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="cursor 无效")
+
+
+def _count(q: ORMQuery, mode: CountMode) -> Optional[int]:
+    if mode == "none":
+        return None
+    if mode == "estimate" and q.whereclause is None and q.session.get_bind().dialect.name == "postgresql":
+        table = q.column_descriptions[0]["entity"].__tablename__
+        estimate = q.session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = :t"), {"t": table}
+        ).scalar()
+        # 从未 ANALYZE 过的表 reltuples 为 -1
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+    return q.order_by(None).count()
+
+
+def paginate(
+    q: ORMQuery,
+    id_col,
+    page: int,
+    page_size: int,
+    cursor: Optional[str] = None,
+    count: CountMode = "exact",
+) -> PagedResponse:
+    """对已加好过滤条件的查询按 id 倒序分页。"""
+    total = _count(q, count)
+    pages = None if total is None else ((total + page_size - 1) // page_size if total > 0 else 1)
+
+    if cursor is None:
+        items = q.order_by(id_col.desc()).offset((page - 1) * page_size).limit(page_size).all()
+        return PagedResponse(items=items, total=total, page=page, page_size=page_size, pages=pages)
+
+    if cursor:
+        q = q.filter(id_col < decode_cursor(cursor))
+    rows = q.order_by(id_col.desc()).limit(page_size + 1).all()
+    items = rows[:page_size]
+    next_cursor = encode_cursor(items[-1].id) if len(rows) > page_size else None
+    return PagedResponse(
+        items=items, total=total, page=None, page_size=page_size, pages=pages, next_cursor=next_cursor,
+    )
+
+
+# --- 增量同步游标：(ts, id)，按 ts、id 升序推进，同一时间戳的多行不会被跳过或重复 ---
+
+def encode_sync_cursor(ts: datetime, last_id: int) -> str:
+    raw = json.dumps({"ts": ts.isoformat(), "id": last_id})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_sync_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(data["ts"]), int(data["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="cursor 无效")
+
+
+def _sync_window(q, ts_col, id_col, limit: int, since: Optional[datetime], cursor: Optional[str]):
+    # ORM Query 与 select() 都支持 filter / order_by / limit；
+    # 游标列在 SQLite 上以统一的 6 位小数秒文本保存（见 database.db_now），直接比较原列即可走索引
+    if cursor:
+        ts, last_id = decode_sync_cursor(cursor)
+        q = q.filter(or_(ts_col > ts, and_(ts_col == ts, id_col > last_id)))
+    elif since is not None:
+        q = q.filter(ts_col > since)
+    return q.order_by(ts_col, id_col).limit(limit + 1)
+
+
+def _sync_result(rows: list, ts_col, limit: int, cursor: Optional[str]) -> SyncPage:
+    items = rows[:limit]
+    if items:
+        last = items[-1]
+        next_cursor = encode_sync_cursor(getattr(last, ts_col.key), last.id)
+    else:
+        next_cursor = cursor or None
+    return SyncPage(items=items, next_cursor=next_cursor, has_more=len(rows) > limit)
+
+
+def sync_page(
+    q: ORMQuery,
+    ts_col,
+    id_col,
+    limit: int,
+    since: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+) -> SyncPage:
+    """
+    返回 (ts, id) 严格大于游标位置的前 limit 行。
+    未传 cursor 时以 since 为起点（ts > since，与旧接口语义一致）。
+    """
+    rows = _sync_window(q, ts_col, id_col, limit, since, cursor).all()
+    return _sync_result(rows, ts_col, limit, cursor)
+
+
+async def sync_page_async(
+    db: AsyncSession,
+    stmt: Select,
+    ts_col,
+    id_col,
+    limit: int,
+    since: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+) -> SyncPage:
+    """sync_page 的异步版本，stmt 为 select(Model) 语句。"""
+    rows = (await db.scalars(_sync_window(stmt, ts_col, id_col, limit, since, cursor))).all()
+    return _sync_result(list(rows), ts_col, limit, cursor)
@@ -0,0 +1,173 @@
+"""
+License 吊销列表：在内存中保存已吊销的 license_id，/licenses/verify 校验签名与过期后
+直接查这个集合，不访问数据库。
+
+- 启动时从数据库加载（main.py 的 lifespan），之后每 license_revocation_refresh_seconds 秒全量刷新；
+- License 的 is_active 在任意事务中被修改（revoke_license 等）时，随提交通过后端广播增量，
+  各 worker 立即更新自己的集合；
+- 后端由 Settings.license_revocation_backend 选择，与同步通知（services/notify.py）相同：
+  memory（只更新本进程）/ postgres（LISTEN/NOTIFY，所有 worker 立即生效）/ "模块:类"；
+  默认 auto：WEB_CONCURRENCY > 1 且主库为 PostgreSQL 时用 postgres，否则 memory。
+  多 worker 时 memory 后端无法让其它进程立即生效，此时不启用内存校验，verify 逐次查库；
+- 从未加载成功，或连续 3 个刷新周期都没有刷新成功时，视为不可用，验证回退为逐次查库；
+  license_revocation_refresh_seconds=0 时关闭内存校验。
+
+License 行不会被删除（吊销即 is_active=false），因此集合只需记录 is_active=false 的 id。
+"""
+import asyncio
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models.license import License
+from .notify import NotificationBackend, load_backend
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_CHANNEL = "zxyk_license_revocations"
+_STALE_INTERVALS = 3
+
+
+class RevocationList:
+    def __init__(self, backend: NotificationBackend, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._revoked: set[int] = set()
+        self._loaded_at: Optional[float] = None
+        self._loading: Optional[dict[int, bool]] = None   # 加载期间收到的增量
+        self.backend = backend
+        backend.start(self._apply)
+
+    @property
+    def ready(self) -> bool:
+        if self.refresh_seconds <= 0 or self._loaded_at is None:
+            return False
+        return time.monotonic() - self._loaded_at <= self.refresh_seconds * _STALE_INTERVALS
+
+    def is_revoked(self, license_id: int) -> bool:
+        return license_id in self._revoked
+
+    def load(self, db: Session) -> None:
+        """从数据库全量加载；加载期间收到的增量在替换后重新应用，不会被旧快照覆盖。"""
+        with self._lock:
+            self._loading = {}
+        try:
+            revoked = set(db.scalars(select(License.id).where(License.is_active == False)))  # noqa: E712
+        except BaseException:
+            with self._lock:
+                self._loading = None
+            raise
+        with self._lock:
+            for license_id, is_revoked in self._loading.items():
+                (revoked.add if is_revoked else revoked.discard)(license_id)
+            self._loading = None
+            self._revoked = revoked
+            self._loaded_at = time.monotonic()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._revoked = set()
+            self._loaded_at = None
+
+    def publish(self, license_id: int, revoked: bool, conn=None) -> None:
+        """conn 为提交前的事务连接时随该事务发布（仅 transactional 后端）。"""
+        if conn is not None:
+            self.backend.publish_in(conn, license_id, {"revoked": revoked})
+        else:
+            self.backend.publish(license_id, {"revoked": revoked})
+
+    def _apply(self, license_id: int, event: dict) -> None:
+        with self._lock:
+            if event["revoked"]:
+                self._revoked.add(license_id)
+            else:
+                self._revoked.discard(license_id)
+            if self._loading is not None:
+                self._loading[license_id] = event["revoked"]
+
+
+def _backend_name(settings) -> str:
+    name = settings.license_revocation_backend
+    if name != "auto":
+        return name
+    if settings.web_concurrency > 1 and make_url(settings.database_url).get_backend_name() == "postgresql":
+        return "postgres"
+    return "memory"
+
+
+@lru_cache
+def get_revocations() -> RevocationList:
+    settings = get_settings()
+    name = _backend_name(settings)
+    refresh_seconds = settings.license_revocation_refresh_seconds
+    if name == "memory" and settings.web_concurrency > 1 and refresh_seconds > 0:
+        # 吊销只会更新执行吊销的那个 worker，其它 worker 在下次全量刷新前仍会放行
+        logger.warning("多 worker 部署下 License 吊销列表不能使用 memory 后端，verify 改为逐次查库")
+        refresh_seconds = 0
+    return RevocationList(load_backend(name, channel=REVOCATION_CHANNEL), refresh_seconds)
+
+
+def reload_revocations() -> bool:
+    """用主库会话全量刷新，失败只记录日志（超过有效期后验证自动回退为查库）。"""
+    from ..database import SessionLocal
+    try:
+        with SessionLocal() as db:
+            get_revocations().load(db)
+        return True
+    except Exception:
+        logger.exception("加载 License 吊销列表失败")
+        return False
+
+
+async def refresh_revocations_periodically() -> None:
+    interval = get_revocations().refresh_seconds
+    while True:
+        await asyncio.to_thread(reload_revocations)
+        await asyncio.sleep(interval)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_revocations(session: Session, flush_context) -> None:
+    changed = {}
+    for obj in session.new:
+        if isinstance(obj, License) and obj.is_active is False:
+            changed[obj.id] = True
+    for obj in session.dirty:
+        if isinstance(obj, License) and inspect(obj).attrs.is_active.history.has_changes():
+            changed[obj.id] = not obj.is_active
+    if changed:
+        session.info.setdefault("license_revocations", {}).update(changed)
+
+
+@event.listens_for(Session, "before_commit")
+def _publish_revocations_in_transaction(session: Session) -> None:
+    # 与同步通知相同：transactional 后端随提交事务一起 NOTIFY（见 services/changelog.py）
+    revocations = get_revocations()
+    if not revocations.backend.transactional:
+        return
+    session.flush()
+    changed = session.info.pop("license_revocations", None)
+    for license_id, revoked in (changed or {}).items():
+        revocations.publish(license_id, revoked, session.connection())
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_revocations(session: Session) -> None:
+    changed = session.info.pop("license_revocations", None)
+    for license_id, revoked in (changed or {}).items():
+        try:
+            get_revocations().publish(license_id, revoked)
+        except Exception:
+            logger.exception("广播 License 吊销状态失败 license_id=%s", license_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_revocations(session: Session, previous_transaction) -> None:
+    session.info.pop("license_revocations", None)
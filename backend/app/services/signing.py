@@ -0,0 +1,157 @@
+"""
+Activation_Token 的非对称签名：Ed25519（EdDSA，推荐）或 RSA（RS256），支持多密钥轮换。
+
+令牌为 JWS compact 格式：base64url(header).base64url(payload).base64url(signature)，
+header 含 alg 与 kid（公钥的 RFC 7638 JWK thumbprint）。公钥通过 /api/cloud/licenses/jwks 公开，
+Local_Client 缓存 JWKS 后即可离线验证，只需定期调用 /licenses/verify 检查吊销。
+
+密钥配置：
+- Settings.rsa_private_key_path：当前签名私钥（PEM，Ed25519 或 RSA）；
+- Settings.license_retired_key_paths：逗号分隔的旧密钥（私钥或公钥 PEM），只用于验证并继续在 JWKS 中公开，
+  直到用它签发的令牌都已过期或被客户端重新激活替换。
+
+轮换：`python -m app.manage generate-signing-key --out new.pem`，把原路径移入 LICENSE_RETIRED_KEY_PATHS，
+RSA_PRIVATE_KEY_PATH 指向新密钥后重启。
+
+密钥在应用启动时加载（main.py 的 lifespan），文件缺失或格式错误时启动失败，而不是在每次激活请求中报错。
+"""
+import base64
+import hashlib
+import json
+import logging
+from functools import lru_cache
+from typing import Optional
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, padding, rsa
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+TOKEN_TYPE = "ZXYK-ACT"
+
+
+def b64url_encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def b64url_decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _int_b64(value: int) -> str:
+    return b64url_encode(value.to_bytes((value.bit_length() + 7) // 8, "big"))
+
+
+class SigningKey:
+    """单个密钥；private_key 为 None 时只能验证。"""
+
+    def __init__(self, public_key, private_key=None):
+        if isinstance(public_key, ed25519.Ed25519PublicKey):
+            self.alg = "EdDSA"
+            raw = public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+            self._jwk = {"kty": "OKP", "crv": "Ed25519", "x": b64url_encode(raw)}
+        elif isinstance(public_key, rsa.RSAPublicKey):
+            self.alg = "RS256"
+            numbers = public_key.public_numbers()
+            self._jwk = {"kty": "RSA", "n": _int_b64(numbers.n), "e": _int_b64(numbers.e)}
+        else:
+            raise ValueError("只支持 Ed25519 或 RSA 密钥")
+        self.public_key = public_key
+        self.private_key = private_key
+        # RFC 7638：必需成员按字典序、无空白序列化后取 SHA-256
+        thumbprint_input = json.dumps(self._jwk, sort_keys=True, separators=(",", ":")).encode()
+        self.kid = b64url_encode(hashlib.sha256(thumbprint_input).digest())
+
+    @classmethod
+    def from_pem(cls, pem: bytes) -> "SigningKey":
+        if b"PRIVATE KEY" in pem:
+            private_key = serialization.load_pem_private_key(pem, password=None)
+            return cls(private_key.public_key(), private_key)
+        return cls(serialization.load_pem_public_key(pem))
+
+    def sign(self, data: bytes) -> bytes:
+        if self.private_key is None:
+            raise ValueError(f"密钥 {self.kid} 只有公钥，不能签名")
+        if self.alg == "EdDSA":
+            return self.private_key.sign(data)
+        return self.private_key.sign(data, padding.PKCS1v15(), hashes.SHA256())
+
+    def verify(self, signature: bytes, data: bytes) -> bool:
+        try:
+            if self.alg == "EdDSA":
+                self.public_key.verify(signature, data)
+            else:
+                self.public_key.verify(signature, data, padding.PKCS1v15(), hashes.SHA256())
+        except InvalidSignature:
+            return False
+        return True
+
+    def jwk(self) -> dict:
+        return {**self._jwk, "kid": self.kid, "alg": self.alg, "use": "sig"}
+
+
+class KeyRing:
+    def __init__(self, active: Optional[SigningKey], retired: list[SigningKey] = ()):
+        self.active = active
+        self.keys = {k.kid: k for k in ([active] if active else []) + list(retired)}
+
+    def sign(self, payload: dict) -> str:
+        header = {"alg": self.active.alg, "kid": self.active.kid, "typ": TOKEN_TYPE}
+        signing_input = ".".join(
+            b64url_encode(json.dumps(part, sort_keys=True, separators=(",", ":"), default=str).encode())
+            for part in (header, payload)
+        )
+        return f"{signing_input}.{b64url_encode(self.active.sign(signing_input.encode()))}"
+
+    def verify(self, token: str) -> Optional[dict]:
+        """校验 JWS 令牌，返回 payload；格式错误、kid 未知、alg 不符或签名无效时返回 None。"""
+        try:
+            header_b64, payload_b64, sig_b64 = token.split(".")
+            header = json.loads(b64url_decode(header_b64))
+            key = self.keys.get(header.get("kid"))
+            if key is None or header.get("alg") != key.alg:
+                return None
+            if not key.verify(b64url_decode(sig_b64), f"{header_b64}.{payload_b64}".encode()):
+                return None
+            payload = json.loads(b64url_decode(payload_b64))
+        except (ValueError, AttributeError, TypeError):
+            return None
+        return payload if isinstance(payload, dict) else None
+
+    def jwks(self) -> dict:
+        return {"keys": [k.jwk() for k in self.keys.values()]}
+
+
+def generate_private_key_pem(alg: str = "ed25519", rsa_bits: int = 3072) -> bytes:
+    if alg == "ed25519":
+        key = ed25519.Ed25519PrivateKey.generate()
+    elif alg == "rsa":
+        key = rsa.generate_private_key(public_exponent=65537, key_size=rsa_bits)
+    else:
+        raise ValueError(f"不支持的算法 {alg}")
+    return key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption(),
+    )
+
+
+def _read_key(path: str) -> SigningKey:
+    try:
+        with open(path, "rb") as f:
+            return SigningKey.from_pem(f.read())
+    except FileNotFoundError:
+        raise RuntimeError(f"签名密钥文件不存在：{path}（检查 RSA_PRIVATE_KEY_PATH / LICENSE_RETIRED_KEY_PATHS）") from None
+
+
+@lru_cache
+def get_keyring() -> KeyRing:
+    settings = get_settings()
+    active = _read_key(settings.rsa_private_key_path) if settings.rsa_private_key_path else None
+    if active is not None and active.private_key is None:
+        raise ValueError("rsa_private_key_path 必须是私钥")
+    retired = [_read_key(p.strip()) for p in settings.license_retired_key_paths.split(",") if p.strip()]
+    if active is None:
+        logger.warning("未配置 rsa_private_key_path，Activation_Token 使用旧的对称签名，客户端无法离线验证")
+    return KeyRing(active, retired)
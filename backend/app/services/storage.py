@@ -0,0 +1,169 @@
+"""
+文件存储服务：内容寻址（SHA-256）的报告文件存储。
+
+目录布局：{upload_dir}/blobs/{sha[:2]}/{sha[2:4]}/{sha}
+相同内容只保存一份；引用关系由 Report.checksum 表示，无引用的 blob 由 gc 命令清理。
+上传时分块写入临时文件、边写边算 SHA-256，完成后原子重命名到目标位置。
+"""
+import hashlib
+import os
+import tempfile
+import time
+from functools import partial
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models.report import Report
+
+
+class UploadTooLarge(Exception):
+    """上传内容超过允许的最大字节数。"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"文件超过 {max_bytes} 字节上限")
+        self.max_bytes = max_bytes
+
+
+class BlobStore:
+    def __init__(self, root: str):
+        self.root = root
+        self.tmp_dir = os.path.join(root, "tmp")
+
+    def path_for(self, checksum: str) -> str:
+        return os.path.join(self.root, checksum[:2], checksum[2:4], checksum)
+
+    def exists(self, checksum: str) -> bool:
+        return os.path.isfile(self.path_for(checksum))
+
+    def put(self, src: BinaryIO, max_bytes: int, chunk_size: int) -> tuple[int, str]:
+        """
+        将 src 分块写入存储，返回 (字节数, sha256 hex)。
+        内容已存在时丢弃临时文件（去重）；超过 max_bytes 抛出 UploadTooLarge。
+        """
+        return self.put_chunks(iter(partial(src.read, chunk_size), b""), max_bytes)
+
+    def put_chunks(self, chunks: Iterable[bytes], max_bytes: int) -> tuple[int, str]:
+        """与 put 相同，但数据来源为字节块迭代器（如断点续传的分片文件）。"""
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir, suffix=".part")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in chunks:
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise UploadTooLarge(max_bytes)
+                    digest.update(chunk)
+                    out.write(chunk)
+            checksum = digest.hexdigest()
+            self.commit_file(tmp_path, checksum)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return size, checksum
+
+    def commit_file(self, tmp_path: str, checksum: str) -> str:
+        """把已算好 checksum 的临时文件移入存储（已存在则删除临时文件），返回 blob 路径。"""
+        dest = self.path_for(checksum)
+        try:
+            # 已存在时刷新 mtime：gc 删除前复查 mtime，宽限期内被复用的 blob 不会被清理；
+            # 刷新失败说明 gc 刚把它移走，改为写入自己的副本
+            os.utime(dest)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            os.replace(tmp_path, dest)
+        else:
+            os.remove(tmp_path)
+        return dest
+
+    def delete_if_stale(self, checksum: str, cutoff: float) -> bool:
+        """
+        blob 的 mtime 不晚于 cutoff 时删除，返回是否删除。
+        先原子重命名再复查 mtime：并发复用该 blob 的 commit_file 要么在重命名前刷新了 mtime（此处放回），
+        要么刷新失败后重新写入，都不会丢失文件。
+        """
+        path = self.path_for(checksum)
+        doomed = f"{path}.gc"
+        try:
+            os.rename(path, doomed)
+        except FileNotFoundError:
+            return False
+        if os.path.getmtime(doomed) > cutoff:
+            os.replace(doomed, path)
+            return False
+        os.remove(doomed)
+        return True
+
+    def iter_blobs(self) -> Iterator[tuple[str, float]]:
+        """遍历存储中的 blob，产出 (checksum, mtime)。"""
+        if not os.path.isdir(self.root):
+            return
+        for shard1 in os.listdir(self.root):
+            d1 = os.path.join(self.root, shard1)
+            if shard1 == "tmp" or len(shard1) != 2 or not os.path.isdir(d1):
+                continue
+            for shard2 in os.listdir(d1):
+                d2 = os.path.join(d1, shard2)
+                if not os.path.isdir(d2):
+                    continue
+                for name in os.listdir(d2):
+                    path = os.path.join(d2, name)
+                    if os.path.isfile(path) and not name.endswith(".gc"):
+                        yield name, os.path.getmtime(path)
+
+
+def get_blob_store() -> BlobStore:
+    return BlobStore(os.path.join(get_settings().upload_dir, "blobs"))
+
+
+def resolve_report_path(report: Report, store: Optional[BlobStore] = None) -> Optional[str]:
+    """返回报告文件的本地路径：优先内容寻址 blob，旧数据回退到 file_path。"""
+    store = store or get_blob_store()
+    if report.checksum and store.exists(report.checksum):
+        return store.path_for(report.checksum)
+    if report.file_path and os.path.exists(report.file_path):
+        return report.file_path
+    return None
+
+
+def collect_garbage(
+    db: Session,
+    store: Optional[BlobStore] = None,
+    grace_seconds: int = 24 * 3600,
+    dry_run: bool = False,
+    batch_size: int = 500,
+) -> list[str]:
+    """
+    删除没有任何 Report 引用的 blob，返回被删除（dry_run 时为将被删除）的 checksum 列表。
+    修改时间在 grace_seconds 内的 blob 跳过，避免与尚未提交 Report 的上传竞争；上传复用已有 blob 时
+    会刷新其 mtime，删除前再复查一次（见 BlobStore.delete_if_stale），扫描之后才被复用的 blob 同样保留。
+    """
+    store = store or get_blob_store()
+    cutoff = time.time() - grace_seconds
+    removed: list[str] = []
+
+    def _flush(batch: list[str]) -> None:
+        referenced = {
+            c for (c,) in db.query(Report.checksum).filter(Report.checksum.in_(batch)).distinct()
+        }
+        for checksum in batch:
+            if checksum in referenced:
+                continue
+            if dry_run or store.delete_if_stale(checksum, cutoff):
+                removed.append(checksum)
+
+    batch: list[str] = []
+    for checksum, mtime in store.iter_blobs():
+        if mtime > cutoff:
+            continue
+        batch.append(checksum)
+        if len(batch) >= batch_size:
+            _flush(batch)
+            batch = []
+    if batch:
+        _flush(batch)
+    return removed
@@ -0,0 +1,124 @@
+"""
+断点续传服务：分片落盘、已接收范围查询、合并入内容寻址存储、过期会话清理。
+
+分片 i 覆盖字节 [i * chunk_size, min((i + 1) * chunk_size, total_size))，
+保存为 {upload_dir}/sessions/{upload_id}/{i:06d}.part（先写临时文件再原子重命名，可重复上传）。
+"""
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from typing import Iterator
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..models.upload_session import UploadSession
+from .storage import BlobStore
+
+
+def utcnow() -> datetime:
+    """数据库中统一保存不带时区的 UTC 时间。"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def session_dir(upload_id: str) -> str:
+    return os.path.join(get_settings().upload_dir, "sessions", upload_id)
+
+
+def _chunk_path(upload_id: str, index: int) -> str:
+    return os.path.join(session_dir(upload_id), f"{index:06d}.part")
+
+
+def chunk_count(sess: UploadSession) -> int:
+    return (sess.total_size + sess.chunk_size - 1) // sess.chunk_size
+
+
+def expected_chunk_length(sess: UploadSession, index: int) -> int:
+    start = index * sess.chunk_size
+    return min(sess.chunk_size, sess.total_size - start)
+
+
+def received_chunks(sess: UploadSession) -> list[int]:
+    d = session_dir(sess.id)
+    if not os.path.isdir(d):
+        return []
+    return sorted(int(name[:-5]) for name in os.listdir(d) if name.endswith(".part") and name[:-5].isdigit())
+
+
+def received_ranges(sess: UploadSession, chunks: list[int]) -> list[tuple[int, int]]:
+    """将已接收分片合并为字节区间列表 [(start, end_exclusive), ...]。"""
+    ranges: list[tuple[int, int]] = []
+    for i in chunks:
+        start = i * sess.chunk_size
+        end = start + expected_chunk_length(sess, i)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return ranges
+
+
+def write_chunk(sess: UploadSession, index: int, data: bytes) -> None:
+    d = session_dir(sess.id)
+    os.makedirs(d, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=d, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(data)
+        os.replace(tmp_path, _chunk_path(sess.id, index))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _iter_assembled(sess: UploadSession, read_size: int) -> Iterator[bytes]:
+    for i in range(chunk_count(sess)):
+        with open(_chunk_path(sess.id, i), "rb") as f:
+            while True:
+                block = f.read(read_size)
+                if not block:
+                    break
+                yield block
+
+
+def assemble(sess: UploadSession, store: BlobStore) -> tuple[int, str]:
+    """按顺序合并全部分片写入 blob 存储，返回 (字节数, sha256 hex)。"""
+    settings = get_settings()
+    return store.put_chunks(
+        _iter_assembled(sess, settings.upload_chunk_bytes),
+        max_bytes=sess.total_size,
+    )
+
+
+def claim(db: Session, upload_id: str) -> bool:
+    """
+    以条件 DELETE 认领会话（由调用方提交事务）。并发的 complete / abort 中只有一个删到该行，
+    其余返回 False；分片文件在提交成功后再由 remove_chunks 删除。
+    """
+    result = db.execute(
+        delete(UploadSession).where(UploadSession.id == upload_id).execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def remove_chunks(upload_id: str) -> None:
+    shutil.rmtree(session_dir(upload_id), ignore_errors=True)
+
+
+def purge_expired(db: Session) -> int:
+    """清理已过期的上传会话，返回清理数量。"""
+    now = utcnow()
+    expired = [row.id for row in db.query(UploadSession.id).filter(UploadSession.expires_at < now)]
+    if expired:
+        db.execute(
+            delete(UploadSession)
+            .where(UploadSession.id.in_(expired), UploadSession.expires_at < now)
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+    for upload_id in expired:
+        remove_chunks(upload_id)
+    return len(expired)
@@ -0,0 +1,227 @@
+"""
+已认证用户缓存：get_current_user 按用户 id 缓存启用状态的用户记录，省去每个请求的 SELECT users。
+
+- 缓存内容为用户列的快照（不含 password_hash），带 updated_at 作为版本戳；命中时通过
+  merge(load=False) 挂到当前会话，路由拿到的仍是普通的持久化 User 对象，不发查询；
+- 用户在任意事务中被修改或删除（update_user、reset_password、停用、批量导入等）时，
+  事务提交后失效对应条目（监听 Session 的 after_flush / after_commit）；
+- 读库与失效并发时，以进程内的失效计数为准：读取期间发生过失效则不回填，避免旧数据写回缓存。
+
+后端由 Settings.user_cache_backend 选择：
+- memory：进程内 LRU（条数上限 user_cache_max_entries，过期时间 user_cache_ttl_seconds）。
+  多 worker 部署时其它进程最多在 TTL 内读到旧记录；
+- redis：多 worker / 多实例共享（需安装 redis，地址为 user_cache_redis_url），失效对所有进程立即生效；
+- none：关闭缓存；
+- 其它值视为 "模块路径:类名"，类需实现 UserCacheBackend 的 get/set/delete/clear。
+"""
+import importlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from ..config import get_settings
+from ..models.user import User
+
+try:
+    import redis
+except ImportError:   # 可选依赖
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = ("id", "username", "role", "real_name", "org_id", "is_active", "created_at", "updated_at")
+_DATETIME_COLUMNS = ("created_at", "updated_at")
+
+
+class UserCacheBackend:
+    """按用户 id 存取 JSON 兼容的快照 dict。"""
+
+    def get(self, user_id: int) -> Optional[dict]:
+        raise NotImplementedError
+
+    def set(self, user_id: int, data: dict) -> None:
+        raise NotImplementedError
+
+    def delete(self, user_id: int) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class NullBackend(UserCacheBackend):
+    def get(self, user_id: int) -> Optional[dict]:
+        return None
+
+    def set(self, user_id: int, data: dict) -> None:
+        pass
+
+    def delete(self, user_id: int) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+
+class MemoryBackend(UserCacheBackend):
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[int, tuple[float, dict]] = OrderedDict()
+
+    def get(self, user_id: int) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def set(self, user_id: int, data: dict) -> None:
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, data)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisBackend(UserCacheBackend):
+    prefix = "zxyk:user:"
+
+    def __init__(self, url: str, ttl_seconds: float):
+        if redis is None:
+            raise RuntimeError("user_cache_backend=redis 需要安装 redis")
+        self._client = redis.Redis.from_url(url)
+        self.ttl_ms = max(int(ttl_seconds * 1000), 1)
+
+    def get(self, user_id: int) -> Optional[dict]:
+        raw = self._client.get(f"{self.prefix}{user_id}")
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, user_id: int, data: dict) -> None:
+        self._client.set(f"{self.prefix}{user_id}", json.dumps(data), px=self.ttl_ms)
+
+    def delete(self, user_id: int) -> None:
+        self._client.delete(f"{self.prefix}{user_id}")
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(f"{self.prefix}*"))
+        if keys:
+            self._client.delete(*keys)
+
+
+def _load_backend(name: str) -> UserCacheBackend:
+    settings = get_settings()
+    if name == "none":
+        return NullBackend()
+    if name == "memory":
+        return MemoryBackend(settings.user_cache_ttl_seconds, settings.user_cache_max_entries)
+    if name == "redis":
+        return RedisBackend(settings.user_cache_redis_url, settings.user_cache_ttl_seconds)
+    module, _, cls = name.partition(":")
+    return getattr(importlib.import_module(module), cls)()
+
+
+def _snapshot(user: User) -> dict:
+    data = {c: getattr(user, c) for c in _COLUMNS}
+    for c in _DATETIME_COLUMNS:
+        if data[c] is not None:
+            data[c] = data[c].isoformat()
+    return data
+
+
+def _detached_user(data: dict) -> User:
+    values = dict(data)
+    for c in _DATETIME_COLUMNS:
+        if values[c] is not None:
+            values[c] = datetime.fromisoformat(values[c])
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+
+class UserCache:
+    def __init__(self, backend: UserCacheBackend):
+        self.backend = backend
+        self._epoch = 0   # 每次失效递增
+
+    @property
+    def epoch(self) -> int:
+        return self._epoch
+
+    def _get(self, user_id: int) -> Optional[dict]:
+        # 缓存故障时退化为直接查库，不影响认证
+        try:
+            return self.backend.get(user_id)
+        except Exception:
+            logger.exception("读取用户缓存失败 user_id=%s", user_id)
+            return None
+
+    def get(self, db: Session, user_id: int) -> Optional[User]:
+        data = self._get(user_id)
+        return db.merge(_detached_user(data), load=False) if data is not None else None
+
+    def put(self, user: User, epoch: int) -> None:
+        """缓存启用状态的用户；epoch 为读库前取得的 self.epoch，期间发生过失效则放弃回填。"""
+        if not user.is_active or epoch != self._epoch:
+            return
+        try:
+            self.backend.set(user.id, _snapshot(user))
+        except Exception:
+            logger.exception("写入用户缓存失败 user_id=%s", user.id)
+
+    def invalidate(self, user_ids) -> None:
+        self._epoch += 1
+        for user_id in user_ids:
+            try:
+                self.backend.delete(user_id)
+            except Exception:
+                logger.exception("失效用户缓存失败 user_id=%s", user_id)
+
+    def clear(self) -> None:
+        self._epoch += 1
+        self.backend.clear()
+
+
+@lru_cache
+def get_user_cache() -> UserCache:
+    return UserCache(_load_backend(get_settings().user_cache_backend))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session: Session, flush_context) -> None:
+    changed = {obj.id for obj in (*session.dirty, *session.deleted) if isinstance(obj, User)}
+    if changed:
+        session.info.setdefault("user_cache_invalidate", set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    changed = session.info.pop("user_cache_invalidate", None)
+    if changed:
+        get_user_cache().invalidate(changed)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_changed(session: Session, previous_transaction) -> None:
+    session.info.pop("user_cache_invalidate", None)
@@ -7,23 +7,39 @@ import pytest
 # 设置测试环境变量（必须在导入 app 之前）
 os.environ["DATABASE_URL"] = "sqlite:///:memory:"
 os.environ["SECRET_KEY"] = "test-secret-key-for-unit-tests"
+os.environ["LICENSE_REVOCATION_REFRESH_SECONDS"] = "0"   # 启动时不加载吊销列表（测试库由 fixture 建表）
 
 from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlalchemy.orm import sessionmaker, Session
 from fastapi.testclient import TestClient
 
-from app.database import Base, get_db
+from app.database import Base, get_async_db, get_async_read_db, get_db, get_read_db
 from app.main import app
 from app.models import *  # noqa: F401, F403
 from app.services.auth import hash_password
+from app.services.revocation import get_revocations
+from app.services.user_cache import get_user_cache
 
-# 共享测试引擎（SQLite in-memory 需要同一个连接才能看到表）
+# 共享缓存的 in-memory 数据库：同步 Session 与异步（aiosqlite）连接看到同一份数据，
+# _connection 保持打开以维持数据库存活
+_TEST_DB = "file:cloud_test?mode=memory&cache=shared&uri=true"
 _test_engine = create_engine(
-    "sqlite:///:memory:",
+    f"sqlite:///{_TEST_DB}",
     connect_args={"check_same_thread": False},
 )
+_async_test_engine = create_async_engine(f"sqlite+aiosqlite:///{_TEST_DB}", poolclass=NullPool)
+_AsyncTestSession = async_sessionmaker(_async_test_engine, autoflush=False, expire_on_commit=False)
 
-# SQLite in-memory: 让所有 session 共享同一个底层连接
+
+@event.listens_for(_test_engine, "connect")
+@event.listens_for(_async_test_engine.sync_engine, "connect")
+def _read_uncommitted(dbapi_conn, _record):
+    # 共享缓存下读事务会持有表级读锁，阻塞另一连接的写入；测试中关闭读锁
+    dbapi_conn.execute("PRAGMA read_uncommitted = 1")
+
+# 同步 Session 共享同一个底层连接
 _connection = _test_engine.connect()
 
 
@@ -31,8 +47,13 @@ _connection = _test_engine.connect()
 def _setup_tables():
     """每个测试前建表，测试后清表。"""
     Base.metadata.create_all(bind=_connection)
+    _connection.commit()
+    get_user_cache().clear()   # 每个测试重建表，用户 id 会重复
+    get_revocations().reset()
     yield
+    _connection.rollback()
     Base.metadata.drop_all(bind=_connection)
+    _connection.commit()
 
 
 @pytest.fixture()
@@ -56,7 +77,15 @@ def client(db: Session):
         finally:
             pass
 
+    async def _override_get_async_db():
+        async with _AsyncTestSession() as session:
+            yield session
+
     app.dependency_overrides[get_db] = _override_get_db
+    app.dependency_overrides[get_async_db] = _override_get_async_db
+    # 测试环境没有副本，只读依赖同样指向测试数据库
+    app.dependency_overrides[get_read_db] = _override_get_db
+    app.dependency_overrides[get_async_read_db] = _override_get_async_db
     with TestClient(app, raise_server_exceptions=True) as c:
         yield c
     app.dependency_overrides.clear()
@@ -114,3 +143,13 @@ def teacher_headers(client, seed_users) -> dict:
     })
     token = resp.json()["access_token"]
     return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture()
+def upload_settings(tmp_path, monkeypatch):
+    """将上传目录指向临时目录，返回 Settings 以便测试调整上传相关配置。"""
+    from app.config import get_settings
+
+    settings = get_settings()
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    return settings
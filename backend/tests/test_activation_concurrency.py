@@ -0,0 +1,103 @@
+"""
+License 并发压力测试：多线程同时激活，断言同一 key 只绑定一台机器；多线程同时生成，断言机构持有数不超过配额。
+
+使用独立的 SQLite 文件库（WAL + busy_timeout，多连接真实并发写入）；
+设置环境变量 TEST_POSTGRES_URL（指向一个可随意建删表的空库）时同时在 PostgreSQL 上执行。
+"""
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.config import Settings
+from app.database import Base, get_engine
+from app.models.license import License
+from app.models.organization import Organization
+from app.services.license import LicenseQuotaExceeded, activate_license, create_licenses, lock_org_for_quota
+
+THREADS = 16
+
+
+def _databases():
+    yield pytest.param("sqlite", id="sqlite")
+    yield pytest.param(
+        "postgresql", id="postgresql",
+        marks=pytest.mark.skipif(not os.environ.get("TEST_POSTGRES_URL"), reason="未设置 TEST_POSTGRES_URL"),
+    )
+
+
+@pytest.fixture(params=list(_databases()))
+def session_factory(request, tmp_path):
+    url = f"sqlite:///{tmp_path / 'activation.db'}" if request.param == "sqlite" else os.environ["TEST_POSTGRES_URL"]
+    engine = get_engine(Settings(database_url=url, db_pool_size=THREADS, sqlite_busy_timeout_ms=30000))
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine, autoflush=False)
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+def _seed(factory, quota: int, keys: list[str]) -> int:
+    with factory() as db:
+        org = Organization(name="并发测试学校", license_quota=quota)
+        db.add(org)
+        db.flush()
+        db.add_all(License(license_key=k, org_id=org.id, license_type="education") for k in keys)
+        db.commit()
+        return org.id
+
+
+def _run_together(factory, fn, args: list) -> list:
+    """每个线程一个会话，所有线程在同一时刻开始执行 fn(db, arg)，按顺序返回结果。"""
+    barrier = threading.Barrier(len(args))
+
+    def _call(arg):
+        with factory() as db:
+            barrier.wait()
+            return fn(db, arg)
+
+    with ThreadPoolExecutor(max_workers=len(args)) as pool:
+        return list(pool.map(_call, args))
+
+
+def _hammer(factory, attempts: list[tuple[str, str]]) -> list[dict]:
+    return _run_together(factory, lambda db, attempt: activate_license(db, *attempt), attempts)
+
+
+def test_same_key_binds_exactly_one_machine(session_factory):
+    _seed(session_factory, quota=10, keys=["RACE-0000-0000-0001"])
+    results = _hammer(session_factory, [("RACE-0000-0000-0001", f"machine_{i}") for i in range(THREADS)])
+
+    winners = [r for r in results if "activation_token" in r]
+    assert len(winners) == 1
+    assert Counter(r.get("error") for r in results if "error" in r) == {"LICENSE_ALREADY_BOUND": THREADS - 1}
+    with session_factory() as db:
+        lic = db.query(License).one()
+        assert lic.machine_id is not None and lic.activated_at is not None
+
+
+def test_same_machine_retries_are_idempotent(session_factory):
+    _seed(session_factory, quota=10, keys=["RACE-0000-0000-0002"])
+    results = _hammer(session_factory, [("RACE-0000-0000-0002", "machine_same")] * THREADS)
+    assert all("activation_token" in r for r in results)
+
+
+def test_quota_caps_concurrent_generation(session_factory):
+    quota = 5
+    org_id = _seed(session_factory, quota=quota, keys=[])
+
+    def _generate(db, _):
+        org = lock_org_for_quota(db, org_id)
+        try:
+            create_licenses(db, org, "education", 1)
+        except LicenseQuotaExceeded:
+            db.rollback()
+            return False
+        db.commit()
+        return True
+
+    assert sum(_run_together(session_factory, _generate, list(range(THREADS)))) == quota
+    with session_factory() as db:
+        assert db.query(License).filter(License.org_id == org_id).count() == quota
@@ -0,0 +1,185 @@
+"""
+统计分析接口测试：单条/批量上报、按天汇总。
+"""
+import json
+from datetime import date
+
+from app.models.analytics import Analytics
+
+
+def _payload(org_id: int, **overrides) -> dict:
+    data = {
+        "license_id": 1,
+        "org_id": org_id,
+        "report_date": "2026-03-01",
+        "active_user_count": 5,
+        "experiment_count": 12,
+        "module_usage": {"circuit": 3},
+    }
+    data.update(overrides)
+    return data
+
+
+class TestAnalyticsReport:
+    def test_report_single(self, client, seed_users):
+        resp = client.post("/api/cloud/analytics/report", json=_payload(seed_users["org"].id))
+        assert resp.status_code == 201
+        assert resp.json()["experiment_count"] == 12
+
+
+class TestAnalyticsBatch:
+    def test_batch_json_array(self, client, db, seed_users):
+        org_id = seed_users["org"].id
+        items = [_payload(org_id, experiment_count=i) for i in range(3)]
+        resp = client.post("/api/cloud/analytics/report/batch", json=items)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["accepted"] == 3
+        assert data["rejected"] == 0
+        assert [r["status"] for r in data["results"]] == ["created"] * 3
+        assert db.query(Analytics).count() == 3
+
+    def test_batch_partial_invalid(self, client, db, seed_users):
+        org_id = seed_users["org"].id
+        items = [_payload(org_id), {"org_id": org_id}, _payload(org_id, experiment_count=7)]
+        resp = client.post("/api/cloud/analytics/report/batch", json=items)
+        data = resp.json()
+        assert data["accepted"] == 2
+        assert data["rejected"] == 1
+        assert data["results"][1]["status"] == "invalid"
+        assert data["results"][1]["error"]
+        # id 与请求顺序对应
+        rec = db.query(Analytics).filter(Analytics.id == data["results"][2]["id"]).first()
+        assert rec.experiment_count == 7
+
+    def test_batch_ndjson(self, client, db, seed_users):
+        org_id = seed_users["org"].id
+        body = "\n".join([json.dumps(_payload(org_id)), "{broken", json.dumps(_payload(org_id)), ""])
+        resp = client.post(
+            "/api/cloud/analytics/report/batch",
+            content=body,
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["accepted"] == 2
+        assert data["results"][1]["status"] == "invalid"
+
+    def test_batch_rejects_non_array(self, client, seed_users):
+        resp = client.post("/api/cloud/analytics/report/batch", json=_payload(seed_users["org"].id))
+        assert resp.status_code == 400
+
+
+class TestAnalyticsRollups:
+    def test_overview_and_trends_from_rollups(self, client, db, admin_headers, seed_users):
+        org_id = seed_users["org"].id
+        today = date.today().isoformat()
+        client.post("/api/cloud/analytics/report", json=_payload(org_id, report_date=today))
+        client.post("/api/cloud/analytics/report/batch", json=[
+            _payload(org_id, report_date=today, active_user_count=1, experiment_count=3),
+        ])
+
+        resp = client.get("/api/cloud/analytics/overview", headers=admin_headers)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["total_active_orgs"] == 1
+        assert data["active_users_last_30d"] == 6
+        assert data["total_experiments"] == 15
+        assert data["org_summaries"][0]["org_name"] == "测试大学"
+
+        resp = client.get(
+            "/api/cloud/analytics/trends",
+            params={"start": today, "end": today},
+            headers=admin_headers,
+        )
+        assert resp.json()["data"] == [{"report_date": today, "active_users": 6, "experiment_count": 15}]
+
+    def test_rebuild_matches_incremental(self, client, db, seed_users):
+        from app.models.analytics import AnalyticsOrgDaily, AnalyticsModuleDaily
+        from app.services.analytics import rebuild_rollups
+
+        org_id = seed_users["org"].id
+        client.post("/api/cloud/analytics/report/batch", json=[
+            _payload(org_id, report_date="2026-03-01", experiment_count=2),
+            _payload(org_id, report_date="2026-03-01", experiment_count=4),
+            _payload(org_id, report_date="2026-03-02", experiment_count=8),
+        ])
+
+        def snapshot():
+            db.expire_all()
+            return (
+                sorted((r.org_id, r.report_date, r.experiment_count, r.report_count) for r in db.query(AnalyticsOrgDaily)),
+                sorted((r.org_id, r.report_date, r.module_id, r.usage_count) for r in db.query(AnalyticsModuleDaily)),
+            )
+
+        incremental = snapshot()
+        rebuild_rollups(db)
+        assert snapshot() == incremental
+        assert incremental[0][0][2:] == (6, 2)
+        assert incremental[1][0][3] == 6
+
+    def test_overview_org_summaries_paginated(self, client, db, admin_headers, seed_users):
+        from app.models.organization import Organization
+
+        orgs = [Organization(name=f"分页机构_{i}") for i in range(3)]
+        db.add_all(orgs)
+        db.commit()
+        client.post("/api/cloud/analytics/report/batch", json=[
+            _payload(org.id, experiment_count=(i + 1) * 10) for i, org in enumerate(orgs)
+        ])
+
+        resp = client.get("/api/cloud/analytics/overview?org_limit=2", headers=admin_headers)
+        data = resp.json()
+        assert data["org_summary_total"] == 3
+        assert [s["org_name"] for s in data["org_summaries"]] == ["分页机构_2", "分页机构_1"]
+
+        resp = client.get("/api/cloud/analytics/overview?org_limit=2&org_offset=2", headers=admin_headers)
+        assert [s["org_name"] for s in resp.json()["org_summaries"]] == ["分页机构_0"]
+
+    def test_modules_aggregated_with_filters(self, client, db, admin_headers, seed_users):
+        from app.models.organization import Organization
+
+        other = Organization(name="另一所学校")
+        db.add(other)
+        db.commit()
+        org_id = seed_users["org"].id
+        client.post("/api/cloud/analytics/report/batch", json=[
+            _payload(org_id, report_date="2026-03-01", module_usage={"circuit": 3, "optics": 1}),
+            _payload(org_id, report_date="2026-03-05", module_usage={"circuit": 2}),
+            _payload(other.id, report_date="2026-03-01", module_usage={"optics": 10}),
+        ])
+
+        resp = client.get("/api/cloud/analytics/modules", headers=admin_headers)
+        assert resp.json()["data"] == [
+            {"module_id": "optics", "total_count": 11},
+            {"module_id": "circuit", "total_count": 5},
+        ]
+
+        resp = client.get(
+            "/api/cloud/analytics/modules",
+            params={"org_id": org_id, "end": "2026-03-02"},
+            headers=admin_headers,
+        )
+        assert resp.json()["data"] == [
+            {"module_id": "circuit", "total_count": 3},
+            {"module_id": "optics", "total_count": 1},
+        ]
+
+    def test_overlong_module_ids_rejected(self, client, db, admin_headers, seed_users):
+        from app.services.analytics import rebuild_rollups
+
+        org_id = seed_users["org"].id
+        resp = client.post("/api/cloud/analytics/report/batch", json=[
+            _payload(org_id, module_usage={"circuit": 3, "m" * 51: 2}),
+            _payload(org_id, module_usage={"circuit": 1}),
+        ])
+        body = resp.json()
+        assert (body["accepted"], body["rejected"]) == (1, 1)
+        assert "module_id" in body["results"][0]["error"]
+
+        # 校验之前写入的历史明细：重建汇总时跳过超长模块名，明细保留
+        db.add(Analytics(license_id=1, org_id=org_id, report_date=date(2026, 3, 1), module_usage={"circuit": 3, "m" * 51: 2}))
+        db.commit()
+        rebuild_rollups(db)
+        resp = client.get("/api/cloud/analytics/modules", headers=admin_headers)
+        assert resp.json()["data"] == [{"module_id": "circuit", "total_count": 4}]
@@ -0,0 +1,152 @@
+"""
+数据库引擎配置测试：连接池参数、SQLite PRAGMA、异步引擎、只读副本路由、连接池诊断接口。
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.config import Settings
+from app import database
+from app.database import (
+    ReplicaMonitor, get_async_db, get_async_engine, get_async_read_db, get_engine, get_read_db, has_async_driver, pool_stats,
+)
+
+
+def test_postgres_pool_settings(monkeypatch):
+    import psycopg2
+
+    captured = {}
+
+    def _fake_connect(*args, **kwargs):
+        captured.update(kwargs)
+        raise psycopg2.OperationalError("测试中不连接真实数据库")
+
+    monkeypatch.setattr(psycopg2, "connect", _fake_connect)
+    engine = get_engine(Settings(
+        database_url="postgresql://u:p@localhost/db",
+        db_pool_size=7, db_max_overflow=3, db_pool_recycle=600, db_statement_timeout_ms=1500,
+    ))
+    assert engine.pool.size() == 7
+    assert engine.pool._max_overflow == 3
+    assert engine.pool._recycle == 600
+    assert engine.pool._pre_ping is True
+    stats = pool_stats(engine)
+    assert stats["capacity"] == 10 and stats["checkedout"] == 0
+
+    with pytest.raises(OperationalError):
+        engine.connect()
+    assert captured["options"] == "-c statement_timeout=1500"
+
+
+def test_sqlite_file_uses_wal(tmp_path):
+    engine = get_engine(Settings(database_url=f"sqlite:///{tmp_path / 'wal.db'}", sqlite_busy_timeout_ms=2500))
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1   # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 2500
+    engine.dispose()
+
+
+def test_async_engine_driver_and_pool():
+    engine = get_async_engine(Settings(
+        database_url="postgresql://u:p@localhost/db", db_pool_size=4, db_max_overflow=2,
+        db_async_pool_size=3, db_async_max_overflow=1,
+    ))
+    assert engine.url.drivername == "postgresql+asyncpg"
+    assert pool_stats(engine.sync_engine)["capacity"] == 4   # 异步池单独配置
+
+
+def test_async_sqlite_file_uses_wal(tmp_path):
+    engine = get_async_engine(Settings(database_url=f"sqlite:///{tmp_path / 'wal.db'}"))
+
+    async def _journal_mode():
+        async with engine.connect() as conn:
+            mode = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+        await engine.dispose()
+        return mode
+
+    assert engine.url.drivername == "sqlite+aiosqlite"
+    assert asyncio.run(_journal_mode()) == "wal"
+
+
+def test_async_engine_requires_async_driver(monkeypatch):
+    url = "mssql+pyodbc://u:p@localhost/db"
+    assert not has_async_driver(url)
+    with pytest.raises(RuntimeError, match="异步驱动"):
+        get_async_engine(Settings(database_url=url))
+
+    # 启动时没有创建异步引擎：调用异步接口时才报错
+    monkeypatch.setattr(database, "async_engine", None)
+    with pytest.raises(RuntimeError, match="异步驱动"):
+        asyncio.run(get_async_db().__anext__())
+
+
+@pytest.fixture()
+def replica(tmp_path, monkeypatch):
+    """把副本指向一个 SQLite 文件，返回 (同步引擎, 异步引擎, 监视器)。"""
+    url = f"sqlite:///{tmp_path / 'replica.db'}"
+    engines = (get_engine(url=url), get_async_engine(url=url), ReplicaMonitor(max_lag_seconds=5, check_interval=60))
+    monkeypatch.setattr(database, "replica_engine", engines[0])
+    monkeypatch.setattr(database, "async_replica_engine", engines[1])
+    monkeypatch.setattr(database, "replica_monitor", engines[2])
+    yield engines
+    engines[0].dispose()
+
+
+def _read_bind():
+    gen = get_read_db()
+    try:
+        return next(gen).get_bind()
+    finally:
+        gen.close()
+
+
+def test_read_db_uses_replica_until_lag_exceeds_limit(replica, monkeypatch):
+    replica_engine, _, monitor = replica
+    assert _read_bind() is replica_engine
+    assert monitor.lag_seconds == 0.0
+
+    monkeypatch.setattr(database, "replica_lag_seconds", lambda conn: 30.0)
+    assert _read_bind() is replica_engine     # 检查结果仍在缓存期内
+    monitor._next_check = 0
+    assert _read_bind() is database.engine
+    assert monitor.lag_seconds == 30.0 and not monitor.healthy
+
+
+def test_unreachable_replica_falls_back_to_primary(tmp_path):
+    monitor = ReplicaMonitor(max_lag_seconds=5, check_interval=60)
+    unreachable = get_engine(url=f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    assert monitor.usable(unreachable) is False
+    assert monitor.lag_seconds is None
+
+
+def test_async_read_db_routing(replica):
+    _, async_replica_engine, monitor = replica
+
+    async def _bind():
+        gen = get_async_read_db()
+        session = await gen.__anext__()
+        bind = session.bind
+        await gen.aclose()
+        return bind
+
+    async def _run():
+        first = await _bind()
+        monitor._record(60.0)
+        second = await _bind()
+        await async_replica_engine.dispose()
+        return first, second
+
+    assert asyncio.run(_run()) == (async_replica_engine, database.async_engine)
+
+
+def test_pool_diagnostics_requires_super_admin(client, admin_headers, teacher_headers):
+    assert client.get("/api/cloud/admin/diagnostics/db-pool", headers=teacher_headers).status_code == 403
+    resp = client.get("/api/cloud/admin/diagnostics/db-pool", headers=admin_headers)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert "pool_class" in data and "status" in data
+    assert "pool_class" in data["async"]
+    assert data["replica"] is None
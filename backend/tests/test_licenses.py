@@ -1,8 +1,24 @@
 """
-License 管理接口测试：生成、激活、验证、吊销。
+License 管理接口测试：生成、激活、验证、吊销、内存吊销列表。
 """
+import csv
+import io
+import json
 import re
 
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from sqlalchemy import event
+
+from app.config import get_settings
+from app.manage import main as manage_main
+from app.models.license import License
+from app.services.notify import MemoryBackend
+from app.services.revocation import RevocationList, get_revocations
+from app.services.signing import b64url_decode, b64url_encode, get_keyring
+
+from .conftest import _async_test_engine, _test_engine
+
 
 class TestLicenseGenerate:
     def test_generate_license(self, client, admin_headers, seed_users):
@@ -74,6 +90,20 @@ class TestLicenseActivateVerify:
         })
         assert resp.status_code == 409
 
+    def test_over_quota_legacy_org_can_still_activate(self, client, admin_headers, seed_users, db):
+        # 引入配额检查之前就持有超过配额的机构：已发出的 License 照常激活，只是不能再生成
+        org = seed_users["org"]   # 默认配额 10
+        db.add_all(License(license_key=f"LEGA-CY00-0000-{i:04d}", org_id=org.id, license_type="education") for i in range(12))
+        db.commit()
+
+        resp = client.post("/api/cloud/licenses/activate", json={
+            "license_key": "LEGA-CY00-0000-0000", "machine_id": "machine_A",
+        })
+        assert resp.status_code == 200
+        assert client.post("/api/cloud/licenses/generate", json={
+            "org_id": org.id, "license_type": "trial",
+        }, headers=admin_headers).status_code == 409
+
     def test_activate_nonexistent_key(self, client, seed_users):
         resp = client.post("/api/cloud/licenses/activate", json={
             "license_key": "XXXX-XXXX-XXXX-XXXX",
@@ -108,3 +138,238 @@ class TestLicenseRevoke:
             "activation_token": token,
         })
         assert resp3.json()["is_active"] is False
+
+
+class TestRevocationList:
+    @pytest.fixture()
+    def license_queries(self):
+        """记录同步、异步测试引擎上查询 licenses 表的语句。"""
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            if "FROM licenses" in statement:
+                statements.append(statement)
+
+        engines = (_test_engine, _async_test_engine.sync_engine)
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", _record)
+        yield statements
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", _record)
+
+    def _activate(self, client, admin_headers, org_id) -> tuple[int, str]:
+        lic = client.post("/api/cloud/licenses/generate", json={
+            "org_id": org_id, "license_type": "education",
+        }, headers=admin_headers).json()
+        token = client.post("/api/cloud/licenses/activate", json={
+            "license_key": lic["license_key"], "machine_id": "machine_R",
+        }).json()["activation_token"]
+        return lic["id"], token
+
+    def test_verify_without_db_and_revoke_applies_immediately(
+        self, client, admin_headers, seed_users, db, monkeypatch, license_queries,
+    ):
+        license_id, token = self._activate(client, admin_headers, seed_users["org"].id)
+        revocations = get_revocations()
+        monkeypatch.setattr(revocations, "refresh_seconds", 60)
+        revocations.load(db)
+        assert revocations.ready
+
+        license_queries.clear()
+        resp = client.post("/api/cloud/licenses/verify", json={"activation_token": token})
+        assert resp.json()["is_active"] is True
+        assert license_queries == []
+
+        client.put(f"/api/cloud/licenses/{license_id}/revoke", headers=admin_headers)
+        assert revocations.is_revoked(license_id)
+        license_queries.clear()
+        resp = client.post("/api/cloud/licenses/verify", json={"activation_token": token})
+        assert resp.json()["is_active"] is False
+        assert license_queries == []
+
+    def test_load_keeps_updates_received_while_loading(self, db, seed_users, monkeypatch):
+        db.add_all([License(license_key="K-1", license_type="trial", is_active=False),
+                    License(license_key="K-2", license_type="trial")])
+        db.commit()
+        revoked_id, active_id = (lic.id for lic in db.query(License).order_by(License.id))
+        revocations = RevocationList(MemoryBackend(), refresh_seconds=60)
+
+        original_scalars = db.scalars
+
+        def _scalars_then_update(*args, **kwargs):
+            result = list(original_scalars(*args, **kwargs))
+            # 模拟加载查询返回后、替换集合前收到的广播
+            revocations.publish(active_id, True)
+            revocations.publish(revoked_id, False)
+            return result
+
+        monkeypatch.setattr(db, "scalars", _scalars_then_update)
+        revocations.load(db)
+        assert revocations.is_revoked(active_id)
+        assert not revocations.is_revoked(revoked_id)
+
+    def test_stale_list_falls_back_to_db(self, db):
+        revocations = RevocationList(MemoryBackend(), refresh_seconds=60)
+        assert not revocations.ready
+        revocations.load(db)
+        assert revocations.ready
+        revocations._loaded_at -= 60 * 3 + 1
+        assert not revocations.ready
+
+
+    def test_backend_for_multiple_workers(self, monkeypatch):
+        from app.config import Settings
+        from app.services import revocation
+
+        def _resolve(**overrides):
+            monkeypatch.setattr(revocation, "get_settings", lambda: Settings(**overrides))
+            revocation.get_revocations.cache_clear()
+            try:
+                lst = revocation.get_revocations()
+                return type(lst.backend).__name__, lst.refresh_seconds
+            finally:
+                revocation.get_revocations.cache_clear()
+
+        single = _resolve(database_url="sqlite:///x.db", license_revocation_refresh_seconds=60)
+        assert single == ("MemoryBackend", 60)
+        # 多 worker 但没有可广播的后端：不使用内存集合，verify 查库
+        multi = _resolve(database_url="sqlite:///x.db", web_concurrency=4, license_revocation_refresh_seconds=60)
+        assert multi == ("MemoryBackend", 0)
+        assert revocation._backend_name(Settings(database_url="postgresql://u:p@localhost/db", web_concurrency=4)) == "postgres"
+
+class TestSignedTokens:
+    @pytest.fixture()
+    def keys(self, tmp_path, monkeypatch):
+        """生成一把 ed25519、一把 rsa 私钥；返回 use(active, retired) 切换密钥配置。"""
+        paths = {}
+        for alg in ("ed25519", "rsa"):
+            paths[alg] = str(tmp_path / f"{alg}.pem")
+            manage_main(["generate-signing-key", "--alg", alg, "--out", paths[alg]])
+        settings = get_settings()
+
+        def use(active, retired=()):
+            monkeypatch.setattr(settings, "rsa_private_key_path", paths[active])
+            monkeypatch.setattr(settings, "license_retired_key_paths", ",".join(paths[r] for r in retired))
+            get_keyring.cache_clear()
+
+        yield use
+        get_keyring.cache_clear()
+
+    def _token(self, client, admin_headers, org_id, machine_id="machine_S") -> str:
+        lic = client.post("/api/cloud/licenses/generate", json={
+            "org_id": org_id, "license_type": "education",
+        }, headers=admin_headers).json()
+        return client.post("/api/cloud/licenses/activate", json={
+            "license_key": lic["license_key"], "machine_id": machine_id,
+        }).json()["activation_token"]
+
+    def _verify(self, client, token) -> bool:
+        return client.post("/api/cloud/licenses/verify", json={"activation_token": token}).json()["is_active"]
+
+    def test_ed25519_token_verifies_offline_with_jwks(self, client, admin_headers, seed_users, keys):
+        keys("ed25519")
+        token = self._token(client, admin_headers, seed_users["org"].id)
+        header_b64, payload_b64, sig_b64 = token.split(".")
+        header = json.loads(b64url_decode(header_b64))
+        assert header["alg"] == "EdDSA"
+
+        resp = client.get("/api/cloud/licenses/jwks")
+        assert "max-age" in resp.headers["cache-control"]
+        (jwk,) = resp.json()["keys"]
+        assert jwk["kid"] == header["kid"] and jwk["crv"] == "Ed25519"
+        # 客户端离线验证：只用 JWKS 中的公钥
+        public_key = ed25519.Ed25519PublicKey.from_public_bytes(b64url_decode(jwk["x"]))
+        public_key.verify(b64url_decode(sig_b64), f"{header_b64}.{payload_b64}".encode())
+        assert json.loads(b64url_decode(payload_b64))["machine_id"] == "machine_S"
+
+        assert self._verify(client, token) is True
+        forged = json.loads(b64url_decode(payload_b64))
+        forged["license_type"] = "permanent"
+        forged_b64 = b64url_encode(json.dumps(forged).encode())
+        assert self._verify(client, f"{header_b64}.{forged_b64}.{sig_b64}") is False
+
+    def test_rotation_keeps_old_tokens_valid(self, client, admin_headers, seed_users, keys):
+        keys("rsa")
+        old_token = self._token(client, admin_headers, seed_users["org"].id, "machine_old")
+        assert json.loads(b64url_decode(old_token.split(".")[0]))["alg"] == "RS256"
+
+        keys("ed25519", retired=["rsa"])
+        new_token = self._token(client, admin_headers, seed_users["org"].id, "machine_new")
+        assert {k["alg"] for k in client.get("/api/cloud/licenses/jwks").json()["keys"]} == {"EdDSA", "RS256"}
+        assert self._verify(client, old_token) is True
+        assert self._verify(client, new_token) is True
+
+        keys("ed25519")   # 旧密钥下线
+        assert self._verify(client, old_token) is False
+
+    def test_missing_key_file_fails_at_startup(self, tmp_path, monkeypatch):
+        from fastapi.testclient import TestClient
+
+        from app.main import app
+
+        monkeypatch.setattr(get_settings(), "rsa_private_key_path", str(tmp_path / "missing.pem"))
+        get_keyring.cache_clear()
+        try:
+            with pytest.raises(RuntimeError, match="签名密钥文件不存在"):
+                with TestClient(app):
+                    pass
+        finally:
+            get_keyring.cache_clear()
+
+    def test_legacy_tokens_can_be_disabled(self, client, admin_headers, seed_users, monkeypatch):
+        token = self._token(client, admin_headers, seed_users["org"].id)
+        assert token.count(".") == 1 and self._verify(client, token) is True
+        monkeypatch.setattr(get_settings(), "license_accept_legacy_tokens", False)
+        assert self._verify(client, token) is False
+
+
+class TestBulkGenerate:
+    def _bulk(self, client, admin_headers, org_id, count):
+        return client.post("/api/cloud/licenses/generate/bulk", json={
+            "org_id": org_id, "license_type": "education", "count": count,
+        }, headers=admin_headers)
+
+    def test_bulk_generate_streams_csv(self, client, admin_headers, seed_users, db):
+        org = seed_users["org"]
+        org.license_quota = 5000
+        db.commit()
+
+        resp = self._bulk(client, admin_headers, org.id, 1200)
+        assert resp.status_code == 201
+        assert resp.headers["content-type"].startswith("text/csv")
+        assert "attachment" in resp.headers["content-disposition"]
+        rows = list(csv.reader(io.StringIO(resp.content.decode("utf-8-sig"))))
+        assert rows[0] == ["id", "license_key", "org_id", "license_type"]
+        keys = [r[1] for r in rows[1:]]
+        assert len(keys) == 1200 and len(set(keys)) == 1200
+        assert all(re.fullmatch(r"[0-9A-F]{4}(-[0-9A-F]{4}){3}", k) for k in keys)
+        assert db.query(License).filter(License.org_id == org.id).count() == 1200
+
+    def test_bulk_generate_enforces_quota(self, client, admin_headers, seed_users, db):
+        org_id = seed_users["org"].id   # 默认配额 10
+        assert self._bulk(client, admin_headers, org_id, 8).status_code == 201
+        resp = self._bulk(client, admin_headers, org_id, 3)
+        assert resp.status_code == 409
+        assert db.query(License).filter(License.org_id == org_id).count() == 8   # 整批不写入
+
+        # 吊销的 License 不占配额
+        lic_id = db.query(License.id).filter(License.org_id == org_id).first()[0]
+        client.put(f"/api/cloud/licenses/{lic_id}/revoke", headers=admin_headers)
+        assert self._bulk(client, admin_headers, org_id, 3).status_code == 201
+        assert client.post("/api/cloud/licenses/generate", json={
+            "org_id": org_id, "license_type": "trial",
+        }, headers=admin_headers).status_code == 409
+
+    def test_bulk_generate_validation(self, client, admin_headers, teacher_headers, seed_users):
+        assert self._bulk(client, admin_headers, seed_users["org"].id, 0).status_code == 422
+        assert self._bulk(client, admin_headers, 99999, 1).status_code == 404
+        assert self._bulk(client, teacher_headers, seed_users["org"].id, 1).status_code == 403
+
+    def test_generated_keys_skip_existing(self, db, seed_users, monkeypatch):
+        from app.services import license as license_service
+
+        db.add(License(license_key="AAAA-AAAA-AAAA-AAAA", org_id=seed_users["org"].id, license_type="trial"))
+        db.commit()
+        candidates = iter(["AAAA-AAAA-AAAA-AAAA", "AAAA-AAAA-AAAA-AAAA", "BBBB-BBBB-BBBB-BBBB", "CCCC-CCCC-CCCC-CCCC"])
+        monkeypatch.setattr(license_service, "generate_license_key", lambda: next(candidates))
+        assert sorted(license_service.generate_unused_keys(db, 2)) == ["BBBB-BBBB-BBBB-BBBB", "CCCC-CCCC-CCCC-CCCC"]
@@ -0,0 +1,246 @@
+"""
+迁移命令测试：空库升级、create_all 建出的旧库自动标记基线后升级。
+"""
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.config import Settings, get_settings
+from app.database import Base
+from app.manage import main
+from app.migrate import alembic_config, migration_engine, upgrade
+from app.models import ChangeLog, Organization, Report, Task, User
+
+# 引入 Alembic 之前最初的 create_all 在 SQLite 上建出的结构（冻结副本，不随模型变化）
+BASELINE_DDL = """
+CREATE TABLE organizations (
+    id INTEGER NOT NULL, 
+    name VARCHAR(100) NOT NULL, 
+    contact_name VARCHAR(50), 
+    contact_phone VARCHAR(20), 
+    address VARCHAR(200), 
+    license_quota INTEGER NOT NULL, 
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL, 
+    updated_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL, 
+    PRIMARY KEY (id)
+);
+CREATE INDEX ix_organizations_id ON organizations (id);
+CREATE TABLE software_updates (
+    id INTEGER NOT NULL, 
+    version VARCHAR(20) NOT NULL, 
+    release_date DATE NOT NULL, 
+    release_notes TEXT, 
+    download_url VARCHAR(500), 
+    file_size BIGINT, 
+    is_mandatory BOOLEAN NOT NULL, 
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL, 
+    PRIMARY KEY (id), 
+    UNIQUE (version)
+);
+CREATE INDEX ix_software_updates_id ON software_updates (id);
+CREATE TABLE licenses (
+    id INTEGER NOT NULL, 
+    license_key VARCHAR(64) NOT NULL, 
+    org_id INTEGER, 
+    license_type VARCHAR(20) NOT NULL, 
+    machine_id VARCHAR(64), 
+    is_active BOOLEAN NOT NULL, 
+    activated_at DATETIME, 
+    expires_at DATETIME, 
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL, 
+    updated_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL, 
+    PRIMARY KEY (id), 
+    FOREIGN KEY(org_id) REFERENCES organizations (id)
+);
+CREATE UNIQUE INDEX ix_licenses_license_key ON licenses (license_key);
+CREATE INDEX ix_licenses_id ON licenses (id);
+CREATE TABLE users (
+    id INTEGER NOT NULL, 
+    username VARCHAR(50) NOT NULL, 
+    password_hash VARCHAR(255) NOT NULL, 
+    role VARCHAR(20) NOT NULL, 
+    real_name VARCHAR(50), 
+    org_id INTEGER, 
+    is_active BOOLEAN NOT NULL, 
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL, 
+    updated_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL, 
+    PRIMARY KEY (id), 
+    CONSTRAINT uq_username_org UNIQUE (username, org_id), 
+    FOREIGN KEY(org_id) REFERENCES organizations (id)
+);
+CREATE INDEX ix_users_id ON users (id);
+CREATE INDEX ix_users_username ON users (username);
+CREATE TABLE refresh_tokens (
+    id INTEGER NOT NULL, 
+    user_id INTEGER NOT NULL, 
+    token_hash VARCHAR(255) NOT NULL, 
+    expires_at DATETIME NOT NULL, 
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL, 
+    PRIMARY KEY (id), 
+    FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+CREATE INDEX ix_refresh_tokens_token_hash ON refresh_tokens (token_hash);
+CREATE INDEX ix_refresh_tokens_id ON refresh_tokens (id);
+CREATE TABLE tasks (
+    id INTEGER NOT NULL, 
+    title VARCHAR(200) NOT NULL, 
+    description TEXT, 
+    module_id VARCHAR(50), 
+    teacher_id INTEGER, 
+    org_id INTEGER, 
+    deadline DATETIME, 
+    max_score INTEGER NOT NULL, 
+    status VARCHAR(20) NOT NULL, 
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL, 
+    updated_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL, 
+    PRIMARY KEY (id), 
+    FOREIGN KEY(teacher_id) REFERENCES users (id), 
+    FOREIGN KEY(org_id) REFERENCES organizations (id)
+);
+CREATE INDEX ix_tasks_org_id ON tasks (org_id);
+CREATE INDEX ix_tasks_id ON tasks (id);
+CREATE TABLE analytics (
+    id INTEGER NOT NULL, 
+    license_id INTEGER, 
+    org_id INTEGER, 
+    report_date DATE NOT NULL, 
+    active_user_count INTEGER NOT NULL, 
+    experiment_count INTEGER NOT NULL, 
+    module_usage JSON, 
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL, 
+    PRIMARY KEY (id), 
+    FOREIGN KEY(license_id) REFERENCES licenses (id), 
+    FOREIGN KEY(org_id) REFERENCES organizations (id)
+);
+CREATE INDEX ix_analytics_org_id ON analytics (org_id);
+CREATE INDEX ix_analytics_report_date ON analytics (report_date);
+CREATE INDEX ix_analytics_license_id ON analytics (license_id);
+CREATE INDEX ix_analytics_id ON analytics (id);
+CREATE TABLE sync_logs (
+    id INTEGER NOT NULL, 
+    license_id INTEGER, 
+    sync_type VARCHAR(50), 
+    direction VARCHAR(10), 
+    record_count INTEGER NOT NULL, 
+    status VARCHAR(20), 
+    synced_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL, 
+    PRIMARY KEY (id), 
+    FOREIGN KEY(license_id) REFERENCES licenses (id)
+);
+CREATE INDEX ix_sync_logs_id ON sync_logs (id);
+CREATE TABLE reports (
+    id INTEGER NOT NULL, 
+    task_id INTEGER, 
+    student_id INTEGER, 
+    file_path VARCHAR(500), 
+    original_filename VARCHAR(255), 
+    file_size BIGINT, 
+    score INTEGER, 
+    feedback TEXT, 
+    grader_id INTEGER, 
+    status VARCHAR(20) NOT NULL, 
+    submitted_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL, 
+    graded_at DATETIME, 
+    updated_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL, 
+    PRIMARY KEY (id), 
+    FOREIGN KEY(task_id) REFERENCES tasks (id), 
+    FOREIGN KEY(student_id) REFERENCES users (id), 
+    FOREIGN KEY(grader_id) REFERENCES users (id)
+);
+CREATE INDEX ix_reports_id ON reports (id);
+CREATE INDEX ix_reports_student_id ON reports (student_id);
+CREATE INDEX ix_reports_task_id ON reports (task_id);
+"""
+
+
+def _indexes(engine, table: str) -> set[str]:
+    return {ix["name"] for ix in inspect(engine).get_indexes(table)}
+
+
+def test_migrate_empty_database(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'fresh.db'}"
+    monkeypatch.setattr(get_settings(), "database_url", url)
+    assert main(["migrate"]) == 0
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT version_num FROM alembic_version")).scalar() == ScriptDirectory.from_config(alembic_config()).get_current_head()
+    assert "ix_tasks_org_status_updated" in _indexes(engine, "tasks")
+
+
+def test_migrate_upgrades_original_baseline_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    engine.raw_connection().driver_connection.executescript(BASELINE_DDL)
+
+    upgrade(engine)
+    with engine.connect() as conn:
+        assert compare_metadata(MigrationContext.configure(conn), Base.metadata) == []
+
+    with Session(engine) as db:
+        org = Organization(name="旧库学校")
+        db.add(org)
+        db.flush()
+        teacher = User(username="t", password_hash="x", role="teacher", org_id=org.id)
+        db.add(teacher)
+        db.flush()
+        task = Task(title="旧库任务", org_id=org.id, teacher_id=teacher.id, status="published")
+        db.add(task)
+        db.flush()
+        db.add(Report(task_id=task.id, student_id=teacher.id, checksum="0" * 64))
+        db.commit()
+        assert db.query(Report).one().checksum == "0" * 64
+        assert db.query(ChangeLog).filter(ChangeLog.entity == "tasks").count() == 1
+
+
+def test_migrate_normalizes_sync_timestamps(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'timestamps.db'}")
+    engine.raw_connection().driver_connection.executescript(BASELINE_DDL)
+    with engine.begin() as conn:
+        # 旧版本由 CURRENT_TIMESTAMP 写入，不带小数秒
+        conn.execute(text("INSERT INTO organizations (name, license_quota) VALUES ('旧库学校', 10)"))
+        conn.execute(text(
+            "INSERT INTO tasks (title, org_id, max_score, status) VALUES ('旧任务', 1, 100, 'published')"
+        ))
+
+    upgrade(engine)
+    with engine.connect() as conn:
+        raw = conn.execute(text("SELECT updated_at FROM tasks")).scalar()
+    assert len(raw) == 26 and raw.endswith(".000000")
+
+    with Session(engine) as db:
+        db.add(Task(title="新任务", org_id=1, status="published"))
+        db.commit()
+        # 新写入的行与旧行格式一致，按原列排序即按时间排序
+        assert all(len(v) == 26 for v in db.execute(text("SELECT updated_at FROM tasks")).scalars())
+
+
+def test_migrate_stamps_legacy_create_all_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    # 模拟后来的版本启动时由 create_all 建出的库：新表已存在，但还没有新索引
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_tasks_org_status_updated"))
+        conn.execute(text("CREATE INDEX ix_tasks_org_id ON tasks (org_id)"))
+
+    upgrade(engine)
+    assert "ix_tasks_org_status_updated" in _indexes(engine, "tasks")
+    assert "ix_tasks_org_id" not in _indexes(engine, "tasks")
+
+
+def test_migration_engine_has_no_statement_timeout(monkeypatch):
+    import psycopg2
+
+    captured = {}
+
+    def _fake_connect(*args, **kwargs):
+        captured.update(kwargs)
+        raise psycopg2.OperationalError("测试中不连接真实数据库")
+
+    monkeypatch.setattr(psycopg2, "connect", _fake_connect)
+    engine = migration_engine(Settings(database_url="postgresql://u:p@localhost/db", db_statement_timeout_ms=30000))
+    with pytest.raises(OperationalError):
+        engine.connect()
+    assert "options" not in captured
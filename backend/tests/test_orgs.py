@@ -62,3 +62,34 @@ class TestOrgCRUD:
     def test_non_admin_forbidden(self, client, teacher_headers):
         resp = client.get("/api/cloud/orgs", headers=teacher_headers)
         assert resp.status_code == 403
+
+
+class TestOrgListCursor:
+    def test_cursor_pagination_walks_all_rows(self, client, admin_headers):
+        for i in range(5):
+            client.post("/api/cloud/orgs", json={"name": f"游标机构_{i}"}, headers=admin_headers)
+
+        seen, cursor = [], ""
+        while cursor is not None:
+            resp = client.get("/api/cloud/orgs", params={"cursor": cursor, "page_size": 2}, headers=admin_headers)
+            assert resp.status_code == 200
+            data = resp.json()
+            assert data["page"] is None
+            seen.extend(item["id"] for item in data["items"])
+            cursor = data["next_cursor"]
+
+        offset_ids = [
+            item["id"]
+            for item in client.get("/api/cloud/orgs?page_size=50", headers=admin_headers).json()["items"]
+        ]
+        assert seen == offset_ids
+        assert len(seen) == 6   # 含 seed 机构
+
+    def test_count_none_and_bad_cursor(self, client, admin_headers):
+        resp = client.get("/api/cloud/orgs?count=none", headers=admin_headers)
+        data = resp.json()
+        assert data["total"] is None and data["pages"] is None
+        assert len(data["items"]) >= 1
+
+        resp = client.get("/api/cloud/orgs?cursor=not-a-cursor", headers=admin_headers)
+        assert resp.status_code == 400
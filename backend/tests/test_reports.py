@@ -0,0 +1,210 @@
+"""
+报告管理接口测试：上传、断点续传、去重存储、下载。
+"""
+import hashlib
+import os
+
+from app.models.report import Report
+
+
+def _upload(client, seed_users, content: bytes, filename: str = "report.pdf"):
+    return client.post(
+        "/api/cloud/reports/upload",
+        data={"task_id": "1", "student_id": str(seed_users["users"]["student1"].id)},
+        files={"file": (filename, content, "application/pdf")},
+    )
+
+
+class TestReportUpload:
+    def test_upload_records_size_and_checksum(self, client, db, seed_users, upload_settings):
+        content = b"%PDF-1.4 experiment report" * 1000
+        resp = _upload(client, seed_users, content)
+        assert resp.status_code == 201
+        data = resp.json()
+        assert data["file_size"] == len(content)
+        assert data["checksum"] == hashlib.sha256(content).hexdigest()
+
+        report = db.query(Report).filter(Report.id == data["id"]).first()
+        with open(report.file_path, "rb") as f:
+            assert f.read() == content
+
+    def test_upload_too_large(self, client, db, seed_users, upload_settings, monkeypatch):
+        monkeypatch.setattr(upload_settings, "report_max_upload_bytes", 100)
+        monkeypatch.setattr(upload_settings, "upload_chunk_bytes", 16)
+        resp = _upload(client, seed_users, b"x" * 101)
+        assert resp.status_code == 413
+        assert db.query(Report).count() == 0
+
+
+class TestReportBlobStore:
+    def test_duplicate_content_stored_once(self, client, db, seed_users, upload_settings):
+        from app.services.storage import get_blob_store
+
+        content = b"same template file"
+        r1 = _upload(client, seed_users, content, "a.pdf").json()
+        r2 = _upload(client, seed_users, content, "b.pdf").json()
+        assert r1["checksum"] == r2["checksum"]
+
+        paths = {rep.file_path for rep in db.query(Report)}
+        assert len(paths) == 1
+        assert [c for c, _ in get_blob_store().iter_blobs()] == [r1["checksum"]]
+
+    def test_download(self, client, seed_users, upload_settings, teacher_headers):
+        data = _upload(client, seed_users, b"downloadable").json()
+        resp = client.get(f"/api/cloud/reports/{data['id']}/download", headers=teacher_headers)
+        assert resp.status_code == 200
+        assert resp.content == b"downloadable"
+
+    def test_gc_removes_only_orphans(self, client, db, seed_users, upload_settings):
+        import io
+        from app.services.storage import collect_garbage, get_blob_store
+
+        kept = _upload(client, seed_users, b"referenced").json()["checksum"]
+        store = get_blob_store()
+        _, orphan = store.put(io.BytesIO(b"orphan"), 1024, 1024)
+
+        assert collect_garbage(db, grace_seconds=0, dry_run=True) == [orphan]
+        assert store.exists(orphan)
+        assert collect_garbage(db, grace_seconds=0) == [orphan]
+        assert not store.exists(orphan)
+        assert store.exists(kept)
+
+
+    def test_gc_keeps_blob_reused_after_scan(self, db, upload_settings, monkeypatch):
+        import io
+        import time
+        from app.services.storage import collect_garbage, get_blob_store
+
+        store = get_blob_store()
+        _, checksum = store.put(io.BytesIO(b"shared template"), 1024, 1024)
+        stale = time.time() - 7200
+        os.utime(store.path_for(checksum), (stale, stale))
+
+        def _scan_then_reuse():
+            # 扫描时 blob 已过宽限期且无引用；随后一次上传复用了它（Report 尚未提交）
+            yield checksum, stale
+            store.put(io.BytesIO(b"shared template"), 1024, 1024)
+
+        monkeypatch.setattr(store, "iter_blobs", _scan_then_reuse)
+        assert collect_garbage(db, store=store, grace_seconds=3600) == []
+        assert store.exists(checksum)
+
+
+class TestResumableUpload:
+    def _create(self, client, seed_users, total_size: int, chunk_size: int = 64 * 1024):
+        resp = client.post("/api/cloud/reports/uploads", json={
+            "task_id": 1,
+            "student_id": seed_users["users"]["student1"].id,
+            "filename": "video.mp4",
+            "total_size": total_size,
+            "chunk_size": chunk_size,
+        })
+        assert resp.status_code == 201
+        return resp.json()
+
+    def test_out_of_order_chunks_then_complete(self, client, db, seed_users, upload_settings):
+        content = bytes(range(256)) * 600   # 153600 字节 → 3 个分片
+        sess = self._create(client, seed_users, len(content))
+        assert sess["chunk_count"] == 3
+        cs = sess["chunk_size"]
+        url = f"/api/cloud/reports/uploads/{sess['upload_id']}"
+
+        for i in (2, 0):
+            resp = client.put(f"{url}/chunks/{i}?offset={i * cs}", content=content[i * cs:(i + 1) * cs])
+            assert resp.status_code == 200
+
+        status_resp = client.get(url).json()
+        assert status_resp["received_chunks"] == [0, 2]
+        assert status_resp["received_ranges"] == [[0, cs], [2 * cs, len(content)]]
+
+        resp = client.post(f"{url}/complete")
+        assert resp.status_code == 409
+        assert resp.json()["detail"]["missing_chunks"] == [1]
+
+        client.put(f"{url}/chunks/1", content=content[cs:2 * cs])
+        resp = client.post(f"{url}/complete")
+        assert resp.status_code == 201
+        report = resp.json()
+        assert report["file_size"] == len(content)
+        assert report["checksum"] == hashlib.sha256(content).hexdigest()
+        assert report["original_filename"] == "video.mp4"
+        assert client.get(url).status_code == 404
+
+    def test_concurrent_complete_creates_one_report(self, client, db, seed_users, upload_settings, monkeypatch):
+        from sqlalchemy import text
+        from app.services import upload_session as resumable
+
+        content = b"chunked" * 100
+        sess = self._create(client, seed_users, len(content))
+        url = f"/api/cloud/reports/uploads/{sess['upload_id']}"
+        client.put(f"{url}/chunks/0", content=content)
+
+        assemble = resumable.assemble
+
+        def _assemble_then_lose_race(*args):
+            result = assemble(*args)
+            # 另一个 complete 在本次合并期间认领了会话
+            db.execute(text("DELETE FROM upload_sessions WHERE id = :id"), {"id": sess["upload_id"]})
+            return result
+
+        monkeypatch.setattr(resumable, "assemble", _assemble_then_lose_race)
+        assert client.post(f"{url}/complete").status_code == 404
+        assert db.query(Report).count() == 0
+        # 分片由认领成功的一方在提交后删除
+        assert os.listdir(resumable.session_dir(sess["upload_id"])) == ["000000.part"]
+
+    def test_rejects_bad_chunk(self, client, seed_users, upload_settings):
+        sess = self._create(client, seed_users, 100 * 1024)
+        url = f"/api/cloud/reports/uploads/{sess['upload_id']}"
+        assert client.put(f"{url}/chunks/0", content=b"short").status_code == 400
+        assert client.put(f"{url}/chunks/5", content=b"x").status_code == 400
+        assert client.put(f"{url}/chunks/1?offset=0", content=b"x" * (36 * 1024)).status_code == 400
+
+
+class TestReportDownloadCaching:
+    def _uploaded(self, client, seed_users):
+        content = bytes(range(256)) * 4
+        report = _upload(client, seed_users, content, "lab.pdf").json()
+        return content, report, f"/api/cloud/reports/{report['id']}/download"
+
+    def test_etag_and_conditional_get(self, client, seed_users, upload_settings, teacher_headers):
+        content, report, url = self._uploaded(client, seed_users)
+        resp = client.get(url, headers=teacher_headers)
+        assert resp.status_code == 200
+        assert resp.headers["etag"] == f'"{report["checksum"]}"'
+        assert resp.headers["accept-ranges"] == "bytes"
+
+        resp = client.get(url, headers={**teacher_headers, "If-None-Match": resp.headers["etag"]})
+        assert resp.status_code == 304
+        assert resp.content == b""
+
+        resp = client.get(url, headers={**teacher_headers, "If-Modified-Since": resp.headers["last-modified"]})
+        assert resp.status_code == 304
+
+    def test_range_requests(self, client, seed_users, upload_settings, teacher_headers):
+        content, report, url = self._uploaded(client, seed_users)
+        resp = client.get(url, headers={**teacher_headers, "Range": "bytes=10-19"})
+        assert resp.status_code == 206
+        assert resp.content == content[10:20]
+        assert resp.headers["content-range"] == f"bytes 10-19/{len(content)}"
+
+        resp = client.get(url, headers={**teacher_headers, "Range": "bytes=-5"})
+        assert resp.content == content[-5:]
+
+        resp = client.get(url, headers={**teacher_headers, "Range": f"bytes={len(content)}-"})
+        assert resp.status_code == 416
+
+        # If-Range 不匹配时返回完整内容
+        resp = client.get(url, headers={**teacher_headers, "Range": "bytes=0-0", "If-Range": '"stale"'})
+        assert resp.status_code == 200
+        assert resp.content == content
+
+    def test_accel_redirect(self, client, seed_users, upload_settings, teacher_headers, monkeypatch):
+        monkeypatch.setattr(upload_settings, "download_accel_redirect_prefix", "/protected-uploads/")
+        _, report, url = self._uploaded(client, seed_users)
+        resp = client.get(url, headers=teacher_headers)
+        checksum = report["checksum"]
+        assert resp.headers["x-accel-redirect"] == (
+            f"/protected-uploads/blobs/{checksum[:2]}/{checksum[2:4]}/{checksum}"
+        )
+        assert resp.content == b""
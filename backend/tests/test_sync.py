@@ -0,0 +1,327 @@
+"""
+数据同步接口测试：游标分页协议。
+"""
+from datetime import datetime
+
+from app.models.task import Task
+
+
+def _seed_tasks(db, org_id: int, teacher_id: int, n: int, ts: datetime) -> list[int]:
+    tasks = [Task(title=f"同步任务_{i}", org_id=org_id, teacher_id=teacher_id, status="published") for i in range(n)]
+    db.add_all(tasks)
+    db.flush()
+    # 全部使用同一时间戳，验证游标不会跳过/重复同一时间戳的记录
+    db.execute(Task.__table__.update().where(Task.id.in_([t.id for t in tasks])).values(updated_at=ts))
+    db.commit()
+    return [t.id for t in tasks]
+
+
+class TestSyncCursor:
+    def test_pages_through_same_timestamp_rows(self, client, db, seed_users):
+        org_id = seed_users["org"].id
+        ids = _seed_tasks(db, org_id, seed_users["users"]["teacher1"].id, 5, datetime(2026, 3, 1, 8, 0, 0))
+
+        seen, cursor, has_more = [], None, True
+        while has_more:
+            params = {"org_id": org_id, "limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            data = client.get("/api/cloud/sync/tasks", params=params).json()
+            seen.extend(t["id"] for t in data["items"])
+            cursor, has_more = data["next_cursor"], data["has_more"]
+        assert seen == ids
+
+        # 之后没有新数据：返回空页，游标保持不变
+        data = client.get("/api/cloud/sync/tasks", params={"org_id": org_id, "cursor": cursor}).json()
+        assert data == {"items": [], "next_cursor": cursor, "has_more": False}
+
+    def test_pages_through_server_default_timestamps(self, client, db, seed_users):
+        # updated_at 由数据库端 db_now() 写入，同一秒内的多行时间戳相同，游标需按 (ts, id) 推进
+        org_id = seed_users["org"].id
+        teacher_id = seed_users["users"]["teacher1"].id
+        db.add_all(Task(title=f"同步任务_{i}", org_id=org_id, teacher_id=teacher_id, status="published") for i in range(5))
+        db.commit()
+        ids = [t.id for t in db.query(Task).order_by(Task.id)]
+
+        def _drain(fetch) -> list[int]:
+            seen, cursor, has_more = [], None, True
+            while has_more:
+                page = fetch(cursor)
+                seen.extend(item["id"] for item in page["items"])
+                cursor, has_more = page["next_cursor"], page["has_more"]
+            return seen
+
+        assert _drain(lambda cursor: client.get("/api/cloud/sync/tasks", params={
+            "org_id": org_id, "limit": 2, **({"cursor": cursor} if cursor else {}),
+        }).json()) == ids
+        assert _drain(lambda cursor: client.post("/api/cloud/sync/delta", json={
+            "org_id": org_id, "limit": 2, "cursors": {"tasks": cursor} if cursor else {},
+        }).json()["tasks"]) == ids
+
+    def test_since_starts_paginated_feed(self, client, db, seed_users):
+        org_id = seed_users["org"].id
+        teacher_id = seed_users["users"]["teacher1"].id
+        _seed_tasks(db, org_id, teacher_id, 2, datetime(2025, 1, 1))
+        new_ids = _seed_tasks(db, org_id, teacher_id, 2, datetime(2026, 3, 1))
+
+        data = client.get("/api/cloud/sync/tasks", params={
+            "org_id": org_id, "since": "2026-01-01T00:00:00", "limit": 10,
+        }).json()
+        assert [t["id"] for t in data["items"]] == new_ids
+        assert data["has_more"] is False
+
+    def test_legacy_requires_since(self, client, seed_users):
+        resp = client.get("/api/cloud/sync/users", params={"org_id": seed_users["org"].id})
+        assert resp.status_code == 422
+
+
+class TestSyncDelta:
+    def test_delta_returns_all_entities_and_logs(self, client, db, seed_users):
+        from app.models.license import License
+        from app.models.report import Report
+        from app.models.sync_log import SyncLog
+
+        org_id = seed_users["org"].id
+        teacher_id = seed_users["users"]["teacher1"].id
+        student_id = seed_users["users"]["student1"].id
+        task_ids = _seed_tasks(db, org_id, teacher_id, 2, datetime(2026, 3, 1))
+        db.add(Report(task_id=task_ids[0], student_id=student_id, status="graded", score=90,
+                      graded_at=datetime(2026, 3, 2)))
+        db.add(Report(task_id=task_ids[0], student_id=student_id, status="submitted"))
+        lic = License(license_key="SYNC-0000-0000-0001", org_id=org_id, license_type="education")
+        db.add(lic)
+        db.commit()
+
+        resp = client.post("/api/cloud/sync/delta", json={"license_id": lic.id, "limit": 100})
+        assert resp.status_code == 200
+        data = resp.json()
+        assert [t["id"] for t in data["tasks"]["items"]] == task_ids
+        assert len(data["users"]["items"]) == 4
+        assert [r["score"] for r in data["grades"]["items"]] == [90]
+
+        logs = db.query(SyncLog).filter(SyncLog.license_id == lic.id).all()
+        assert sorted((log.sync_type, log.record_count) for log in logs) == [
+            ("grades", 1), ("tasks", 2), ("users", 4),
+        ]
+
+        # 带上游标再次同步：没有新数据
+        cursors = {k: data[k]["next_cursor"] for k in ("tasks", "users", "grades")}
+        data = client.post("/api/cloud/sync/delta", json={"org_id": org_id, "cursors": cursors}).json()
+        assert all(data[k]["items"] == [] for k in cursors)
+
+    def test_delta_rejects_foreign_license(self, client, db, seed_users):
+        from app.models.license import License
+
+        lic = License(license_key="SYNC-0000-0000-0002", org_id=seed_users["org"].id, license_type="trial")
+        db.add(lic)
+        db.commit()
+        resp = client.post("/api/cloud/sync/delta", json={"license_id": lic.id, "org_id": 9999})
+        assert resp.status_code == 403
+
+
+class TestChangeLog:
+    def _feed(self, client, org_id, after=0, limit=100):
+        resp = client.get("/api/cloud/sync/changes", params={"org_id": org_id, "after": after, "limit": limit})
+        assert resp.status_code == 200
+        return resp.json()
+
+    def test_session_events_record_changes_and_deletes(self, client, db, seed_users):
+        from app.models.change_log import ChangeLog
+
+        org_id = seed_users["org"].id
+        base = db.query(ChangeLog).count()
+        task = Task(title="日志任务", org_id=org_id, teacher_id=seed_users["users"]["teacher1"].id, status="published")
+        db.add(task)
+        db.commit()
+        task.title = "日志任务（改）"
+        db.commit()
+        task_id = task.id
+        db.delete(task)
+        db.commit()
+
+        rows = db.query(ChangeLog).order_by(ChangeLog.seq).all()[base:]
+        assert [(r.entity, r.entity_id, r.op, r.org_id) for r in rows] == [
+            ("tasks", task_id, "upsert", org_id),
+            ("tasks", task_id, "upsert", org_id),
+            ("tasks", task_id, "delete", org_id),
+        ]
+        assert rows[0].seq < rows[1].seq < rows[2].seq
+
+        # 同一实体在一页内只下发最后一次变更
+        data = self._feed(client, org_id, after=rows[0].seq - 1)
+        assert [(c["entity"], c["entity_id"], c["op"]) for c in data["items"]] == [("tasks", task_id, "delete")]
+        assert data["next_seq"] == rows[2].seq
+
+    def test_feed_pages_and_hides_out_of_scope_rows(self, client, db, seed_users):
+        from app.models.report import Report
+
+        org_id = seed_users["org"].id
+        teacher_id = seed_users["users"]["teacher1"].id
+        draft = Task(title="草稿", org_id=org_id, teacher_id=teacher_id, status="draft")
+        published = Task(title="已发布", org_id=org_id, teacher_id=teacher_id, status="published")
+        db.add_all([draft, published])
+        db.flush()
+        db.add(Report(task_id=published.id, student_id=seed_users["users"]["student1"].id,
+                      status="graded", score=88))
+        db.commit()
+
+        items, after, has_more = [], 0, True
+        while has_more:
+            data = self._feed(client, org_id, after=after, limit=2)
+            items.extend(data["items"])
+            after, has_more = data["next_seq"], data["has_more"]
+
+        by_key = {(c["entity"], c["entity_id"]): c for c in items}
+        assert by_key[("tasks", draft.id)]["op"] == "delete"
+        assert by_key[("tasks", published.id)]["data"]["title"] == "已发布"
+        assert [c["data"]["score"] for c in items if c["entity"] == "grades"] == [88]
+        assert sum(1 for c in items if c["entity"] == "users") == 4
+        assert self._feed(client, org_id, after=after)["items"] == []
+
+    def test_user_moving_org_is_deleted_from_old_org(self, client, db, seed_users):
+        from app.models.organization import Organization
+
+        old_org = seed_users["org"]
+        new_org = Organization(name="新机构")
+        db.add(new_org)
+        db.commit()
+        head = self._feed(client, old_org.id, limit=2000)["next_seq"]
+
+        student = seed_users["users"]["student1"]
+        student.org_id = new_org.id
+        db.commit()
+
+        old_items = self._feed(client, old_org.id, after=head)["items"]
+        assert [(c["entity"], c["entity_id"], c["op"]) for c in old_items] == [("users", student.id, "delete")]
+        new_items = self._feed(client, new_org.id)["items"]
+        assert [(c["entity_id"], c["op"]) for c in new_items] == [(student.id, "upsert")]
+
+    def test_backfill_and_compact(self, db, seed_users):
+        from app.models.change_log import ChangeLog
+        from app.services.changelog import backfill, compact
+
+        db.query(ChangeLog).delete()
+        db.commit()
+        assert backfill(db) == 4
+
+        user = seed_users["users"]["teacher1"]
+        user.real_name = "改名"
+        db.commit()
+        assert compact(db) == 1
+        rows = db.query(ChangeLog).filter(ChangeLog.entity == "users", ChangeLog.entity_id == user.id).all()
+        assert len(rows) == 1 and rows[0].op == "upsert"
+
+
+class TestSyncEncoding:
+    def test_columnar_gzip_cuts_full_resync_bytes(self, client, db, seed_users):
+        org_id = seed_users["org"].id
+        _seed_tasks(db, org_id, seed_users["users"]["teacher1"].id, 300, datetime(2026, 3, 1))
+        params = {"org_id": org_id, "limit": 1000}
+
+        plain = client.get("/api/cloud/sync/tasks", params=params, headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+
+        resp = client.get("/api/cloud/sync/tasks", params=params, headers={
+            "Accept": "application/vnd.zhixin.columnar+json",
+            "Accept-Encoding": "gzip",
+        })
+        assert resp.headers["content-type"].startswith("application/vnd.zhixin.columnar+json")
+        assert resp.headers["content-encoding"] == "gzip"
+        assert "Accept" in resp.headers["vary"] and "Accept-Encoding" in resp.headers["vary"]
+        assert resp.num_bytes_downloaded * 5 < len(plain.content)
+
+        data = resp.json()
+        columns, rows = data["items"]["columns"], data["items"]["rows"]
+        decoded = [dict(zip(columns, row)) for row in rows]
+        assert decoded == plain.json()["items"]
+        assert data["has_more"] is False
+
+    def test_small_and_unsupported_fall_back(self, client, seed_users):
+        resp = client.get("/api/cloud/sync/users", params={"org_id": seed_users["org"].id, "limit": 1},
+                          headers={"Accept": "application/x-unknown", "Accept-Encoding": "br;q=1, gzip;q=0"})
+        assert resp.headers["content-type"] == "application/json"
+        assert "content-encoding" not in resp.headers
+
+
+class TestSyncNotify:
+    def test_wait_returns_pending_changes_immediately(self, client, db, seed_users):
+        org_id = seed_users["org"].id
+        _seed_tasks(db, org_id, seed_users["users"]["teacher1"].id, 1, datetime(2026, 3, 1))
+
+        data = client.get("/api/cloud/sync/wait", params={"org_id": org_id, "after": 0, "timeout": 0}).json()
+        assert data == {"changed": True, "entities": ["tasks", "users"]}
+
+        head = client.get("/api/cloud/sync/changes", params={"org_id": org_id, "limit": 2000}).json()["next_seq"]
+        data = client.get("/api/cloud/sync/wait", params={"org_id": org_id, "after": head, "timeout": 0}).json()
+        assert data == {"changed": False, "entities": []}
+
+    def test_wait_wakes_on_commit(self, client, db, seed_users):
+        import threading
+        import time
+
+        org_id = seed_users["org"].id
+        task = Task(title="新发布", org_id=org_id, teacher_id=seed_users["users"]["teacher1"].id, status="published")
+        result = {}
+
+        def _wait():
+            result["data"] = client.get("/api/cloud/sync/wait", params={"org_id": org_id, "timeout": 10}).json()
+
+        t = threading.Thread(target=_wait)
+        start = time.monotonic()
+        t.start()
+        time.sleep(0.3)
+        db.add(task)
+        db.commit()
+        t.join(10)
+        assert result["data"] == {"changed": True, "entities": ["tasks"]}
+        assert time.monotonic() - start < 5
+
+    def test_transactional_backend_notifies_inside_commit(self, db, seed_users, monkeypatch):
+        from app.services import changelog, notify
+
+        class _TxBackend(notify.NotificationBackend):
+            transactional = True
+
+            def __init__(self):
+                self.sent = []
+
+            def publish(self, key, event):
+                raise AssertionError("提交后不应另开连接发布")
+
+            def publish_in(self, conn, key, event):
+                self.sent.append((conn.in_transaction(), key, event))
+
+        backend = _TxBackend()
+        notifier = notify.Notifier(backend)
+        monkeypatch.setattr(notify, "get_notifier", lambda: notifier)
+        monkeypatch.setattr(changelog, "get_notifier", lambda: notifier)
+
+        org_id = seed_users["org"].id
+        teacher_id = seed_users["users"]["teacher1"].id
+        db.add(Task(title="提交前通知", org_id=org_id, teacher_id=teacher_id, status="published"))
+        db.commit()   # 未显式 flush：提交前的 flush 产生的变更同样随事务发布
+        assert backend.sent == [(True, org_id, {"entities": ["tasks"]})]
+
+        db.add(Task(title="回滚", org_id=org_id, teacher_id=teacher_id))
+        db.flush()
+        db.rollback()
+        assert len(backend.sent) == 1
+
+    def test_event_stream_format(self):
+        import asyncio
+
+        from app.routers.sync import _event_stream
+        from app.services.notify import get_notifier
+
+        async def _collect():
+            sub = get_notifier().subscribe(42)
+            get_notifier().publish(42, ["grades"])
+            checks = iter([False, True])
+            chunks = [c async for c in _event_stream(sub, ["tasks"], 0.05, lambda: asyncio.sleep(0, next(checks)))]
+            return chunks
+
+        assert asyncio.run(_collect()) == [
+            "retry: 5000\n\n",
+            'event: change\ndata: {"entities": ["tasks"]}\n\n',
+            'event: change\ndata: {"entities": ["grades"]}\n\n',
+        ]
@@ -0,0 +1,40 @@
+"""
+任务管理接口测试：报告打包下载。
+"""
+import csv
+import io
+import zipfile
+
+from app.models.task import Task
+
+
+class TestTaskReportsArchive:
+    def test_archive_contains_reports_and_manifest(
+        self, client, db, seed_users, upload_settings, teacher_headers,
+    ):
+        task = Task(title="电路实验", org_id=seed_users["org"].id, status="published")
+        db.add(task)
+        db.commit()
+        student_id = seed_users["users"]["student1"].id
+        for name, content in [("a.pdf", b"first"), ("b.pdf", b"second")]:
+            resp = client.post(
+                "/api/cloud/reports/upload",
+                data={"task_id": str(task.id), "student_id": str(student_id)},
+                files={"file": (name, content, "application/pdf")},
+            )
+            assert resp.status_code == 201
+
+        resp = client.get(f"/api/cloud/tasks/{task.id}/reports/archive", headers=teacher_headers)
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "application/zip"
+
+        zf = zipfile.ZipFile(io.BytesIO(resp.content))
+        names = zf.namelist()
+        assert names[0] == "manifest.csv"
+        rows = list(csv.DictReader(io.StringIO(zf.read("manifest.csv").decode("utf-8-sig"))))
+        assert [r["username"] for r in rows] == ["student1", "student1"]
+        assert sorted(zf.read(r["file"]) for r in rows) == [b"first", b"second"]
+
+    def test_archive_task_not_found(self, client, teacher_headers):
+        resp = client.get("/api/cloud/tasks/999/reports/archive", headers=teacher_headers)
+        assert resp.status_code == 404
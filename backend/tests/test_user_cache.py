@@ -0,0 +1,84 @@
+"""
+已认证用户缓存测试：命中时不查询 users 表，修改/停用/重置密码后失效，LRU 与 TTL。
+"""
+import pytest
+from sqlalchemy import event
+
+from app.services.user_cache import MemoryBackend, UserCache, get_user_cache
+
+from .conftest import _test_engine
+
+
+@pytest.fixture()
+def user_selects():
+    """记录执行过的查询 users 表的 SELECT 语句。"""
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM users" in statement:
+            statements.append(statement)
+
+    event.listen(_test_engine, "before_cursor_execute", _record)
+    yield statements
+    event.remove(_test_engine, "before_cursor_execute", _record)
+
+
+def test_cached_user_skips_query(client, admin_headers, user_selects):
+    assert client.get("/api/cloud/orgs", headers=admin_headers).status_code == 200
+    assert len(user_selects) == 1
+    user_selects.clear()
+    resp = client.get("/api/cloud/orgs", headers=admin_headers)
+    assert resp.status_code == 200
+    assert user_selects == []
+
+
+def test_deactivation_invalidates(client, admin_headers, teacher_headers, seed_users):
+    teacher_id = seed_users["users"]["teacher1"].id
+    assert client.get("/api/cloud/tasks", headers=teacher_headers).status_code == 200
+    assert get_user_cache().backend.get(teacher_id) is not None
+
+    resp = client.put(f"/api/cloud/users/{teacher_id}", json={"is_active": False}, headers=admin_headers)
+    assert resp.status_code == 200
+    assert get_user_cache().backend.get(teacher_id) is None
+    assert client.get("/api/cloud/tasks", headers=teacher_headers).status_code == 401
+
+
+def test_role_change_takes_effect(client, admin_headers, teacher_headers, seed_users):
+    teacher_id = seed_users["users"]["teacher1"].id
+    assert client.get("/api/cloud/orgs", headers=teacher_headers).status_code == 403
+    client.put(f"/api/cloud/users/{teacher_id}", json={"role": "super_admin"}, headers=admin_headers)
+    assert client.get("/api/cloud/orgs", headers=teacher_headers).status_code == 200
+
+
+def test_reset_password_invalidates(client, admin_headers, teacher_headers, seed_users):
+    teacher_id = seed_users["users"]["teacher1"].id
+    client.get("/api/cloud/tasks", headers=teacher_headers)
+    resp = client.post(
+        f"/api/cloud/users/{teacher_id}/reset-password", json={"new_password": "newpass123"}, headers=admin_headers,
+    )
+    assert resp.status_code == 204
+    assert get_user_cache().backend.get(teacher_id) is None
+
+
+def test_stale_fill_is_discarded(seed_users):
+    cache = UserCache(MemoryBackend(ttl_seconds=60, max_entries=10))
+    teacher = seed_users["users"]["teacher1"]
+    epoch = cache.epoch
+    cache.invalidate([teacher.id])   # 读库期间发生了失效
+    cache.put(teacher, epoch)
+    assert cache.backend.get(teacher.id) is None
+    cache.put(teacher, cache.epoch)
+    assert cache.backend.get(teacher.id)["updated_at"] == teacher.updated_at.isoformat()
+
+
+def test_memory_backend_lru_and_ttl():
+    backend = MemoryBackend(ttl_seconds=60, max_entries=2)
+    backend.set(1, {"id": 1})
+    backend.set(2, {"id": 2})
+    backend.get(1)
+    backend.set(3, {"id": 3})
+    assert backend.get(2) is None and backend.get(1) == {"id": 1}
+
+    backend.ttl_seconds = -1
+    backend.set(4, {"id": 4})
+    assert backend.get(4) is None
@@ -5,8 +5,14 @@ echo   智信优控 · 云端管理平台 启动脚本
 echo ========================================
 echo.
 
+:: 执行数据库迁移（启动 API 前执行一次）
+echo [1/2] 执行数据库迁移...
+pushd "%~dp0backend"
+D:\chenshi\Research\torch_env\python.exe -m app.manage migrate
+popd
+
 :: 启动后端 API（HTTPS，端口 8000，IPv6）
-echo [1/1] 启动后端 API 服务（HTTPS）...
+echo [2/2] 启动后端 API 服务（HTTPS）...
 start "云端后端API" /D "%~dp0backend" D:\chenshi\Research\torch_env\python.exe -m uvicorn app.main:app --host :: --port 8000 --ssl-keyfile key.pem --ssl-certfile cert.pem
 
 :: 等待后端启动